@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.admission.AdmissionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,12 +77,68 @@ WSGI_APPLICATION = 'SCA.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Selected with SCA_DB_ENGINE:
+#   sqlite      - the development default below.
+#   sqlite-wal  - SQLite tuned for single-node deployments (WAL journal, synchronous=NORMAL, busy timeout).
+#   postgresql  - configured from SCA_DB_NAME/USER/PASSWORD/HOST/PORT. Connections are persistent
+#                 (SCA_DB_CONN_MAX_AGE, with health checks) unless SCA_DB_POOL_MAX_SIZE enables
+#                 psycopg's native connection pool instead. SCA_DB_REPLICAS lists read-replica hosts
+#                 that serve list/retrieve requests (see api/db.py).
+
+DB_ENGINE = os.environ.get('SCA_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    _postgres = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('SCA_DB_NAME', 'sca'),
+        'USER': os.environ.get('SCA_DB_USER', 'sca'),
+        'PASSWORD': os.environ.get('SCA_DB_PASSWORD', ''),
+        'HOST': os.environ.get('SCA_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('SCA_DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('SCA_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
-}
+    if os.environ.get('SCA_DB_POOL_MAX_SIZE'):
+        # The native pool replaces persistent connections; Django rejects using both.
+        _postgres['CONN_MAX_AGE'] = 0
+        _postgres['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('SCA_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ['SCA_DB_POOL_MAX_SIZE']),
+            'timeout': int(os.environ.get('SCA_DB_POOL_TIMEOUT', 10)),
+        }
+    DATABASES = {'default': _postgres}
+    for _index, _host in enumerate(filter(None, os.environ.get('SCA_DB_REPLICAS', '').split(','))):
+        DATABASES[f'replica_{_index}'] = {**_postgres, 'HOST': _host.strip(), 'TEST': {'MIRROR': 'default'}}
+elif DB_ENGINE == 'sqlite-wal':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SCA_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'timeout': 5,
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Shards of the admin test runner (api/testrunner.py) run at the same time; each creates its own
+# test database. SQLite test databases are in memory and private to each process already.
+if os.environ.get('SCA_TEST_DB_SUFFIX'):
+    for _database in DATABASES.values():
+        if _database['ENGINE'] != 'django.db.backends.sqlite3' and 'MIRROR' not in _database.get('TEST', {}):
+            _database['TEST'] = {**_database.get('TEST', {}),
+                                 'NAME': f"test_{_database['NAME']}_{os.environ['SCA_TEST_DB_SUFFIX']}"}
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
 
 
 # Password validation
@@ -117,3 +176,152 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Breed registry (api/breeds.py)
+# Breeds are validated against a local snapshot of TheCatAPI, refreshed in the background.
+
+BREED_REGISTRY = {
+    'SOURCE': 'api.breeds.TheCatAPIBreedSource',
+    'URL': 'https://api.thecatapi.com/v1/breeds',
+    'TTL': 24 * 60 * 60,
+    'BACKGROUND_REFRESH': True,
+    'RETRY_INTERVAL': 60,
+}
+
+
+# Django REST Framework
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
+    # orjson when installed, DRF's json otherwise (api/fastjson.py).
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Token buckets per client and endpoint (api/throttling.py, THROTTLE below).
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.TokenBucketThrottle'],
+}
+
+
+# Caching
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# The local-memory cache is per process. With several worker processes set SCA_CACHE_URL
+# (e.g. redis://localhost:6379/0): the response cache's invalidation tokens and the throttle's
+# CacheStore only work across processes in a shared cache (`manage.py check --deploy` warns).
+
+if os.environ.get('SCA_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['SCA_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Response cache for list/retrieve endpoints (api/caching.py).
+API_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+# Streaming CSV/NDJSON import and export (api/transfer.py).
+
+IMPORT_EXPORT = {
+    'BATCH_SIZE': 1000,
+    'MAX_ERRORS': 1000,
+}
+
+
+# Stored responses for requests sent with an Idempotency-Key header (api/idempotency.py).
+
+IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,
+    'LOCK_TIMEOUT': 5 * 60,
+}
+
+
+# Background job queue (api/jobs.py), worked by `manage.py run_worker`. Set NOTIFY_URL to
+# have mission completions posted to it.
+
+JOBS = {
+    'THREADS': 4,
+    'PROCESSES': 1,
+    'BACKOFF': 30,
+    'MAX_ATTEMPTS': 8,
+    'NOTIFY_URL': os.environ.get('SCA_NOTIFY_URL') or None,
+}
+
+
+# Change feed (api/changes.py): GET /api/changes/?since=<cursor>, or pushed as server-sent
+# events from /api/changes/stream/. `manage.py compact_changes` applies RETENTION. On
+# PostgreSQL, concurrent commits can land out of id order, so recent entries settle first.
+
+CHANGES = {
+    'RETENTION': 7 * 24 * 60 * 60,
+    'SETTLE': 1.0 if DB_ENGINE == 'postgresql' else 0.0,
+    'POLL_INTERVAL': 1.0,
+}
+
+
+# Rate limits per client (api/throttling.py): every request spends a token from the client's
+# 'default' bucket and from the bucket of its endpoint ('<basename>.<action>') when one is
+# listed. Recruiting a cat can trigger an outbound breed fetch, hence its lower rate. With
+# several worker processes use 'api.throttling.CacheStore' and a shared cache.
+
+THROTTLE = {
+    'ENABLED': True,
+    'STORE': os.environ.get('SCA_THROTTLE_STORE', 'api.throttling.MemoryStore'),
+    'RATES': {
+        'default': '1200/min',
+        'cat.create': '60/min',
+    },
+}
+
+# Concurrent API requests per process (api/admission.py); the rest get a 503 with Retry-After.
+# Defaults to the size of the PostgreSQL connection pool, when one is configured.
+
+ADMISSION = {
+    'MAX_CONCURRENT': int(os.environ.get('SCA_MAX_CONCURRENT_REQUESTS', 0))
+    or DATABASES['default'].get('OPTIONS', {}).get('pool', {}).get('max_size'),
+    'QUEUE_TIMEOUT': 0.1,
+}
+
+
+# Request metrics and Server-Timing headers (api/metrics.py), scraped from /api/metrics/.
+
+METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+}
+
+
+# Admin system test runner (api/testrunner.py)
+
+SYSTEM_TESTS = {
+    'PATHS': ['api/tests.py'],
+    'WORKERS': 1,
+}
+
+
+# Admin changelists of the large tables (api/estimates.py) estimate their row count instead of
+# running COUNT(*) once an unfiltered table holds more than THRESHOLD rows.
+
+ESTIMATED_COUNTS = {
+    'THRESHOLD': 100000,
+}
@@ -1,5 +1,33 @@
 from django.contrib import admin
-from .models import Cat, Mission, Target
+from django.db import connections, router
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from . import search
+from .estimates import EstimatedCountPaginator
+from .models import Cat, Job, Mission, Target, TestResult, TestRun
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists for tables with millions of rows: estimated page counts, no unfiltered COUNT(*)."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+class IndexedValuesFilter(admin.AllValuesFieldListFilter):
+    """
+    Lists the distinct values of an indexed column by stepping through its index, one MIN()
+    lookup per value, instead of a DISTINCT over every row.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        connection = connections[router.db_for_read(model)]
+        table, column = connection.ops.quote_name(model._meta.db_table), connection.ops.quote_name(field.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH RECURSIVE v(value) AS (SELECT MIN({column}) FROM {table} UNION ALL "
+                f"SELECT (SELECT MIN({column}) FROM {table} WHERE {column} > v.value) "
+                f"FROM v WHERE v.value IS NOT NULL) SELECT value FROM v WHERE value IS NOT NULL"
+            )
+            self.lookup_choices = [value for value, in cursor.fetchall()]
 
 class TargetInline(admin.TabularInline):
     """Allows targets to be managed directly inside the Mission view."""
@@ -9,27 +37,73 @@ class TargetInline(admin.TabularInline):
     fields = ('name', 'country', 'notes', 'is_completed')
 
 @admin.register(Mission)
-class MissionAdmin(admin.ModelAdmin):
+class MissionAdmin(LargeTableAdmin):
     """Admin interface for Missions, allowing cat assignment and target management."""
     list_display = ('id', 'cat', 'is_completed', 'target_count')
+    list_select_related = ('cat',)
     list_filter = ('is_completed',)
+    autocomplete_fields = ('cat',)
     inlines = [TargetInline]
 
+    def get_queryset(self, request):
+        # Counted in the changelist query, by a subquery that runs only for the rows on the page
+        # (a GROUP BY over the join would aggregate every mission, for the page and its count).
+        targets = Target.objects.filter(mission=OuterRef('pk')).order_by().values('mission')
+        return super().get_queryset(request).annotate(
+            target_total=Coalesce(Subquery(targets.annotate(n=Count('pk')).values('n')), 0),
+        )
+
     def target_count(self, obj):
-        return obj.targets.count()
+        return obj.target_total
     target_count.short_description = 'Targets'
 
 @admin.register(Cat)
-class CatAdmin(admin.ModelAdmin):
+class CatAdmin(LargeTableAdmin):
     """Admin interface for Spy Cats."""
-    list_display = ('name', 'breed', 'years_of_experience', 'salary')
-    list_filter = ('breed',)
+    list_display = ('name', 'breed', 'breed_status', 'years_of_experience', 'salary')
+    list_filter = ('breed_status', ('breed', IndexedValuesFilter))
     search_fields = ('name',)
     ordering = ('id',)
 
 @admin.register(Target)
-class TargetAdmin(admin.ModelAdmin):
+class TargetAdmin(LargeTableAdmin):
     """Allows individual targets to be managed and viewed independently of missions."""
     list_display = ('name', 'mission', 'country', 'is_completed')
-    list_filter = ('is_completed', 'country')
-    search_fields = ('name', 'mission__id')
\ No newline at end of file
+    list_select_related = ('mission',)
+    list_filter = ('is_completed', ('country', IndexedValuesFilter))
+    raw_id_fields = ('mission',)
+    # Searched through the full-text index (api.search), or by mission id; see get_search_results.
+    search_fields = ('name', 'notes')
+    search_help_text = "Words from the name or notes, or a mission id."
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = Q(pk__in=search.matching_targets(Target.objects.using(queryset.db), search_term).values('pk'))
+        if search_term.isdigit():
+            matches |= Q(mission_id=int(search_term))
+        return queryset.filter(matches), False
+
+class TestResultInline(admin.TabularInline):
+    model = TestResult
+    extra = 0
+    can_delete = False
+    fields = ('nodeid', 'outcome', 'duration')
+    readonly_fields = fields
+
+@admin.register(TestRun)
+class TestRunAdmin(admin.ModelAdmin):
+    """History of system test runs started from the Agency Command Center."""
+    list_display = ('id', 'status', 'passed', 'failed', 'workers', 'duration', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('status', 'workers', 'passed', 'failed', 'created_at', 'finished_at', 'duration', 'output')
+    inlines = [TestResultInline]
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    """Background jobs run by `manage.py run_worker`; failed ones keep their last error."""
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('task', 'args', 'key', 'attempts', 'locked_by', 'locked_at', 'last_error', 'created_at',
+                       'finished_at')
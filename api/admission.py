@@ -0,0 +1,63 @@
+"""
+Admission control: sheds API requests instead of queueing them behind a saturated database.
+
+`AdmissionMiddleware` lets at most `ADMISSION['MAX_CONCURRENT']` API requests run at once in
+this process (set it to the database pool size). A request arriving when every slot is busy
+waits up to `QUEUE_TIMEOUT` seconds for one and is then answered `503 Service Unavailable`
+with `Retry-After`. A request that still times out waiting for a pooled connection gets the
+same answer rather than a 500. Per-client rate limits are in api.throttling.
+"""
+import threading
+
+from django.conf import settings
+from django.db import OperationalError
+from django.http import JsonResponse
+
+DEFAULTS = {
+    'MAX_CONCURRENT': None,
+    'QUEUE_TIMEOUT': 0.1,
+    'RETRY_AFTER': 1,
+    'PATH_PREFIX': '/api/',
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ADMISSION', {}).get(name, DEFAULTS[name])
+
+
+def pool_exhausted(exc):
+    """True for the error Django raises when psycopg's pool has no connection to hand out in time."""
+    return isinstance(exc, OperationalError) and type(exc.__cause__).__name__ == 'PoolTimeout'
+
+
+def overloaded():
+    response = JsonResponse({"error": "The service is busy; retry shortly."}, status=503)
+    response['Retry-After'] = str(get_setting('RETRY_AFTER'))
+    return response
+
+
+class AdmissionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        limit = get_setting('MAX_CONCURRENT')
+        self.slots = threading.BoundedSemaphore(limit) if limit else None
+        self.timeout = get_setting('QUEUE_TIMEOUT')
+        self.prefix = get_setting('PATH_PREFIX')
+        self.shed = 0
+
+    def __call__(self, request):
+        if self.slots is None or not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        if not self.slots.acquire(timeout=self.timeout):
+            self.shed += 1
+            return overloaded()
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+    def process_exception(self, request, exception):
+        if pool_exhausted(exception):
+            self.shed += 1
+            return overloaded()
+        return None
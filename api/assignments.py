@@ -0,0 +1,244 @@
+"""
+Cat-to-mission assignment.
+
+The "one cat, one mission" rule is enforced by the unique `Mission.cat` column. Assignments
+are written as conditional UPDATEs so the check and the write happen in one statement, and
+constraint violations from concurrent writers are reported as `AssignmentError` (HTTP 400)
+rather than surfacing as server errors.
+
+`auto_assign` staffs every unassigned mission it can from the idle cats at once (see `plan`).
+"""
+from bisect import bisect_right
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, F, OuterRef
+
+from . import caching, changes
+from .models import Cat, Mission
+
+CAT_TAKEN = "This cat is already on another mission."
+
+DEFAULTS = {
+    # Experience a mission asks for per remaining target beyond the first.
+    'YEARS_PER_TARGET': 2,
+    'BATCH_SIZE': 500,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ASSIGNMENT', {}).get(name, DEFAULTS[name])
+
+
+class AssignmentError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def assign_cat(mission_id, cat_id):
+    """Assigns a cat to a mission with a single conditional UPDATE. Returns the cat."""
+    try:
+        # The raw URL kwarg: reject what get_object() would have answered with a 404.
+        mission_id = int(mission_id)
+    except (ValueError, TypeError):
+        raise AssignmentError("Mission not found.", status_code=404)
+    try:
+        cat = Cat.objects.only('id', 'name').get(pk=cat_id)
+    except (Cat.DoesNotExist, ValueError, TypeError):
+        raise AssignmentError("Cat not found.", status_code=404)
+
+    taken = Mission.objects.filter(cat_id=cat.pk).exclude(pk=mission_id)
+    try:
+        with transaction.atomic():
+            updated = Mission.objects.filter(pk=mission_id).filter(~Exists(taken)).update(
+                cat_id=cat.pk, version=F('version') + 1
+            )
+    except IntegrityError:
+        # Another request assigned the cat between our check and the write.
+        raise AssignmentError(CAT_TAKEN)
+
+    if not updated:
+        if not Mission.objects.filter(pk=mission_id).exists():
+            raise AssignmentError("Mission not found.", status_code=404)
+        # Requirement: One cat can only have one mission at a time
+        raise AssignmentError(CAT_TAKEN)
+    caching.invalidate('mission', [mission_id])
+    changes.record('mission', [mission_id])
+    return cat
+
+
+def assign_many(pairs):
+    """
+    Assigns many cats to many missions in one transaction.
+
+    `pairs` is a list of (mission_id, cat_id). Validation uses set-based queries; if any
+    pair is invalid nothing is written and a list of per-pair error messages (None for
+    valid pairs) is raised as the `errors` attribute of an AssignmentError.
+    """
+    mission_ids = [mission_id for mission_id, _ in pairs]
+    cat_ids = [cat_id for _, cat_id in pairs]
+    missions = Mission.objects.only('id', 'cat_id', 'version').in_bulk(mission_ids)
+    cats = set(Cat.objects.filter(pk__in=cat_ids).values_list('id', flat=True))
+    owners = dict(Mission.objects.filter(cat_id__in=cat_ids).values_list('cat_id', 'id'))
+    mission_counts, cat_counts = Counter(mission_ids), Counter(cat_ids)
+
+    errors = []
+    for mission_id, cat_id in pairs:
+        if mission_id not in missions:
+            errors.append("Mission not found.")
+        elif cat_id not in cats:
+            errors.append("Cat not found.")
+        elif mission_counts[mission_id] > 1 or cat_counts[cat_id] > 1:
+            errors.append("Each mission and cat may only appear once per batch.")
+        elif owners.get(cat_id, mission_id) != mission_id:
+            errors.append(CAT_TAKEN)
+        else:
+            errors.append(None)
+
+    if any(errors):
+        error = AssignmentError("Some assignments are invalid.")
+        error.errors = errors
+        raise error
+
+    changed = []
+    for mission_id, cat_id in pairs:
+        mission = missions[mission_id]
+        if mission.cat_id != cat_id:
+            mission.cat_id = cat_id
+            changed.append(mission)
+    try:
+        with transaction.atomic():
+            Mission.objects.bulk_update(changed, ['cat'])
+    except IntegrityError:
+        raise AssignmentError("One of the cats was assigned to another mission concurrently.")
+    caching.invalidate('mission', [mission.pk for mission in changed])
+    changes.record('mission', [mission.pk for mission in changed])
+    return [missions[mission_id] for mission_id in mission_ids]
+
+
+def required_experience(remaining_targets):
+    return max(0, remaining_targets - 1) * get_setting('YEARS_PER_TARGET')
+
+
+@dataclass
+class Plan:
+    assignments: list = field(default_factory=list)  # (mission_id, cat_id)
+    total_salary: Decimal = Decimal('0')
+    idle_cats: int = 0
+    open_missions: int = 0
+
+    def as_dict(self):
+        return {
+            'assigned': len(self.assignments),
+            'total_salary': f'{self.total_salary:.2f}',
+            'idle_cats': self.idle_cats,
+            'open_missions': self.open_missions,
+            'assignments': [{'mission': mission_id, 'cat': cat_id} for mission_id, cat_id in self.assignments],
+        }
+
+
+def plan(cats, missions, budget=None, limit=None):
+    """
+    Matches cats to missions. `cats` are (id, years_of_experience, salary) and `missions` are
+    (id, required_experience); a cat can take a mission when its experience is at least the
+    requirement. The plan staffs as many missions as possible within `budget` (total salary
+    of the assigned cats) and `limit`, with the lowest total salary among such plans, and
+    puts the most experienced cats on the most demanding missions.
+
+    Which cats can be staffed together forms a matroid, so picking them cheapest first and
+    skipping any that cannot be matched alongside those already picked is optimal. Because
+    the requirements are nested, a set of cats is matchable exactly when, for every
+    requirement level, no more cats are capped at that level than there are missions up to
+    it; that is checked per distinct level (L), not per mission. Runs in
+    O(c log c + m log m + c * L), with L a handful of levels.
+    """
+    result = Plan(idle_cats=len(cats), open_missions=len(missions))
+    levels = sorted({required for _, required in missions})
+    by_level = [deque() for _ in levels]
+    for mission_id, required in sorted(missions, key=lambda mission: mission[0]):
+        by_level[bisect_right(levels, required) - 1].append(mission_id)
+    # slack[i]: missions with a requirement up to levels[i], minus picked cats capped at that level.
+    slack, running = [], 0
+    for queue in by_level:
+        running += len(queue)
+        slack.append(running)
+
+    limit = len(missions) if limit is None else min(limit, len(missions))
+    picked, spent = [], Decimal('0')
+    for cat_id, experience, salary in sorted(cats, key=lambda cat: (cat[2], -cat[1], cat[0])):
+        if len(picked) >= limit:
+            break
+        if budget is not None and spent + salary > budget:
+            break  # Every remaining cat costs at least as much.
+        level = bisect_right(levels, experience) - 1
+        if level < 0 or min(slack[level:]) < 1:
+            continue
+        for index in range(level, len(slack)):
+            slack[index] -= 1
+        picked.append((cat_id, level))
+        spent += salary
+
+    # Most experienced first, each on the most demanding mission it qualifies for.
+    for cat_id, level in sorted(picked, key=lambda cat: -cat[1]):
+        while not by_level[level]:
+            level -= 1
+        result.assignments.append((by_level[level].popleft(), cat_id))
+    result.total_salary = spent
+    return result
+
+
+def _apply(cursor, batch):
+    """
+    Assigns a batch of (mission_id, cat_id) pairs to still-open missions in one UPDATE; returns
+    the number of rows written. Raw SQL: building the equivalent Case/When expression costs
+    far more than running it.
+    """
+    qn = connection.ops.quote_name
+    mission_ids = [mission_id for mission_id, _ in batch]
+    params = [value for pair in batch for value in pair]
+    cursor.execute(
+        f"UPDATE {qn(Mission._meta.db_table)} SET {qn('cat_id')} = CASE {qn('id')} "
+        f"{' '.join(['WHEN %s THEN %s'] * len(batch))} END, {qn('version')} = {qn('version')} + 1 "
+        f"WHERE {qn('id')} IN ({', '.join(['%s'] * len(batch))}) AND {qn('cat_id')} IS NULL "
+        f"AND {qn('is_completed')} = %s",
+        [*params, *mission_ids, False],
+    )
+    return cursor.rowcount
+
+
+def auto_assign(budget=None, limit=None, dry_run=False):
+    """
+    Plans and applies assignments for every unassigned, unfinished mission with targets left,
+    using the cats that are on no mission. Loads both sides in two queries and writes the
+    plan in one transaction with batched conditional UPDATEs (BATCH_SIZE pairs each). If a mission or cat is claimed
+    concurrently, nothing is written and AssignmentError (409) is raised.
+    """
+    idle = Cat.objects.filter(~Exists(Mission.objects.filter(cat_id=OuterRef('pk'))))
+    cats = list(idle.values_list('id', 'years_of_experience', 'salary'))
+    open_missions = Mission.objects.filter(cat__isnull=True, is_completed=False, remaining_targets__gt=0)
+    missions = [(pk, required_experience(remaining))
+                for pk, remaining in open_missions.values_list('id', 'remaining_targets')]
+    result = plan(cats, missions, budget=budget, limit=limit)
+    if dry_run or not result.assignments:
+        return result
+
+    conflict = AssignmentError("Missions or cats were assigned concurrently; nothing was changed.",
+                               status_code=409)
+    batch_size = get_setting('BATCH_SIZE')
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(result.assignments), batch_size):
+                batch = result.assignments[start:start + batch_size]
+                if _apply(cursor, batch) != len(batch):
+                    raise conflict
+    except IntegrityError:
+        raise conflict
+    mission_ids = [mission_id for mission_id, _ in result.assignments]
+    caching.invalidate('mission', mission_ids)
+    changes.record('mission', mission_ids)
+    return result
@@ -0,0 +1,218 @@
+"""
+Async variants of the cat, mission and target endpoints, served under /api/async/.
+
+DRF views are synchronous, so these are plain Django async views that reuse the DRF
+serializers for validation and representation and talk to the database with the async
+ORM (`aget`, `acreate`, `async for`). Writes that need a transaction (nested mission
+creation, target saves that update their mission) run through `sync_to_async`. Requests are
+throttled like their DRF counterparts (api.throttling), drawing on the same endpoint buckets,
+e.g. `cat.create`. Under ASGI (SCA/asgi.py) a worker can keep many of these requests in flight at once.
+"""
+import asyncio
+import json
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework.exceptions import Throttled
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import changes, fastjson, tasks
+from .throttling import TokenBucketThrottle
+from .models import Cat, Mission, Target
+from .serializers import CatSerializer, MissionSerializer, TargetSerializer
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _response(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def _not_found(model):
+    return _response({"error": f"{model.__name__} not found."}, status=404)
+
+
+def throttled(**scopes):
+    """
+    Applies TokenBucketThrottle to an async view. `scopes` maps each method to the endpoint
+    scope of the DRF action it mirrors, e.g. `POST='cat.create'`.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            throttle = TokenBucketThrottle()
+            scope = SimpleNamespace(throttle_scope=scopes.get(request.method))
+            # Identifying the client may load the session user from the database.
+            if not await sync_to_async(throttle.allow_request)(request, scope):
+                exc = Throttled(throttle.wait())
+                response = _response({"detail": exc.detail}, status=exc.status_code)
+                response['Retry-After'] = str(exc.wait)
+                return response
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _parse_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+async def _page(request, queryset, serializer_class):
+    """Keyset page over the primary key: `?after=<last id>&page_size=<n>`."""
+    try:
+        after = int(request.GET.get('after', 0))
+        size = min(int(request.GET.get('page_size', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        return _response({"error": "'after' and 'page_size' must be integers."}, status=400)
+    if size < 1:
+        return _response({"error": "'page_size' must be at least 1."}, status=400)
+    rows = [obj async for obj in queryset.filter(pk__gt=after).order_by('pk')[:size]]
+    return _response({
+        'next': rows[-1].pk if len(rows) == size else None,
+        'results': serializer_class(rows, many=True).data,
+    })
+
+
+async def _create(request, serializer_class, save):
+    data = _parse_body(request)
+    if data is None:
+        return _response({"error": "Malformed JSON."}, status=400)
+    serializer = serializer_class(data=data)
+    # Validation may read the database (breed registry, cat ownership).
+    if not await sync_to_async(serializer.is_valid)():
+        return _response(serializer.errors, status=400)
+    serializer.instance = await save(serializer)
+    # The representation of a new mission reads its targets back from the database.
+    return _response(await sync_to_async(lambda: serializer.data)(), status=201)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+@throttled(GET='cat.list', POST='cat.create')
+async def cat_list(request):
+    if request.method == 'POST':
+        return await _create(request, CatSerializer, lambda s: Cat.objects.acreate(**s.validated_data))
+    return await _page(request, Cat.objects.all(), CatSerializer)
+
+
+@require_http_methods(['GET'])
+@throttled(GET='cat.retrieve')
+async def cat_detail(request, pk):
+    try:
+        cat = await Cat.objects.aget(pk=pk)
+    except Cat.DoesNotExist:
+        return _not_found(Cat)
+    return _response(CatSerializer(cat).data)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+@throttled(GET='mission.list', POST='mission.create')
+async def mission_list(request):
+    if request.method == 'POST':
+        return await _create(request, MissionSerializer, lambda s: sync_to_async(s.save)())
+    return await _page(request, Mission.objects.prefetch_related('targets'), MissionSerializer)
+
+
+@require_http_methods(['GET'])
+@throttled(GET='mission.retrieve')
+async def mission_detail(request, pk):
+    try:
+        mission = await Mission.objects.prefetch_related('targets').aget(pk=pk)
+    except Mission.DoesNotExist:
+        return _not_found(Mission)
+    return _response(MissionSerializer(mission).data)
+
+
+@csrf_exempt
+@require_http_methods(['PATCH'])
+@throttled(PATCH='target.partial_update')
+async def target_detail(request, pk):
+    data = _parse_body(request)
+    if data is None:
+        return _response({"error": "Malformed JSON."}, status=400)
+    try:
+        target = await Target.objects.select_related('mission').aget(pk=pk)
+    except Target.DoesNotExist:
+        return _not_found(Target)
+
+    # Requirement: Notes cannot be updated if either the target or the mission is completed
+    if (target.is_completed or target.mission.is_completed) and 'notes' in data:
+        return _response({"error": "Target or Mission is complete. Notes are frozen."}, status=400)
+
+    serializer = TargetSerializer(target, data=data, partial=True)
+    if not await sync_to_async(serializer.is_valid)():
+        return _response(serializer.errors, status=400)
+    await sync_to_async(serializer.save)()
+    if target.remaining_delta < 0:
+        await sync_to_async(tasks.queue_completion_notices)([target.mission_id])
+    return _response(serializer.data)
+
+
+@require_http_methods(['GET'])
+async def change_stream(request):
+    """
+    The change feed (api.changes) as server-sent events: one `changes` event per page, whose
+    `id` is the cursor after it. Browsers reconnect with `Last-Event-ID` when the stream
+    ends after `CHANGES['STREAM_TIMEOUT']` seconds.
+
+    Only ASGI can hold the stream open without a worker: under WSGI, StreamingHttpResponse
+    would consume the async generator whole, tying up a worker for the full timeout and then
+    sending every event at once. There the response carries the first page and ends, and the
+    client's reconnect after the `retry` interval turns the stream into a poll.
+    """
+    since = request.GET.get('since') or request.headers.get('Last-Event-ID')
+    try:
+        first = await sync_to_async(changes.page)(since)
+    except changes.InvalidCursor:
+        return _response({"error": "Invalid cursor."}, status=400)
+    except changes.StaleCursor:
+        return _response({"error": "The cursor has expired; reload the list and start from a new cursor."},
+                         status=410)
+    events = _change_events(first) if isinstance(request, ASGIRequest) else _first_page_events(first)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _retry_event(page):
+    return f"retry: {int(changes.get_setting('POLL_INTERVAL') * 1000)}\nid: {page['cursor']}\n\n"
+
+
+def _changes_event(page):
+    body = fastjson.dumps({'changes': page['changes']})
+    return f"id: {page['cursor']}\nevent: changes\ndata: {body}\n\n"
+
+
+def _first_page_events(page):
+    yield _retry_event(page)
+    if page['changes']:
+        yield _changes_event(page)
+
+
+async def _change_events(page):
+    poll, keepalive = changes.get_setting('POLL_INTERVAL'), changes.get_setting('KEEPALIVE')
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + changes.get_setting('STREAM_TIMEOUT')
+    idle_since = loop.time()
+    yield _retry_event(page)
+    while loop.time() < deadline:
+        if page['changes']:
+            yield _changes_event(page)
+            idle_since = loop.time()
+        elif loop.time() - idle_since >= keepalive:
+            yield ": keepalive\n\n"
+            idle_since = loop.time()
+        if not page['more']:
+            await asyncio.sleep(poll)
+        page = await sync_to_async(changes.page)(page['cursor'])
@@ -0,0 +1,175 @@
+"""
+Breed registry: an in-process, TTL-refreshed view of the breeds recognised by TheCatAPI.
+
+The request path only ever reads a frozenset held in memory. The set is loaded from the
+local `Breed` table and refreshed from the remote source in a background thread once it
+goes stale (stale-while-revalidate), so recruiting a cat never waits on the network.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from . import metrics, outbound
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SOURCE': 'api.breeds.TheCatAPIBreedSource',
+    'URL': 'https://api.thecatapi.com/v1/breeds',
+    'TTL': 24 * 60 * 60,
+    'BACKGROUND_REFRESH': True,
+    'RETRY_INTERVAL': 60,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'BREED_REGISTRY', {}).get(name, DEFAULTS[name])
+
+
+class TheCatAPIBreedSource:
+    """Fetches the list of breed names from TheCatAPI (or a compatible stub at BREED_REGISTRY['URL'])."""
+    timeout = 5
+
+    def __init__(self, url=None):
+        self.url = url or get_setting('URL')
+
+    def fetch(self):
+        with metrics.timed('http'):
+            response = outbound.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return [breed['name'] for breed in response.json()]
+
+
+class BreedRegistry:
+    """Holds the known breed names and keeps them fresh without blocking lookups."""
+
+    def __init__(self, source=None, ttl=None, background_refresh=None):
+        self._source = source
+        self._ttl = ttl
+        self._background_refresh = background_refresh
+        self._lock = threading.Lock()
+        self._names = None
+        self._next_refresh_at = 0.0
+        self._refreshing = False
+        self.reset_stats()
+
+    @property
+    def source(self):
+        if self._source is None:
+            self._source = import_string(get_setting('SOURCE'))()
+        return self._source
+
+    @property
+    def ttl(self):
+        return get_setting('TTL') if self._ttl is None else self._ttl
+
+    @property
+    def background_refresh(self):
+        if self._background_refresh is None:
+            return get_setting('BACKGROUND_REFRESH')
+        return self._background_refresh
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh_seconds = None
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'size': len(self._names or ()),
+        }
+
+    def clear(self):
+        """Drops the in-memory snapshot so the next lookup reloads it from the database."""
+        with self._lock:
+            self._names = None
+            self._next_refresh_at = 0.0
+
+    def names(self):
+        """Returns the current breed snapshot, scheduling a refresh if it is stale or empty."""
+        if self._names is None:
+            self._load_from_db()
+        if time.monotonic() >= self._next_refresh_at:
+            self._schedule_refresh()
+        return self._names
+
+    def is_known(self, name):
+        """
+        O(1) membership test against the snapshot.
+        Returns None when the registry has never been seeded, so callers can decide how to fail.
+        """
+        names = self.names()
+        if not names:
+            return None
+        if name in names:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def refresh(self):
+        """Fetches breeds from the source and persists them. Raises if the source is unavailable."""
+        started = time.perf_counter()
+        try:
+            fetched = frozenset(self.source.fetch())
+        except Exception:
+            self.refresh_failures += 1
+            raise
+        self.store(fetched)
+        self.refreshes += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+        return fetched
+
+    def store(self, names):
+        """Replaces the persisted breed table and the in-memory snapshot with `names`."""
+        from .models import Breed
+
+        names = frozenset(names)
+        with transaction.atomic():
+            Breed.objects.exclude(name__in=names).delete()
+            Breed.objects.bulk_create([Breed(name=name) for name in names], ignore_conflicts=True)
+        self._swap(names)
+
+    def _load_from_db(self):
+        from .models import Breed
+
+        self._swap(frozenset(Breed.objects.values_list('name', flat=True)))
+
+    def _swap(self, names):
+        with self._lock:
+            self._names = names
+            # An empty snapshot is always stale: try to seed it on the next lookup.
+            self._next_refresh_at = time.monotonic() + self.ttl if names else 0.0
+
+    def _schedule_refresh(self):
+        if not self.background_refresh:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name='breed-registry-refresh', daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.warning("Breed registry refresh failed; serving the stale snapshot.", exc_info=True)
+            self._next_refresh_at = time.monotonic() + get_setting('RETRY_INTERVAL')
+        finally:
+            self._refreshing = False
+            connection.close()
+
+
+registry = BreedRegistry()
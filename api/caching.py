@@ -0,0 +1,128 @@
+"""
+Response cache for the read endpoints (list and retrieve of cats and missions).
+
+Serialized representations are stored in a Django cache (locmem unless `API_CACHE['ALIAS']`
+points elsewhere) together with an ETag. Entries are never deleted explicitly; instead every
+key embeds version tokens that are bumped when the underlying rows change:
+
+* a per-model *epoch*, bumped to drop everything for that model (e.g. after a repair),
+* a per-model *list generation*, bumped on any change to the model,
+* a per-object *version*, bumped when that object (or one of its targets) changes.
+
+Invalidation is driven by model signals (see `api.signals`) plus explicit calls from the
+bulk code paths that bypass `save()`.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return caches[get_setting('ALIAS')]
+
+
+class CacheStats:
+    """In-process hit/miss counters for the response cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def record(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+stats = CacheStats()
+
+
+def _token():
+    return time.time_ns()
+
+
+def _tokens(*keys):
+    """Reads version tokens, initializing missing ones so an evicted token is never reused."""
+    cache = get_cache()
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _token(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _request_hash(request):
+    # Paginated responses embed absolute `next` links, so the host is part of the variant.
+    return hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def list_key(label, request):
+    epoch, generation = _tokens(f'api:{label}:epoch', f'api:{label}:list')
+    return f'api:{label}:{epoch}:list:{generation}:{_request_hash(request)}'
+
+
+def object_key(label, pk, request):
+    epoch, version = _tokens(f'api:{label}:epoch', f'api:{label}:{pk}:v')
+    return f'api:{label}:{epoch}:{pk}:{version}:{_request_hash(request)}'
+
+
+def etag_for(data):
+    """
+    The version of a versioned object (`"3"`), so the ETag can be sent back in If-Match;
+    a hash of the representation for anything else (lists, cats, sparse fieldsets).
+    """
+    if isinstance(data, dict) and 'version' in data:
+        return f'"{data["version"]}"'
+    payload = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return f'"{hashlib.md5(payload).hexdigest()}"'
+
+
+def _bump(label, pks, everything):
+    tokens = {f'api:{label}:list': _token()}
+    tokens.update({f'api:{label}:{pk}:v': _token() for pk in pks if pk is not None})
+    if everything:
+        tokens[f'api:{label}:epoch'] = _token()
+    get_cache().set_many(tokens, None)
+
+
+def invalidate(label, pks=(), everything=False):
+    """
+    Invalidates the list pages of `label` and the detail entries of `pks`
+    (or every entry of `label` with everything=True).
+
+    Tokens are bumped immediately and again once the surrounding transaction commits, so a
+    reader that re-caches pre-commit data in between is invalidated as well.
+    """
+    pks = list(pks)
+    _bump(label, pks, everything)
+    transaction.on_commit(lambda: _bump(label, pks, everything))
@@ -0,0 +1,147 @@
+"""
+Change feed: an append-only log of the cats and missions that changed, read back as deltas.
+
+Writers call `record(kind, pks)` next to every response-cache invalidation: model signals
+cover `save()`/`delete()`, and the bulk code paths that bypass them (bulk target updates,
+batch assignment, imports, completion syncs) call it explicitly. Entries are appended once
+the surrounding transaction commits. A target change is logged against its mission.
+
+`page(since)` returns every object changed after the cursor `since` once, with its current
+representation (or `deleted: true`), and a new cursor. Cursors are opaque strings made of
+the last log id read and a time before which every later entry was written. Entries younger
+than `SETTLE` seconds are held back, so that a slower transaction committing an older id is
+not skipped.
+
+`compact()` (`manage.py compact_changes`) drops entries superseded by a newer one for the
+same object, and every entry older than `RETENTION`. A cursor issued before that horizon
+may have missed entries and is refused with `StaleCursor`; the client then reloads the list
+endpoint and starts over from a fresh cursor.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Cat, Change, Mission
+
+DEFAULTS = {
+    'ENABLED': True,
+    'RETENTION': 7 * 24 * 60 * 60,
+    'PAGE_SIZE': 500,
+    'SETTLE': 0.0,
+    'POLL_INTERVAL': 1.0,
+    'KEEPALIVE': 15,
+    'STREAM_TIMEOUT': 300,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'CHANGES', {}).get(name, DEFAULTS[name])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class StaleCursor(Exception):
+    pass
+
+
+def record(kind, pks):
+    """Appends one entry per object in `pks` once the current transaction commits."""
+    pks = sorted({pk for pk in pks if pk is not None})
+    if not pks or not get_setting('ENABLED'):
+        return
+    transaction.on_commit(
+        lambda: Change.objects.bulk_create([Change(kind=kind, object_id=pk) for pk in pks]),
+        robust=True,
+    )
+
+
+def encode(position, issued):
+    return f'{position}-{int(issued.timestamp())}'
+
+
+def decode(cursor):
+    position, _, issued = cursor.partition('-')
+    if not position.isdigit() or not issued.isdigit():
+        raise InvalidCursor(cursor)
+    return int(position), datetime.fromtimestamp(int(issued), tz=dt_timezone.utc)
+
+
+def horizon(now=None):
+    return (now or timezone.now()) - timedelta(seconds=get_setting('RETENTION'))
+
+
+def settled(now):
+    return now - timedelta(seconds=get_setting('SETTLE'))
+
+
+def current_cursor():
+    """A cursor from which the feed returns only changes written from now on."""
+    cutoff = settled(timezone.now())
+    last = Change.objects.filter(created_at__lte=cutoff).order_by('-id').values_list('id', flat=True).first()
+    return encode(last or 0, cutoff)
+
+
+def represent(kind, pks, context=None):
+    """Current representations of the `kind` objects in `pks`, by id; deleted ones are missing."""
+    # Imported here: the serializers record changes through this module.
+    from .serializers import CatSerializer, MissionSerializer
+
+    if kind == Change.CAT:
+        queryset, serializer_class = Cat.objects.all(), CatSerializer
+    else:
+        queryset, serializer_class = Mission.objects.prefetch_related('targets'), MissionSerializer
+    objects = list(queryset.in_bulk(pks).values())
+    return {item['id']: item for item in serializer_class(objects, many=True, context=context or {}).data}
+
+
+def page(since, limit=None, context=None):
+    """
+    The objects changed after cursor `since`, oldest change first:
+    `{"cursor": ..., "more": bool, "changes": [{"kind", "id", "deleted", "data"}, ...]}`.
+    Without `since`, the current cursor and no changes.
+    """
+    if since is None:
+        return {'cursor': current_cursor(), 'more': False, 'changes': []}
+    position, issued = decode(since)
+    now = timezone.now()
+    if issued < horizon(now):
+        raise StaleCursor(since)
+
+    limit = limit or get_setting('PAGE_SIZE')
+    cutoff = settled(now)
+    entries = list(
+        Change.objects.filter(id__gt=position, created_at__lte=cutoff)
+        .order_by('id').values_list('id', 'kind', 'object_id', 'created_at')[:limit + 1]
+    )
+    more = len(entries) > limit
+    # The entries left to read were all written after the next one (give or take SETTLE).
+    caught_up = entries[limit][3] - (now - cutoff) if more else cutoff
+    entries = entries[:limit]
+
+    # Each object once, at the position of its latest change.
+    latest = {}
+    for entry_id, kind, object_id, _ in entries:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = entry_id
+    data = {
+        kind: represent(kind, [object_id for k, object_id in latest if k == kind], context)
+        for kind in {kind for kind, _ in latest}
+    }
+    changes = [
+        {'kind': kind, 'id': object_id, 'deleted': object_id not in data[kind], 'data': data[kind].get(object_id)}
+        for kind, object_id in latest
+    ]
+    return {'cursor': encode(entries[-1][0] if entries else position, caught_up), 'more': more, 'changes': changes}
+
+
+def compact(now=None):
+    """Drops superseded and expired entries; returns how many of each were deleted."""
+    newer = Change.objects.filter(kind=OuterRef('kind'), object_id=OuterRef('object_id'), id__gt=OuterRef('id'))
+    superseded, _ = Change.objects.filter(Exists(newer)).delete()
+    expired, _ = Change.objects.filter(created_at__lt=horizon(now)).delete()
+    return superseded, expired
@@ -0,0 +1,31 @@
+"""
+System checks for settings that are fine on one process but wrong with several.
+
+Run with `manage.py check --deploy`: the development server is a single process.
+"""
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def response_cache_is_shared(app_configs, **kwargs):
+    from django.conf import settings
+
+    from . import caching
+
+    if not caching.get_setting('ENABLED'):
+        return []
+    backend = settings.CACHES.get(caching.get_setting('ALIAS'), {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL:
+        return []
+    return [Warning(
+        "The API response cache is kept per process.",
+        hint="Invalidation only reaches the process that made the change, so with several worker processes the "
+             "others serve stale responses (and 304s) for up to API_CACHE['TIMEOUT'] seconds. Set SCA_CACHE_URL "
+             "to a shared Redis cache, or set API_CACHE['ENABLED'] to False.",
+        id='api.W001',
+    )]
@@ -0,0 +1,59 @@
+"""
+Read-replica routing.
+
+Replicas are the databases named ``replica_*`` in settings.DATABASES. Reads are sent to a
+replica only while `use_replicas()` is active, which the API enables for list/retrieve
+requests; everything else (including reads inside write requests, which must see their
+own writes) stays on the primary. Responses about to be stored in the response cache are
+read from the primary too (`use_primary()`): a lagging replica's rows would otherwise be
+cached under the version token of the write they predate.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+@contextmanager
+def use_replicas():
+    token = _reading_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Reads inside go to the primary even within `use_replicas()`."""
+    token = _reading_from_replica.set(False)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,61 @@
+"""
+Estimated row counts, for paginating tables too large to COUNT(*) on every page view.
+
+`estimated_count(queryset)` answers for an unfiltered queryset without scanning it: from
+`pg_class.reltuples` on PostgreSQL (maintained by ANALYZE and autovacuum), otherwise from the
+span of its integer primary keys, one index lookup at each end, which overcounts by the rows
+deleted since. Filtered querysets get None: their size is not known without counting them.
+
+`EstimatedCountPaginator` counts exactly up to `ESTIMATED_COUNTS['THRESHOLD']` rows and
+estimates above it; the admin changelists of the large tables use it.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+
+DEFAULTS = {
+    'ENABLED': True,
+    'THRESHOLD': 100000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ESTIMATED_COUNTS', {}).get(name, DEFAULTS[name])
+
+
+def _unfiltered(queryset):
+    query = queryset.query
+    return not (query.where or query.distinct or query.combinator or query.group_by
+                or query.low_mark or query.high_mark is not None)
+
+
+def estimated_count(queryset):
+    """Approximate number of rows in an unfiltered `queryset`; None for any other."""
+    if not get_setting('ENABLED') or not _unfiltered(queryset):
+        return None
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+                           [connection.ops.quote_name(model._meta.db_table)])
+            row = cursor.fetchone()
+        # -1 until the table is first analyzed.
+        if row and row[0] >= 0:
+            return int(row[0])
+    if not isinstance(model._meta.pk, (models.AutoField, models.BigAutoField, models.SmallAutoField)):
+        return None
+    # Two lookups: SQLite reads MIN() and MAX() from the index only when each is queried alone.
+    pks = model._base_manager.using(queryset.db).values_list('pk', flat=True)
+    low, high = pks.order_by('pk').first(), pks.order_by('-pk').first()
+    return 0 if low is None else high - low + 1
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate > get_setting('THRESHOLD'):
+            return estimate
+        return super().count
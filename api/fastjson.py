@@ -0,0 +1,76 @@
+"""
+orjson-backed JSON rendering and parsing for the DRF pipeline.
+
+orjson is optional: without it, or for a payload it cannot encode (e.g. integers beyond
+64 bits), the renderer and parser fall back to DRF's JSONRenderer and JSONParser. The
+output matches DRF's compact UTF-8 rendering byte for byte: dates, decimals and other
+non-JSON types are still encoded by DRF's JSONEncoder, and U+2028/U+2029 are escaped the
+same way. Floats are the exception: orjson writes the shortest round-tripping form
+(`1e-7` rather than `1e-07`). Indented output (`Accept: application/json; indent=4`)
+and non-default UNICODE_JSON/COMPACT_JSON settings are left to DRF.
+"""
+import json
+
+from rest_framework import exceptions, parsers, renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional dependency.
+    orjson = None
+
+_default = JSONEncoder().default
+_LINE_SEPARATORS = ('\u2028'.encode(), b'\\u2028'), ('\u2029'.encode(), b'\\u2029')
+
+
+def _orjson_dumps(data):
+    """orjson rendering with DRF's conventions, or None if orjson is missing or gives up."""
+    if orjson is None:
+        return None
+    try:
+        output = orjson.dumps(data, default=_default,
+                              option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    except orjson.JSONEncodeError:
+        return None
+    if b'\xe2\x80' in output:
+        for raw, escaped in _LINE_SEPARATORS:
+            output = output.replace(raw, escaped)
+    return output
+
+
+def dumps(data):
+    """Compact JSON text, as FastJSONRenderer renders it."""
+    output = _orjson_dumps(data)
+    if output is not None:
+        return output.decode()
+    text = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if self.compact and not self.ensure_ascii and indent is None:
+            output = _orjson_dumps(data)
+            if output is not None:
+                return output
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise exceptions.ParseError(f'JSON parse error - {exc}')
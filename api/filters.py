@@ -0,0 +1,107 @@
+"""
+Query-parameter filters for the mission and target list endpoints.
+
+Missions: `?is_completed=`, `?cat=<id>|none`, `?country=A,B` (any target in one of the
+countries) and `?q=` (any target whose name or notes match, see api.search).
+Targets: `?mission=`, `?country=`, `?is_completed=` and `?q=`.
+
+Every filter maps onto an index: the active/completed mission indexes, the unique cat
+column, the target country and mission indexes, and the full-text index.
+"""
+from django.db.models import Exists, OuterRef
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from . import search
+from .models import Target
+
+MAX_COUNTRIES = 20
+
+_BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}
+
+
+def _invalid(param, message):
+    return serializers.ValidationError({param: [message]})
+
+
+def boolean(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return _BOOLEANS[value.lower()]
+    except KeyError:
+        raise _invalid(name, "Expected true or false.")
+
+
+def integer(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise _invalid(name, "Expected an id.")
+    return int(value)
+
+
+def countries(params, name='country'):
+    value = params.get(name)
+    if value is None:
+        return None
+    names = [country.strip() for country in value.split(',') if country.strip()]
+    if not names or len(names) > MAX_COUNTRIES:
+        raise _invalid(name, f"Expected 1 to {MAX_COUNTRIES} comma-separated countries.")
+    return names
+
+
+def text(params, name='q'):
+    value = params.get(name)
+    if value is None:
+        return None
+    if not search.terms(value):
+        raise _invalid(name, "Expected at least one word.")
+    return value
+
+
+class MissionFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        completed = boolean(params, 'is_completed')
+        if completed is not None:
+            queryset = queryset.filter(is_completed=completed)
+
+        cat = params.get('cat')
+        if cat is not None:
+            queryset = queryset.filter(cat__isnull=True) if cat == 'none' else queryset.filter(
+                cat_id=integer(params, 'cat'))
+
+        names = countries(params)
+        if names is not None:
+            targets = Target.objects.filter(mission=OuterRef('pk'), country__in=names)
+            queryset = queryset.filter(Exists(targets))
+
+        query = text(params)
+        if query is not None:
+            queryset = search.filter_missions(queryset, query)
+        return queryset
+
+
+class TargetFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        mission = integer(params, 'mission')
+        if mission is not None:
+            queryset = queryset.filter(mission_id=mission)
+
+        completed = boolean(params, 'is_completed')
+        if completed is not None:
+            queryset = queryset.filter(is_completed=completed)
+
+        names = countries(params)
+        if names is not None:
+            queryset = queryset.filter(country__in=names)
+
+        query = text(params)
+        # The search action ranks `q` itself.
+        if query is not None and getattr(view, 'action', None) != 'search':
+            queryset = search.matching_targets(queryset, query)
+        return queryset
@@ -0,0 +1,123 @@
+"""
+Safe retries for mutating endpoints.
+
+A client that sends an `Idempotency-Key` header gets the outcome of the first request with
+that key replayed for every retry (`Idempotent-Replayed: true`), so a retry after a timeout
+does not create a second mission or redo the work. Keys are scoped to the method and path
+and kept for `IDEMPOTENCY['TTL']` seconds; expired keys are replaced on their next use and
+can be purged with `manage.py purge_idempotency_keys`.
+
+The key is claimed by inserting its row before the view runs, so the unique (key, scope)
+constraint decides between concurrent retries: the losers answer 409 while the first
+request is still running. That claim is a lease: a key left without a response for
+`IDEMPOTENCY['LOCK_TIMEOUT']` seconds (its worker was killed, or timed out) is taken over by
+the next retry. Reusing a key with a different body is a 422. Exceptions (including
+validation errors) and server errors are not stored, so the request can be retried with the
+same key.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+DEFAULTS = {
+    'TTL': 24 * 60 * 60,
+    # Longer than any request takes; an unanswered key older than this was abandoned.
+    'LOCK_TIMEOUT': 5 * 60,
+}
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def get_setting(name):
+    return getattr(settings, 'IDEMPOTENCY', {}).get(name, DEFAULTS[name])
+
+
+def expired():
+    """Keys created before this moment have expired."""
+    return timezone.now() - timedelta(seconds=get_setting('TTL'))
+
+
+def abandoned(record):
+    """True for a key whose request never stored a response within the lease."""
+    lease_start = timezone.now() - timedelta(seconds=get_setting('LOCK_TIMEOUT'))
+    return record.response_status is None and record.created_at < lease_start
+
+
+def fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.md5(body.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def claim(key, scope, digest):
+    """Returns (record, True) if this request owns the key, or (existing record, False)."""
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(key=key, scope=scope, fingerprint=digest), True
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(key=key, scope=scope).first()
+        if record is None:
+            continue  # The first request failed and released the key.
+        if record.created_at >= expired() and not abandoned(record):
+            return record, False
+        IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+    return record, False
+
+
+def replay(record):
+    if record.response_status is None:
+        return Response({"error": "A request with this Idempotency-Key is still being processed."},
+                        status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+    return Response(record.response_body, status=record.response_status, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method):
+    """Makes a viewset action replay its stored response for a repeated `Idempotency-Key`."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        digest = fingerprint(request)
+        record, owned = claim(key, f'{request.method} {request.path}'[:255], digest)
+        if not owned:
+            if record.fingerprint != digest:
+                return Response({"error": f"{HEADER} was already used with a different request body."},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            return replay(record)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            record.delete()
+            raise
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            record.delete()
+            return response
+        # A plain UPDATE: if the lease ran out and a retry took the key over, this row is gone.
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            response_status=response.status_code, response_body=response.data
+        )
+        return response
+
+    return wrapper
@@ -0,0 +1,191 @@
+"""
+A small database-backed job queue for work that should not run on the request path.
+
+`enqueue()` inserts a `Job` row, in the caller's transaction, so a job exists exactly when
+the data it refers to was committed. Workers (`manage.py run_worker`) claim due jobs in
+batches with a conditional UPDATE (plus `SKIP LOCKED` where the database supports it),
+run the registered task and record the outcome. A failing job is retried with exponential
+backoff (`BACKOFF * 2 ** (attempts - 1)` seconds, capped at `MAX_BACKOFF`) until it has
+used up `max_attempts`; a job whose worker died is queued again once its lease expires.
+
+Tasks are plain functions registered with `@task` (see api.tasks) and receive the job's
+JSON `args`. A `key` deduplicates work: while a job with that key is queued or running,
+enqueuing the same key again is a no-op.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import count
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'THREADS': 4,
+    'PROCESSES': 1,
+    'BATCH_SIZE': 20,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF': 30,
+    'MAX_BACKOFF': 3600,
+    'LEASE': 300,
+    'KEEP_FINISHED': 7 * 24 * 60 * 60,
+    'NOTIFY_URL': None,
+}
+
+TASKS = {}
+_worker_ids = count(1)
+
+
+def get_setting(name):
+    return getattr(settings, 'JOBS', {}).get(name, DEFAULTS[name])
+
+
+def task(func):
+    """Registers `func` as a task under its name."""
+    TASKS[func.__name__] = func
+    return func
+
+
+def enqueue(task_name, *args, key=None, delay=0, max_attempts=None):
+    """Queues one job and returns it."""
+    return enqueue_many(task_name, [args], keys=[key], delay=delay, max_attempts=max_attempts)[0]
+
+
+def enqueue_many(task_name, args_list, keys=None, delay=0, max_attempts=None):
+    """
+    Queues one job per entry of `args_list` with a single INSERT. Jobs with a key are
+    inserted ignoring conflicts, so they come back without a primary key.
+    """
+    if task_name not in TASKS:
+        raise LookupError(f"Unknown task {task_name!r}.")
+    run_at = timezone.now() + timedelta(seconds=delay)
+    max_attempts = max_attempts or get_setting('MAX_ATTEMPTS')
+    keys = keys or [None] * len(args_list)
+    jobs = [
+        Job(task=task_name, args=list(args), key=key, run_at=run_at, max_attempts=max_attempts)
+        for args, key in zip(args_list, keys)
+    ]
+    return Job.objects.bulk_create(jobs, ignore_conflicts=any(keys))
+
+
+def backoff(attempts):
+    return min(get_setting('BACKOFF') * 2 ** max(attempts - 1, 0), get_setting('MAX_BACKOFF'))
+
+
+def claim(worker, limit):
+    """Marks up to `limit` due jobs as running for `worker` and returns them."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at')
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        # The status condition makes a job that another worker claimed first drop out.
+        Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1
+        )
+    return list(Job.objects.filter(pk__in=ids, status=Job.RUNNING, locked_by=worker, locked_at=now))
+
+
+def execute(job):
+    """Runs one claimed job and records whether it finished, will be retried or failed."""
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task {job.task!r}.")
+        func(*job.args)
+    except Exception as exc:
+        now = timezone.now()
+        error = ''.join(traceback.format_exception_only(exc)).strip()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed for good: %s", job.pk, job.task, error)
+            changes = {'status': Job.FAILED, 'finished_at': now}
+        else:
+            delay = backoff(job.attempts)
+            logger.warning("Job %s (%s) failed, retrying in %ss: %s", job.pk, job.task, delay, error)
+            changes = {'status': Job.QUEUED, 'run_at': now + timedelta(seconds=delay)}
+        Job.objects.filter(pk=job.pk).update(last_error=error, locked_by='', **changes)
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, finished_at=timezone.now(), last_error='')
+    return True
+
+
+def requeue_expired():
+    """Queues again the running jobs whose worker has not finished them within the lease."""
+    expired = timezone.now() - timedelta(seconds=get_setting('LEASE'))
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=expired).update(status=Job.QUEUED, locked_by='')
+
+
+def purge_finished():
+    expired = timezone.now() - timedelta(seconds=get_setting('KEEP_FINISHED'))
+    deleted, _ = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=expired).delete()
+    return deleted
+
+
+class Worker:
+    """
+    Polls for due jobs and runs them on `threads` threads. With one thread jobs run in the
+    calling thread, which is what the tests use.
+    """
+    maintenance_interval = 60
+
+    def __init__(self, threads=None, batch_size=None, poll_interval=None):
+        self.threads = threads or get_setting('THREADS')
+        self.batch_size = max(batch_size or get_setting('BATCH_SIZE'), self.threads)
+        self.poll_interval = get_setting('POLL_INTERVAL') if poll_interval is None else poll_interval
+        self.name = f'{socket.gethostname()}:{os.getpid()}:{next(_worker_ids)}'[:100]
+        self.stop_event = threading.Event()
+        self.next_maintenance = 0.0
+        self.processed = 0
+        self.failed = 0
+
+    def run_once(self, executor=None):
+        """Claims and runs one batch of due jobs; returns how many ran."""
+        jobs = claim(self.name, self.batch_size)
+        outcomes = executor.map(self._execute_in_thread, jobs) if executor else map(execute, jobs)
+        for succeeded in outcomes:
+            self.processed += 1
+            self.failed += not succeeded
+        return len(jobs)
+
+    def run(self, until_empty=False):
+        """Works until stop() is called, or until no job is due with until_empty=True."""
+        executor = ThreadPoolExecutor(self.threads, thread_name_prefix='job') if self.threads > 1 else None
+        try:
+            while not self.stop_event.is_set():
+                if self.run_once(executor):
+                    continue
+                if time.monotonic() >= self.next_maintenance:
+                    requeue_expired()
+                    purge_finished()
+                    self.next_maintenance = time.monotonic() + self.maintenance_interval
+                if until_empty:
+                    break
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def stop(self):
+        self.stop_event.set()
+
+    @staticmethod
+    def _execute_in_thread(job):
+        try:
+            return execute(job)
+        finally:
+            connection.close()
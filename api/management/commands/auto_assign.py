@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import assignments
+
+
+class Command(BaseCommand):
+    help = "Assigns idle cats to unassigned missions in one batch (see api.assignments.auto_assign)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only print the plan.")
+        parser.add_argument('--budget', type=Decimal, help="Cap on the total salary of the assigned cats.")
+        parser.add_argument('--limit', type=int, help="Assign at most this many missions.")
+        parser.add_argument('--verbose-plan', action='store_true', help="Print every mission/cat pair.")
+
+    def handle(self, *args, **options):
+        try:
+            plan = assignments.auto_assign(budget=options['budget'], limit=options['limit'],
+                                           dry_run=options['dry_run'])
+        except assignments.AssignmentError as exc:
+            raise CommandError(exc.message)
+        if options['verbose_plan']:
+            for mission_id, cat_id in plan.assignments:
+                self.stdout.write(f"mission {mission_id} <- cat {cat_id}")
+        verb = "Would assign" if options['dry_run'] else "Assigned"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(plan.assignments)} of {plan.open_missions} open missions from {plan.idle_cats} idle cats "
+            f"(total salary {plan.total_salary:.2f})."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api import changes
+
+
+class Command(BaseCommand):
+    help = "Drops change feed entries superseded by a newer one, and those older than CHANGES['RETENTION']."
+
+    def handle(self, *args, **options):
+        superseded, expired = changes.compact()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {superseded} superseded and {expired} expired change feed entries."
+        ))
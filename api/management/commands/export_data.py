@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api import transfer
+from api.serializers import CatSerializer, MissionSerializer
+
+
+class Command(BaseCommand):
+    help = "Streams every cat or mission to stdout or a file as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(transfer.IMPORTERS))
+        parser.add_argument('--format', choices=transfer.FORMATS, help="Defaults to the output file extension.")
+        parser.add_argument('--output', help="File to write (default: stdout).")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or transfer.format_for(options['output'])
+        serializer_class = MissionSerializer if options['kind'] == 'missions' else CatSerializer
+        rows = transfer.export_rows(transfer.export_queryset(options['kind']), serializer_class, fmt)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as fh:
+                fh.writelines(rows)
+        else:
+            for chunk in rows:
+                self.stdout.write(chunk, ending='')
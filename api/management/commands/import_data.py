@@ -0,0 +1,39 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import transfer
+
+
+class Command(BaseCommand):
+    help = "Streams cats or missions from a CSV or NDJSON file into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(transfer.IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=transfer.FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, help="Rows validated and inserted per batch.")
+        parser.add_argument('--report', help="Write the per-row error report to this JSON file.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or transfer.format_for(options['path'])
+        importer = transfer.IMPORTERS[options['kind']](batch_size=options['batch_size'])
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = importer.run(stream, fmt)
+        except OSError as exc:
+            raise CommandError(f"Could not read '{options['path']}': {exc}")
+        elapsed = time.perf_counter() - started
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as fh:
+                json.dump(report.as_dict(), fh, indent=2)
+        for error in report.errors[:10]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        message = f"Imported {report.created} of {report.rows} {options['kind']} in {elapsed:.2f}s."
+        if report.error_count:
+            self.stdout.write(self.style.WARNING(f"{message} {report.error_count} row(s) failed."))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api import idempotency
+from api.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Deletes stored Idempotency-Key responses older than IDEMPOTENCY['TTL']."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=idempotency.expired()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
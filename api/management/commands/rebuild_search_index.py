@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Recreates the full-text index over target names and notes (see api.search)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias (default: 'default').")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        with transaction.atomic(using=connection.alias):
+            installed = search.install(connection)
+        if not installed:
+            raise CommandError(f"{connection.vendor} has no supported full-text index; search uses substring matching.")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the {search.backend(connection.alias)} search index."))
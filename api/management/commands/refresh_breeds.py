@@ -0,0 +1,40 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.breeds import registry
+
+
+class Command(BaseCommand):
+    help = "Seeds or refreshes the local breed registry from TheCatAPI or from a JSON snapshot file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help="Load breeds offline from a JSON file: a list of names or a TheCatAPI /v1/breeds payload.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['file']:
+            names = self.read_snapshot(options['file'])
+            registry.store(names)
+        else:
+            try:
+                names = registry.refresh()
+            except Exception as exc:
+                raise CommandError(f"Could not fetch breeds from the source: {exc}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Stored {len(names)} breeds in {elapsed:.2f}s."))
+
+    def read_snapshot(self, path):
+        try:
+            with open(path, encoding='utf-8') as fh:
+                payload = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read breed snapshot '{path}': {exc}")
+        if not isinstance(payload, list):
+            raise CommandError("Breed snapshot must be a JSON list.")
+        return [item['name'] if isinstance(item, dict) else item for item in payload]
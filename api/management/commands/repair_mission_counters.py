@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Q
+
+from api import caching, changes
+from api.models import Mission
+
+
+class Command(BaseCommand):
+    help = "Recounts remaining targets for every mission and completes missions whose targets are all done."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report missions with a drifted counter.")
+
+    def handle(self, *args, **options):
+        drifted = Mission.objects.annotate(
+            actual=Count('targets', filter=Q(targets__is_completed=False))
+        ).exclude(remaining_targets=F('actual'))
+        count = drifted.count()
+
+        if options['dry_run']:
+            self.stdout.write(f"{count} mission(s) have a drifted remaining_targets counter.")
+            return
+
+        # Missions the sync can change: a drifted counter, or every target done but not completed.
+        affected = list(drifted.values_list('pk', flat=True)) + list(
+            Mission.objects.filter(remaining_targets=0, is_completed=False).values_list('pk', flat=True)
+        )
+        Mission.objects.sync_completion()
+        caching.invalidate('mission', everything=True)
+        changes.record('mission', affected)
+        self.stdout.write(self.style.SUCCESS(f"Repaired {count} drifted mission counter(s)."))
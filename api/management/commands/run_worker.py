@@ -0,0 +1,49 @@
+import signal
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "Runs background jobs (api.jobs) on several threads and, optionally, several processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help="Threads per process (default: JOBS['THREADS']).")
+        parser.add_argument('--processes', type=int, help="Worker processes (default: JOBS['PROCESSES']).")
+        parser.add_argument('--until-empty', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or jobs.get_setting('THREADS')
+        processes = options['processes'] or jobs.get_setting('PROCESSES')
+        if processes > 1:
+            return self.supervise(processes, threads, options['until_empty'])
+
+        worker = jobs.Worker(threads=threads)
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        try:
+            worker.run(until_empty=options['until_empty'])
+        except KeyboardInterrupt:
+            worker.stop()
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {worker.name} ran {worker.processed} jobs ({worker.failed} failed)."
+        ))
+
+    def supervise(self, processes, threads, until_empty):
+        """Starts one single-process worker per process and waits for all of them."""
+        command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'run_worker',
+                   '--threads', str(threads), '--processes', '1']
+        if until_empty:
+            command.append('--until-empty')
+        children = [subprocess.Popen(command) for _ in range(processes)]
+        try:
+            for child in children:
+                child.wait()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.wait()
@@ -0,0 +1,40 @@
+import json
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from api import startup
+
+
+class Command(BaseCommand):
+    help = "Starts fresh worker processes and reports their startup time, peak RSS and slowest imports."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="Processes to time; the median is reported.")
+        parser.add_argument('--top', type=int, default=10,
+                            help="Show the N packages slowest to import (one extra profiled run; 0 to skip).")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        runs = [startup.measure() for _ in range(max(1, options['runs']))]
+        report = {
+            'seconds': statistics.median(run['seconds'] for run in runs),
+            'rss_bytes': statistics.median(run['rss_bytes'] or 0 for run in runs) or None,
+            'modules': runs[-1]['modules'],
+            'loaded': runs[-1]['loaded'],
+        }
+        if options['top']:
+            report['packages'] = startup.measure(imports=True)['packages'][:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+            return
+        rss = f"{report['rss_bytes'] / 2 ** 20:.1f} MiB" if report['rss_bytes'] else "unknown"
+        self.stdout.write(f"Ready in {report['seconds'] * 1000:.0f} ms (median of {len(runs)}), "
+                          f"peak RSS {rss}, {report['modules']} modules.")
+        for name, loaded in report['loaded'].items():
+            self.stdout.write(f"  {name}: {'loaded' if loaded else 'not loaded'}")
+        if report.get('packages'):
+            self.stdout.write("Slowest imports (profiled run):")
+            for package, seconds in report['packages']:
+                self.stdout.write(f"  {package:<24} {seconds * 1000:8.1f} ms")
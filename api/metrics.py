@@ -0,0 +1,237 @@
+"""
+Request-level performance instrumentation.
+
+`MetricsMiddleware` times every request and collects, per request, the SQL query count and
+time (through an execute wrapper installed on every connection as it is created), time
+spent in serializers and time spent on outbound HTTP calls such as the breed registry refresh. Code elsewhere reports a phase with
+`with metrics.timed('serializer'):`; outside a request it is a no-op.
+
+Totals are aggregated in-process per view and method and exposed in the Prometheus text
+format at /api/metrics/, together with the counters of the breed registry (`breeds.registry`)
+and of the response cache (`caching.stats`); each response also carries a `Server-Timing` header.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+}
+
+_current = ContextVar('request_timings', default=None)
+
+
+def get_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULTS[name])
+
+
+class RequestTimings:
+    """What one request spent its time on, in seconds."""
+    __slots__ = ('sql_queries', 'sql', 'serializer', 'http', 'active')
+
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+        self.http = 0.0
+        self.active = set()
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to `phase` of the current request. Nested blocks count once."""
+    timings = _current.get()
+    if timings is None or phase in timings.active:
+        yield
+        return
+    timings.active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - started)
+        timings.active.discard(phase)
+
+
+class ViewMetrics:
+    __slots__ = ('buckets', 'count', 'seconds', 'sql_queries', 'sql', 'serializer', 'http')
+
+    def __init__(self, bucket_count):
+        self.buckets = [0] * (bucket_count + 1)  # The last one is +Inf.
+        self.count = 0
+        self.seconds = 0.0
+        self.sql_queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+        self.http = 0.0
+
+
+class Registry:
+    """In-process per-view latency histograms and SQL/serializer/HTTP totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.bounds = tuple(get_setting('BUCKETS'))
+        self.views = {}
+
+    def observe(self, view, method, seconds, timings):
+        key = (view, method)
+        with self._lock:
+            metrics = self.views.get(key)
+            if metrics is None:
+                metrics = self.views[key] = ViewMetrics(len(self.bounds))
+            metrics.buckets[bisect_left(self.bounds, seconds)] += 1
+            metrics.count += 1
+            metrics.seconds += seconds
+            metrics.sql_queries += timings.sql_queries
+            metrics.sql += timings.sql
+            metrics.serializer += timings.serializer
+            metrics.http += timings.http
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            views = sorted(self.views.items())
+            rows = [(key, metrics.buckets[:], metrics.count, metrics.seconds, metrics.sql_queries,
+                     metrics.sql, metrics.serializer, metrics.http) for key, metrics in views]
+
+        lines = [
+            "# HELP sca_request_duration_seconds Request latency by view.",
+            "# TYPE sca_request_duration_seconds histogram",
+        ]
+        for (view, method), buckets, count, seconds, *_ in rows:
+            labels = f'view="{view}",method="{method}"'
+            cumulative = 0
+            for bound, observed in zip((*map(repr, self.bounds), '+Inf'), buckets):
+                cumulative += observed
+                lines.append(f'sca_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'sca_request_duration_seconds_sum{{{labels}}} {seconds!r}')
+            lines.append(f'sca_request_duration_seconds_count{{{labels}}} {count}')
+
+        totals = [
+            ('sca_sql_queries_total', "SQL queries issued by view.", 4),
+            ('sca_sql_duration_seconds_total', "Time spent in SQL by view.", 5),
+            ('sca_serializer_duration_seconds_total', "Time spent in serializers by view.", 6),
+            ('sca_http_duration_seconds_total', "Time spent on outbound HTTP calls by view.", 7),
+        ]
+        for name, help_text, column in totals:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for row in rows:
+                (view, method) = row[0]
+                lines.append(f'{name}{{view="{view}",method="{method}"}} {row[column]!r}')
+        lines += cache_lines()
+        return "\n".join(lines) + "\n"
+
+
+def cache_lines():
+    """The breed registry and response cache counters, in the Prometheus text format."""
+    # Both modules import this one.
+    from . import breeds, caching
+
+    registry_stats, cache_stats = breeds.registry.stats(), caching.stats.as_dict()
+    lines = [
+        "# HELP sca_breed_registry_lookups_total Breed validations against the registry snapshot by outcome.",
+        "# TYPE sca_breed_registry_lookups_total counter",
+        f'sca_breed_registry_lookups_total{{result="hit"}} {registry_stats["hits"]}',
+        f'sca_breed_registry_lookups_total{{result="miss"}} {registry_stats["misses"]}',
+        "# HELP sca_breed_registry_refreshes_total Breed registry refreshes by outcome.",
+        "# TYPE sca_breed_registry_refreshes_total counter",
+        f'sca_breed_registry_refreshes_total{{result="success"}} {registry_stats["refreshes"]}',
+        f'sca_breed_registry_refreshes_total{{result="failure"}} {registry_stats["refresh_failures"]}',
+        "# HELP sca_breed_registry_breeds Breeds in the registry snapshot.",
+        "# TYPE sca_breed_registry_breeds gauge",
+        f'sca_breed_registry_breeds {registry_stats["size"]}',
+    ]
+    if registry_stats['last_refresh_seconds'] is not None:
+        lines += [
+            "# HELP sca_breed_registry_last_refresh_seconds Duration of the last breed registry refresh.",
+            "# TYPE sca_breed_registry_last_refresh_seconds gauge",
+            f'sca_breed_registry_last_refresh_seconds {registry_stats["last_refresh_seconds"]!r}',
+        ]
+    return lines + [
+        "# HELP sca_response_cache_lookups_total Response cache lookups by outcome.",
+        "# TYPE sca_response_cache_lookups_total counter",
+        f'sca_response_cache_lookups_total{{result="hit"}} {cache_stats["hits"]}',
+        f'sca_response_cache_lookups_total{{result="miss"}} {cache_stats["misses"]}',
+        "# HELP sca_response_cache_not_modified_total Cached responses answered with 304 Not Modified.",
+        "# TYPE sca_response_cache_not_modified_total counter",
+        f'sca_response_cache_not_modified_total {cache_stats["not_modified"]}',
+    ]
+
+
+registry = Registry()
+
+
+def record_sql(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql += time.perf_counter() - started
+        timings.sql_queries += 1
+
+
+@receiver(connection_created)
+def install_sql_wrapper(sender, connection, **kwargs):
+    # Installed once per connection rather than per request: looking connections up from
+    # the middleware costs more than the rest of the instrumentation put together.
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+def server_timing(total, timings):
+    """Server-Timing header value; phases that took no time are left out."""
+    header = f'total;dur={total * 1000:.2f}, db;dur={timings.sql * 1000:.2f};desc="{timings.sql_queries} queries"'
+    if timings.serializer:
+        header += f', serializer;dur={timings.serializer * 1000:.2f}'
+    if timings.http:
+        header += f', http;dur={timings.http * 1000:.2f}'
+    return header
+
+
+class MetricsMiddleware:
+    """Records latency, SQL, serializer and outbound HTTP time of every request (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = get_setting('ENABLED')
+        self.server_timing = get_setting('SERVER_TIMING')
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        match = request.resolver_match
+        registry.observe(match.view_name if match else '<unresolved>', request.method, total, timings)
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(total, timings)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
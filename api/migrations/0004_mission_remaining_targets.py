@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_remaining_targets(apps, schema_editor):
+    Mission = apps.get_model('api', 'Mission')
+    Target = apps.get_model('api', 'Target')
+    remaining = (
+        Target.objects.filter(mission=OuterRef('pk'), is_completed=False)
+        .order_by().values('mission').annotate(n=Count('pk')).values('n')
+    )
+    Mission.objects.update(remaining_targets=Coalesce(Subquery(remaining), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_breed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='remaining_targets',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_remaining_targets, migrations.RunPython.noop),
+    ]
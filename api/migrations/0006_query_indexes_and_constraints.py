@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_test_runs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cat',
+            index=models.Index(fields=['breed'], name='cat_breed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['id'], name='mission_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='target',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['mission'], name='target_incomplete_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='target',
+            index=models.Index(fields=['country'], name='target_country_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cat',
+            constraint=models.CheckConstraint(condition=models.Q(('salary__gte', 0)), name='cat_salary_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='cat',
+            constraint=models.CheckConstraint(condition=models.Q(('years_of_experience__gte', 0)), name='cat_experience_non_negative'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from api import search
+    search.install(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from api import search
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """Full-text index over target names and notes (see api.search)."""
+
+    dependencies = [
+        ('api', '0009_breed_status_and_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall, elidable=False),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_target_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('cat', 'Cat'), ('mission', 'Mission')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='change_object_idx'), models.Index(fields=['created_at'], name='change_created_idx')],
+            },
+        ),
+    ]
@@ -1,40 +1,383 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 class Cat(models.Model):
+    # A breed recruited while the breed registry was empty is verified later by a job (api.tasks).
+    VERIFIED, PENDING, INVALID = 'verified', 'pending', 'invalid'
+    BREED_STATUS_CHOICES = [(s, s.title()) for s in (VERIFIED, PENDING, INVALID)]
+
     name = models.CharField(max_length=100)
     years_of_experience = models.PositiveIntegerField()
     breed = models.CharField(max_length=100)
+    breed_status = models.CharField(max_length=10, choices=BREED_STATUS_CHOICES, default=VERIFIED)
     salary = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['breed'], name='cat_breed_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=Q(salary__gte=0), name='cat_salary_non_negative'),
+            models.CheckConstraint(condition=Q(years_of_experience__gte=0), name='cat_experience_non_negative'),
+        ]
+
     def __str__(self):
         return self.name
 
-class Mission(models.Model):
+class VersionedQuerySet(models.QuerySet):
+    def bump_version(self):
+        """Bumps the version of every row alone, for writes to rows nested in them (a mission's targets)."""
+        return self.update(version=F('version') + 1)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """Also bumps the version of every row written, with the same CASE expression."""
+        if 'version' in fields:
+            return super().bulk_update(objs, fields, batch_size=batch_size)
+        versions = [obj.version for obj in objs]
+        for obj in objs:
+            obj.version = F('version') + 1
+        try:
+            updated = super().bulk_update(objs, [*fields, 'version'], batch_size=batch_size)
+        except Exception:
+            for obj, version in zip(objs, versions):
+                obj.version = version
+            raise
+        for obj, version in zip(objs, versions):
+            obj.version = version + 1
+        return updated
+
+
+class VersionedModel(models.Model):
+    """
+    Optimistic concurrency: every write increments `version`. A client sends the version it
+    read in `If-Match` and the write only goes through if the row still has it (see
+    claim_version), so concurrent editors need no locks.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    # Fields maintained with F-expressions; a full save() never writes them from a stale instance.
+    protected_fields = ('version',)
+    # Set by claim_version(): the version was already bumped, so the next save() leaves it alone.
+    _version_claimed = False
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.protected_fields
+                ]
+            if self._version_claimed:
+                self._version_claimed = False
+            else:
+                # Read back with RETURNING in the same UPDATE.
+                self.version = F('version') + 1
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'version']
+        super().save(*args, **kwargs)
+
+    def claim_version(self, expected):
+        """
+        Bumps the version if it is still `expected`, in one conditional UPDATE. Returns False
+        if another writer got there first.
+        """
+        claimed = type(self)._base_manager.filter(pk=self.pk, version=expected).update(version=F('version') + 1)
+        if claimed:
+            self.version = expected + 1
+            self._version_claimed = True
+        return bool(claimed)
+
+
+class MissionQuerySet(VersionedQuerySet):
+    def sync_completion(self, bump_version=False):
+        """
+        Recounts incomplete targets and completes every mission whose targets are all done,
+        in a single UPDATE. Used after batch target changes and to repair drifted counters;
+        pass bump_version=True when the targets themselves were written.
+        """
+        targets = Target.objects.filter(mission=OuterRef('pk'))
+        incomplete = targets.filter(is_completed=False)
+        remaining = incomplete.order_by().values('mission').annotate(n=models.Count('pk')).values('n')
+        return self.update(
+            remaining_targets=Coalesce(Subquery(remaining), 0),
+            is_completed=Case(
+                When(Exists(targets) & ~Exists(incomplete), then=Value(True)),
+                default=F('is_completed'),
+            ),
+            **({'version': F('version') + 1} if bump_version else {}),
+        )
+
+
+class Mission(VersionedModel):
     cat = models.OneToOneField(Cat, on_delete=models.SET_NULL, null=True, blank=True, related_name='active_mission')
     is_completed = models.BooleanField(default=False)
+    # Denormalized number of incomplete targets, maintained by Target.save() with F-expressions.
+    remaining_targets = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = MissionQuerySet.as_manager()
+
+    # remaining_targets is maintained with F-expressions too.
+    protected_fields = ('version', 'remaining_targets')
 
-    def check_and_complete(self):
+    class Meta:
+        indexes = [
+            # Active missions are the ones listed and filtered most; completed ones pile up.
+            models.Index(fields=['id'], condition=Q(is_completed=False), name='mission_active_idx'),
+        ]
+
+    @classmethod
+    def apply_remaining_delta(cls, mission_id, delta):
+        """
+        Applies a change in the number of incomplete targets and, if none are left,
+        completes the mission in the same atomic UPDATE, which also bumps its version.
+        """
+        return cls.objects.filter(pk=mission_id).update(
+            version=F('version') + 1,
+            remaining_targets=F('remaining_targets') + delta,
+            is_completed=Case(
+                When(remaining_targets__lte=-delta, then=Value(True)),
+                default=F('is_completed'),
+            ),
+        )
+
+    def check_and_complete(self, bump_version=False):
         """Requirement: After completing all targets, mission is marked completed."""
-        if not self.targets.filter(is_completed=False).exists():
-            self.is_completed = True
-            self.save()
+        Mission.objects.filter(pk=self.pk).sync_completion(bump_version=bump_version)
+        self.refresh_from_db(fields=['is_completed', 'remaining_targets', 'version'])
 
     def __str__(self):
         return f"Mission {self.id} - {'Complete' if self.is_completed else 'Active'}"
 
-class Target(models.Model):
+class TargetQuerySet(VersionedQuerySet):
+    def delete(self, sync_mission=True):
+        mission_ids = list(self.order_by().values_list('mission_id', flat=True).distinct())
+        result = super().delete()
+        if sync_mission:
+            Mission.objects.filter(pk__in=mission_ids).sync_completion(bump_version=True)
+        return result
+
+
+class Target(VersionedModel):
     mission = models.ForeignKey(Mission, related_name='targets', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
     notes = models.TextField(blank=True)
     is_completed = models.BooleanField(default=False)
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Check if this completion finishes the mission
-        if self.is_completed:
-            self.mission.check_and_complete()
+    objects = TargetQuerySet.as_manager()
+
+    # Completion state and mission as last read from / written to the database; None when unknown.
+    _was_completed = None
+    _was_mission_id = None
+    # Change this instance's last save made to its mission's remaining_targets counter.
+    remaining_delta = 0
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'is_completed' in instance.__dict__:
+            instance._was_completed = instance.is_completed
+        if 'mission_id' in instance.__dict__:
+            instance._was_mission_id = instance.mission_id
+        return instance
+
+    def save(self, *args, sync_mission=True, **kwargs):
+        """
+        Saves the target and keeps the mission's remaining_targets counter and version in step.
+        Pass sync_mission=False when saving many targets; the caller then applies one
+        completion check and version bump per mission (see MissionQuerySet.sync_completion).
+        """
+        with transaction.atomic(savepoint=False):
+            moved_from = None
+            if not self._state.adding and self._was_mission_id not in (None, self.mission_id):
+                moved_from = self._was_mission_id
+            self.remaining_delta = self._completion_delta()
+            super().save(*args, **kwargs)
+            self._was_completed = self.is_completed
+            self._was_mission_id = self.mission_id
+            # Targets are part of the mission's representation, so each of these bumps its version too.
+            if moved_from is not None:
+                # Moved to another mission: both counters change, so recount both.
+                Mission.objects.filter(pk__in=[moved_from, self.mission_id]).sync_completion(bump_version=True)
+            # Check if this completion finishes the mission
+            elif sync_mission and (self.remaining_delta or self.is_completed):
+                Mission.apply_remaining_delta(self.mission_id, self.remaining_delta)
+            elif sync_mission:
+                Mission.objects.filter(pk=self.mission_id).bump_version()
+
+    def delete(self, *args, **kwargs):
+        mission_id = self.mission_id
+        result = super().delete(*args, **kwargs)
+        Mission.objects.filter(pk=mission_id).sync_completion(bump_version=True)
+        return result
+
+    def _completion_delta(self):
+        if self._state.adding:
+            return 0 if self.is_completed else 1
+        if self._was_completed is None or self._was_completed == self.is_completed:
+            return 0
+        # Flip the flag conditionally so that concurrent saves of the same target count once.
+        flipped = Target.objects.filter(pk=self.pk, is_completed=self._was_completed).update(
+            is_completed=self.is_completed
+        )
+        if not flipped:
+            return 0
+        return -1 if self.is_completed else 1
 
     class Meta:
-        unique_together = ('mission', 'name')
\ No newline at end of file
+        unique_together = ('mission', 'name')
+        indexes = [
+            # Incomplete targets per mission: completion checks and remaining_targets recounts.
+            models.Index(fields=['mission'], condition=Q(is_completed=False), name='target_incomplete_idx'),
+            models.Index(fields=['country'], name='target_country_idx'),
+        ]
+
+class Breed(models.Model):
+    """Local snapshot of the breeds recognised by TheCatAPI, used for offline breed validation."""
+    name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class TestRun(models.Model):
+    """One execution of the system test suite started from the admin."""
+    __test__ = False  # Not a pytest test class.
+
+    QUEUED, RUNNING, PASSED, FAILED, ERROR = 'queued', 'running', 'passed', 'failed', 'error'
+    STATUS_CHOICES = [(s, s.title()) for s in (QUEUED, RUNNING, PASSED, FAILED, ERROR)]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    workers = models.PositiveIntegerField(default=1)
+    passed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    output = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    @property
+    def is_finished(self):
+        return self.status in (self.PASSED, self.FAILED, self.ERROR)
+
+    def __str__(self):
+        return f"Test run {self.id} - {self.get_status_display()}"
+
+
+class TestResult(models.Model):
+    """Outcome and duration of a single test within a run."""
+    __test__ = False  # Not a pytest test class.
+
+    run = models.ForeignKey(TestRun, related_name='results', on_delete=models.CASCADE)
+    nodeid = models.CharField(max_length=300)
+    outcome = models.CharField(max_length=10)
+    duration = models.FloatField()
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['nodeid'])]
+
+    def __str__(self):
+        return f"{self.nodeid} - {self.outcome}"
+
+
+class StatsSnapshot(models.Model):
+    """Materialized result of one /api/stats/ aggregate, recomputed when older than STATS['MAX_AGE']."""
+    name = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.computed_at:%Y-%m-%d %H:%M:%S}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored outcome of a request sent with an `Idempotency-Key` header (see api.idempotency).
+    `response_status` is null while the first request is still running.
+    """
+    key = models.CharField(max_length=255)
+    # Method and path: the same key may be reused on another endpoint.
+    scope = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=32)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'scope'], name='idempotency_key_scope_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
+
+
+class Job(models.Model):
+    """A unit of background work run by `manage.py run_worker` (see api.jobs)."""
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(s, s.title()) for s in (QUEUED, RUNNING, DONE, FAILED)]
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    # Deduplicates work: only one queued or running job may hold a key.
+    key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=8)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for due jobs; finished ones pile up and are never scanned.
+            models.Index(fields=['run_at'], condition=Q(status='queued'), name='job_due_idx'),
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='job_running_idx'),
+            models.Index(fields=['key'], name='job_key_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['key'], condition=Q(status__in=['queued', 'running']),
+                                    name='job_pending_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} - {self.task} ({self.status})"
+
+
+class Change(models.Model):
+    """
+    One entry of the change feed (see api.changes): the cat or mission `object_id` was written
+    or deleted. Target changes are logged against their mission, which nests the targets.
+    """
+    CAT, MISSION = 'cat', 'mission'
+    KIND_CHOICES = [(CAT, 'Cat'), (MISSION, 'Mission')]
+
+    # The feed cursor; ids are never reused.
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Compaction keeps only the newest entry per object.
+            models.Index(fields=['kind', 'object_id'], name='change_object_idx'),
+            models.Index(fields=['created_at'], name='change_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Change {self.id} - {self.kind} {self.object_id}"
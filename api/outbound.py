@@ -0,0 +1,26 @@
+"""
+Outbound HTTP (TheCatAPI, mission-completion webhooks).
+
+`requests` is imported, and a `requests.Session` created, on the first outbound call rather
+than when a worker starts; the session then keeps its connections alive between calls. Each
+thread gets its own session, as sessions are not safe to share between threads.
+"""
+import threading
+
+_local = threading.local()
+
+
+def session():
+    if getattr(_local, 'session', None) is None:
+        import requests
+
+        _local.session = requests.Session()
+    return _local.session
+
+
+def get(url, **kwargs):
+    return session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return session().post(url, **kwargs)
@@ -0,0 +1,33 @@
+"""
+pytest plugin used by the admin test runner (api/testrunner.py).
+
+Loaded with ``-p api.pytest_plugin``. It reports each finished test as a JSON line on
+stdout, prefixed with RESULT_PREFIX, and can restrict the run to one shard of the suite
+(``--sca-shard=INDEX/COUNT``) so several processes can split the suite across cores.
+"""
+import json
+import sys
+
+RESULT_PREFIX = '##sca-result '
+
+
+def pytest_addoption(parser):
+    parser.addoption('--sca-shard', default='0/1', help="Run only shard INDEX of COUNT (e.g. 1/4).")
+
+
+def pytest_collection_modifyitems(config, items):
+    index, count = (int(part) for part in config.getoption('sca_shard').split('/'))
+    if count <= 1:
+        return
+    selected = [item for position, item in enumerate(items) if position % count == index]
+    deselected = [item for position, item in enumerate(items) if position % count != index]
+    config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
+
+
+def pytest_runtest_logreport(report):
+    # A test is reported once: on its call phase, or on setup if it never got that far.
+    if report.when == 'call' or (report.when == 'setup' and report.outcome != 'passed'):
+        line = json.dumps({'nodeid': report.nodeid, 'outcome': report.outcome, 'duration': report.duration})
+        sys.stdout.write(f"{RESULT_PREFIX}{line}\n")
+        sys.stdout.flush()
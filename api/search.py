@@ -0,0 +1,186 @@
+"""
+Full-text search over target names and notes.
+
+* SQLite: an FTS5 table, `api_target_fts`, indexes `api_target` as external content and
+  is kept in step by triggers, so bulk writes, queryset updates and cascading deletes
+  (which send no model signals) are covered too. Results are ranked with bm25, names
+  weighing twice as much as notes.
+* PostgreSQL: a GIN index over `to_tsvector(name || notes)`, queried with
+  `websearch_to_tsquery` and ranked with `ts_rank` (name weighted above notes).
+* Anything else, or a SQLite database without the FTS table (created without migrations,
+  or since rebuilt): case-insensitive substring matching, unranked.
+
+`install()` creates the index and is run by migration 0010. On SQLite, a later migration
+that rebuilds `api_target` (Django does that for most column changes) drops the triggers
+with the old table; run `manage.py rebuild_search_index` afterwards. Whether the FTS table
+exists is looked up on every search rather than remembered, so dropping or recreating it
+(or rolling back the transaction that created it) takes effect on the next query.
+"""
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Target
+
+FTS_TABLE = 'api_target_fts'
+PG_CONFIG = 'english'
+PG_INDEX = 'target_search_idx'
+MAX_TERMS = 16
+
+SQLITE_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, notes, content='api_target', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON api_target BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, notes) VALUES (new.id, new.name, new.notes); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON api_target BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, notes) VALUES ('delete', old.id, old.name, old.notes); END",
+    # Completion flips and counter updates do not touch the indexed columns and skip the trigger.
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, notes ON api_target BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, notes) VALUES ('delete', old.id, old.name, old.notes); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, notes) VALUES (new.id, new.name, new.notes); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    *(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}" for suffix in ('ai', 'ad', 'au')),
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+def _pg_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('name', 'notes', config=PG_CONFIG)
+
+
+def install(connection):
+    """Creates (or recreates) the full-text index for `connection`; returns False if unsupported."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for statement in SQLITE_DROP[:3]:
+                cursor.execute(statement)
+            try:
+                for statement in SQLITE_SCHEMA:
+                    cursor.execute(statement)
+            except OperationalError:
+                # SQLite built without FTS5: search falls back to substring matching.
+                return False
+        return True
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+
+        with connection.schema_editor() as editor:
+            editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+            editor.add_index(Target, GinIndex(_pg_vector(), name=PG_INDEX))
+        return True
+    return False
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for statement in SQLITE_DROP:
+                cursor.execute(statement)
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+def backend(using='default'):
+    """'fts5', 'postgres' or 'basic', depending on the database behind `using`."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    if connection.vendor == 'sqlite':
+        # Reads the schema SQLite already holds in memory; far cheaper than the search it precedes.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            if cursor.fetchone():
+                return 'fts5'
+    return 'basic'
+
+
+def terms(text):
+    return re.findall(r'\w+', text or '')[:MAX_TERMS]
+
+
+def fts5_query(text):
+    """Every word must match; the last one also as a prefix, for search-as-you-type."""
+    words = [f'"{word}"' for word in terms(text)]
+    if not words:
+        return None
+    words[-1] += '*'
+    return ' '.join(words)
+
+
+def _pg_query(text):
+    from django.contrib.postgres.search import SearchQuery
+
+    return SearchQuery(text, search_type='websearch', config=PG_CONFIG)
+
+
+def _basic_filter(text):
+    condition = Q()
+    for word in terms(text):
+        condition &= Q(name__icontains=word) | Q(notes__icontains=word)
+    return condition
+
+
+def matching_targets(queryset, text):
+    """Filters a Target queryset to the rows matching `text` (unranked)."""
+    kind = backend(queryset.db)
+    if kind == 'fts5':
+        match = fts5_query(text)
+        if match is None:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+    if kind == 'postgres':
+        return queryset.annotate(search=_pg_vector()).filter(search=_pg_query(text))
+    return queryset.filter(_basic_filter(text)) if terms(text) else queryset.none()
+
+
+def filter_missions(queryset, text):
+    """Missions with at least one target matching `text`."""
+    # An uncorrelated IN: the matches are looked up once, not once per candidate mission.
+    return queryset.filter(pk__in=matching_targets(Target.objects.using(queryset.db), text).values('mission_id'))
+
+
+def ranked_targets(text, limit=20, queryset=None):
+    """
+    The `limit` best targets for `text`, each annotated with `rank` (higher is better;
+    None without a full-text index), best first.
+    """
+    queryset = Target.objects.all() if queryset is None else queryset
+    kind = backend(queryset.db)
+    if kind == 'fts5':
+        match = fts5_query(text)
+        if match is None:
+            return []
+        where, params = '', [match]
+        if queryset.query.where:
+            # Filter before the LIMIT so that narrowing the candidates never shortens the page.
+            # The unary + keeps SQLite from running one full-text lookup per candidate rowid.
+            subquery, subparams = queryset.order_by().values('pk').query.sql_with_params()
+            where, params = f' AND +rowid IN ({subquery})', [match, *subparams]
+        with connections[queryset.db].cursor() as cursor:
+            # bm25 is lower-is-better; its column weights follow the FTS table: name, notes.
+            cursor.execute(
+                f"SELECT rowid, -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{where} "
+                f"ORDER BY bm25({FTS_TABLE}, 2.0, 1.0) LIMIT %s",
+                [*params, limit],
+            )
+            ranks = dict(cursor.fetchall())
+        targets = queryset.in_bulk(list(ranks))
+        ordered = [targets[pk] for pk in ranks if pk in targets]
+        for target in ordered:
+            target.rank = ranks[target.pk]
+        return ordered
+    if kind == 'postgres':
+        from django.contrib.postgres.search import SearchRank, SearchVector
+
+        # The filter uses the indexed vector; the weighted one only ranks the matches.
+        weighted = (SearchVector('name', weight='A', config=PG_CONFIG)
+                    + SearchVector('notes', weight='B', config=PG_CONFIG))
+        matches = matching_targets(queryset, text)
+        return list(matches.annotate(rank=SearchRank(weighted, _pg_query(text))).order_by('-rank', 'pk')[:limit])
+    return list(matching_targets(queryset, text).annotate(rank=Value(None, output_field=FloatField()))
+                .order_by('pk')[:limit])
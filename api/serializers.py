@@ -1,24 +1,90 @@
-import requests
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.manager import BaseManager
 from rest_framework import serializers
+from . import breeds, caching, changes, metrics, tasks
 from .models import Cat, Mission, Target
 
 
-class CatSerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """Returns the set of fields asked for with `?fields=a,b` on a read request, or None for all fields."""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Drops fields that were not requested via `?fields=`, e.g. to skip nested targets."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class TimedSerializerMixin:
+    """Reports validation and representation time to the request metrics (see api.metrics)."""
+
+    def run_validation(self, *args, **kwargs):
+        with metrics.timed('serializer'):
+            return super().run_validation(*args, **kwargs)
+
+    def to_representation(self, instance):
+        with metrics.timed('serializer'):
+            return super().to_representation(instance)
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    Read path for lists: every item is built by the child's `represent(instance, fields)`
+    from plain attributes instead of running each field's to_representation. The output
+    is identical (see the golden-output test); writes still go through the fields.
+    """
+
+    def to_representation(self, data):
+        items = data.all() if isinstance(data, BaseManager) else data
+        represent, fields = self.child.represent, tuple(self.child.fields)
+        with metrics.timed('serializer'):
+            return [represent(item, fields) for item in items]
+
+
+class CatSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Cat
         fields = '__all__'
+        read_only_fields = ['breed_status']
+        list_serializer_class = FastListSerializer
+
+    def represent(self, cat, fields):
+        row = {name: getattr(cat, name) for name in fields}
+        if 'salary' in row:
+            row['salary'] = self.fields['salary'].to_representation(row['salary'])
+        return row
 
     def validate_breed(self, value):
-        """Validate breed against TheCatAPI."""
-        try:
-            response = requests.get("https://api.thecatapi.com/v1/breeds", timeout=5)
-            if response.status_code == 200:
-                valid_breeds = [breed['name'] for breed in response.json()]
-                if value not in valid_breeds:
-                    raise serializers.ValidationError(f"'{value}' is not a valid cat breed.")
-            return value
-        except requests.RequestException:
-            return value
+        """Validate breed against the locally cached TheCatAPI breed registry."""
+        # An unseeded registry cannot tell: the breed is accepted and verified later (see validate).
+        if breeds.registry.is_known(value) is False:
+            raise serializers.ValidationError(f"'{value}' is not a valid cat breed.")
+        return value
+
+    def validate(self, attrs):
+        if 'breed' in attrs:
+            # A pending breed is checked by a background job once the registry can be seeded (api.tasks).
+            attrs['breed_status'] = Cat.VERIFIED if breeds.registry.names() else Cat.PENDING
+        return attrs
+
+    def validate_salary(self, value):
+        """Mirrors the cat_salary_non_negative database constraint."""
+        if value < 0:
+            raise serializers.ValidationError("Salary cannot be negative.")
+        return value
 
     def update(self, instance, validated_data):
         """Requirement: Only update salary via partial update."""
@@ -30,12 +96,17 @@ class CatSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class TargetSerializer(serializers.ModelSerializer):
+class TargetSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.IntegerField(required=False)  # Allow ID for updates
 
     class Meta:
         model = Target
-        fields = ['id', 'name', 'country', 'notes', 'is_completed']
+        fields = ['id', 'name', 'country', 'notes', 'is_completed', 'version']
+        read_only_fields = ['version']
+        list_serializer_class = FastListSerializer
+
+    def represent(self, target, fields):
+        return {name: getattr(target, name) for name in fields}
 
     def validate(self, data):
         """Requirement: Notes frozen if target or mission completed."""
@@ -46,13 +117,39 @@ class TargetSerializer(serializers.ModelSerializer):
         return data
 
 
-class MissionSerializer(serializers.ModelSerializer):
+class TargetListSerializer(TargetSerializer):
+    """Targets listed outside their mission (list and search) carry the mission id."""
+
+    class Meta(TargetSerializer.Meta):
+        fields = TargetSerializer.Meta.fields + ['mission']
+        read_only_fields = ['version', 'mission']
+
+    def represent(self, target, fields):
+        # mission_id, not mission: reading the relation would load every parent mission.
+        return {name: getattr(target, 'mission_id' if name == 'mission' else name) for name in fields}
+
+
+class MissionSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     targets = TargetSerializer(many=True)
 
     class Meta:
         model = Mission
-        fields = ['id', 'cat', 'is_completed', 'targets']
-        read_only_fields = ['is_completed']
+        fields = ['id', 'cat', 'is_completed', 'version', 'targets']
+        read_only_fields = ['is_completed', 'version']
+        list_serializer_class = FastListSerializer
+
+    def represent(self, mission, fields):
+        row = {}
+        for name in fields:
+            if name == 'cat':
+                row['cat'] = mission.cat_id
+            elif name == 'targets':
+                child = self.fields['targets'].child
+                target_fields = tuple(child.fields)
+                row['targets'] = [child.represent(target, target_fields) for target in mission.targets.all()]
+            else:
+                row[name] = getattr(mission, name)
+        return row
 
     def validate_cat(self, value):
         """Requirement: One cat can only have one mission at a time."""
@@ -65,9 +162,13 @@ class MissionSerializer(serializers.ModelSerializer):
         if not (1 <= len(targets_data) <= 3):
             raise serializers.ValidationError("A mission must have 1-3 targets.")
 
-        mission = Mission.objects.create(**validated_data)
-        for target_data in targets_data:
-            Target.objects.create(mission=mission, **target_data)
+        with transaction.atomic():
+            # Requirement: a mission whose targets are all done is already complete.
+            remaining = sum(not t.get('is_completed', False) for t in targets_data)
+            mission = Mission.objects.create(
+                is_completed=remaining == 0, remaining_targets=remaining, **validated_data
+            )
+            Target.objects.bulk_create([Target(mission=mission, **target_data) for target_data in targets_data])
         return mission
 
     def update(self, instance, validated_data):
@@ -75,28 +176,218 @@ class MissionSerializer(serializers.ModelSerializer):
         targets_data = validated_data.pop('targets', None)
 
         # Update mission fields (like assigning a cat)
-        instance = super().update(instance, validated_data)
+        if validated_data:
+            instance = super().update(instance, validated_data)
 
         if targets_data is not None:
             # Check 1-3 targets requirement
             if not (1 <= len(targets_data) <= 3):
                 raise serializers.ValidationError("A mission must have 1-3 targets.")
 
-            # Logic to update existing targets or create new ones
-            keep_targets = []
-            for target_data in targets_data:
-                target_id = target_data.get('id')
-                if target_id:
-                    t = Target.objects.get(id=target_id, mission=instance)
-                    for attr, value in target_data.items():
-                        setattr(t, attr, value)
-                    t.save()
-                    keep_targets.append(t.id)
+            # A versioned save or an If-Match claim above already counted this write.
+            bump_version = not (validated_data or instance._version_claimed)
+            self._sync_targets(instance, targets_data, bump_version)
+
+        return instance
+
+    def _sync_targets(self, instance, targets_data, bump_version=True):
+        """
+        Applies the submitted target list as a diff against the stored one: one read,
+        then bulk writes of only what changed. A no-op payload issues no writes at all.
+        The targets are part of the mission, so a change to them bumps its version.
+        """
+        existing = {target.id: target for target in instance.targets.all()}
+        mission_frozen = instance.is_completed
+
+        changed, changed_fields, new_targets = [], set(), []
+        for target_data in targets_data:
+            target_data = dict(target_data)
+            target_id = target_data.pop('id', None)
+            if not target_id:
+                new_targets.append(Target(mission=instance, **target_data))
+                continue
+            target = existing.get(target_id)
+            if target is None:
+                raise serializers.ValidationError(f"Target {target_id} does not belong to this mission.")
+
+            fields = {attr for attr, value in target_data.items() if getattr(target, attr) != value}
+            # Requirement: Notes frozen if target or mission completed.
+            if 'notes' in fields and (target.is_completed or mission_frozen):
+                raise serializers.ValidationError("Notes are frozen because target/mission is complete.")
+            if fields:
+                for attr in fields:
+                    setattr(target, attr, target_data[attr])
+                changed.append(target)
+                changed_fields |= fields
+
+        kept = {target_data['id'] for target_data in targets_data if target_data.get('id')}
+        removed = [target_id for target_id in existing if target_id not in kept]
+
+        names = [target.name for target in existing.values() if target.id in kept] + [t.name for t in new_targets]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError("Target names must be unique within a mission.")
+
+        if not (changed or new_targets or removed):
+            return
+
+        with transaction.atomic():
+            if removed:
+                Target.objects.filter(id__in=removed).delete(sync_mission=False)
+            if changed:
+                Target.objects.bulk_update(changed, sorted(changed_fields))
+            if new_targets:
+                Target.objects.bulk_create(new_targets)
+            # Per-target mission syncing is skipped; completion is checked once here.
+            if removed or new_targets or 'is_completed' in changed_fields:
+                instance.check_and_complete(bump_version=bump_version)
+                tasks.queue_completion_notices([instance.pk])
+            elif bump_version:
+                Mission.objects.filter(pk=instance.pk).bump_version()
+                instance.refresh_from_db(fields=['version'])
+        # Bulk writes send no model signals.
+        caching.invalidate('mission', [instance.pk])
+        changes.record('mission', [instance.pk])
+
+
+class MissionBulkListSerializer(serializers.ListSerializer):
+    """Validates a whole batch of missions with set-based queries and inserts it in one transaction."""
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        validated = super().to_internal_value(data)
+
+        # Requirement: One cat can only have one mission at a time (checked for the whole batch).
+        cat_ids = [item['cat'] for item in validated if item.get('cat') is not None]
+        existing = set(Cat.objects.filter(id__in=cat_ids).values_list('id', flat=True))
+        busy = set(Mission.objects.filter(cat_id__in=cat_ids).values_list('cat_id', flat=True))
+
+        errors = []
+        seen = set()
+        for item in validated:
+            cat_id = item.get('cat')
+            if cat_id is None:
+                errors.append({})
+            elif cat_id not in existing:
+                errors.append({'cat': [f"Invalid pk \"{cat_id}\" - object does not exist."]})
+            elif cat_id in busy or cat_id in seen:
+                errors.append({'cat': ["This cat is already assigned to another mission."]})
+            else:
+                errors.append({})
+            seen.add(cat_id)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def create(self, validated_data):
+        missions = []
+        for item in validated_data:
+            remaining = sum(not t.get('is_completed', False) for t in item['targets'])
+            missions.append(Mission(cat_id=item.get('cat'), is_completed=remaining == 0, remaining_targets=remaining))
+        with transaction.atomic():
+            Mission.objects.bulk_create(missions, batch_size=self.batch_size)
+            Target.objects.bulk_create(
+                [
+                    Target(mission=mission, **target_data)
+                    for mission, item in zip(missions, validated_data)
+                    for target_data in item['targets']
+                ],
+                batch_size=self.batch_size,
+            )
+        caching.invalidate('mission')
+        changes.record('mission', [mission.pk for mission in missions])
+        return missions
+
+
+class MissionBulkSerializer(serializers.Serializer):
+    """One mission of a bulk import; cat ownership is validated by the list serializer."""
+    cat = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    targets = TargetSerializer(many=True)
+
+    class Meta:
+        list_serializer_class = MissionBulkListSerializer
+
+    def validate_targets(self, value):
+        """Requirement: Mission must have 1-3 uniquely named targets."""
+        if not (1 <= len(value) <= 3):
+            raise serializers.ValidationError("A mission must have 1-3 targets.")
+        names = [target['name'] for target in value]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError("Target names must be unique within a mission.")
+        for target in value:
+            target.pop('id', None)
+        return value
+
+
+class TargetBulkUpdateListSerializer(serializers.ListSerializer):
+    """Loads every referenced target with its mission in one query and applies changes in bulk."""
+
+    def to_internal_value(self, data):
+        validated = super().to_internal_value(data)
+
+        ids = Counter(item['id'] for item in validated)
+        targets = Target.objects.select_related('mission').in_bulk(list(ids))
+
+        errors = []
+        for item in validated:
+            target = targets.get(item['id'])
+            if target is None:
+                errors.append({'id': [f"Target {item['id']} does not exist."]})
+            # Requirement: Notes cannot be updated if either the target or the mission is completed
+            elif 'notes' in item and (target.is_completed or target.mission.is_completed):
+                errors.append({'notes': ["Target or Mission is complete. Notes are frozen."]})
+            elif ids[item['id']] > 1:
+                errors.append({'id': ["Each target may only appear once."]})
+            else:
+                errors.append({})
+                item['target'] = target
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def save(self, **kwargs):
+        changed, changed_fields = [], set()
+        for item in self.validated_data:
+            target = item['target']
+            fields = {attr for attr in ('notes', 'is_completed') if attr in item and getattr(target, attr) != item[attr]}
+            for attr in fields:
+                setattr(target, attr, item[attr])
+            if fields:
+                changed.append(target)
+                changed_fields |= fields
+
+        if changed:
+            with transaction.atomic():
+                Target.objects.bulk_update(changed, sorted(changed_fields))
+                mission_ids = {target.mission_id for target in changed}
+                missions = Mission.objects.filter(pk__in=mission_ids)
+                if 'is_completed' in changed_fields:
+                    # One completion check (and version bump) per affected mission.
+                    missions.sync_completion(bump_version=True)
+                    tasks.queue_completion_notices(mission_ids)
                 else:
-                    t = Target.objects.create(mission=instance, **target_data)
-                    keep_targets.append(t.id)
+                    missions.bump_version()
+            # Bulk writes send no model signals.
+            caching.invalidate('mission', mission_ids)
+            changes.record('mission', mission_ids)
+
+        self.instance = [item['target'] for item in self.validated_data]
+        return self.instance
+
+
+class TargetBulkUpdateSerializer(serializers.Serializer):
+    """One entry of `PATCH /api/targets/bulk/`: a target id plus the fields to change."""
+    id = serializers.IntegerField()
+    notes = serializers.CharField(required=False, allow_blank=True)
+    is_completed = serializers.BooleanField(required=False)
+
+    class Meta:
+        list_serializer_class = TargetBulkUpdateListSerializer
 
-            # Remove targets not in the update request
-            instance.targets.exclude(id__in=keep_targets).delete()
 
-        return instance
\ No newline at end of file
+class AutoAssignSerializer(serializers.Serializer):
+    """Options of a batch auto-assignment run (see api.assignments.auto_assign)."""
+    dry_run = serializers.BooleanField(default=False)
+    budget = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0, required=False, allow_null=True)
+    limit = serializers.IntegerField(min_value=1, required=False, allow_null=True)
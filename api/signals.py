@@ -0,0 +1,44 @@
+"""
+Keeps the response cache (api.caching) and the change feed (api.changes) in step with model
+changes, and queues breed checks.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, changes, tasks
+from .models import Cat, Mission, Target
+
+
+@receiver([post_save, post_delete], sender=Cat)
+def cat_changed(sender, instance, **kwargs):
+    caching.invalidate('cat', [instance.pk])
+    changes.record('cat', [instance.pk])
+
+
+@receiver(post_save, sender=Cat)
+def cat_saved(sender, instance, **kwargs):
+    tasks.queue_breed_checks([instance])
+
+
+@receiver(pre_delete, sender=Cat)
+def cat_deleting(sender, instance, **kwargs):
+    # Mission.cat is cleared with a plain UPDATE (SET_NULL) that sends no signals or version bump.
+    mission_ids = list(Mission.objects.filter(cat_id=instance.pk).values_list('id', flat=True))
+    if mission_ids:
+        Mission.objects.filter(pk__in=mission_ids).bump_version()
+        caching.invalidate('mission', mission_ids)
+        changes.record('mission', mission_ids)
+
+
+@receiver([post_save, post_delete], sender=Mission)
+def mission_changed(sender, instance, **kwargs):
+    caching.invalidate('mission', [instance.pk])
+    changes.record('mission', [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Target)
+def target_changed(sender, instance, **kwargs):
+    # Targets are nested in the mission representation; this also covers the
+    # completion UPDATE that Target.save() applies to the mission.
+    caching.invalidate('mission', [instance.mission_id])
+    changes.record('mission', [instance.mission_id])
@@ -0,0 +1,66 @@
+"""
+Worker startup cost: how long a fresh process takes to become ready to serve, and its memory.
+
+`measure()` starts a new interpreter that loads the WSGI application (`settings.WSGI_APPLICATION`)
+and the URLconf, as a worker does before its first request, and reports the time that took,
+the peak RSS of the process, how many modules it imported and whether the `WATCHED` optional
+modules were among them. With `imports=True` the child runs under `python -X importtime` and the
+import time is also broken down by top-level package (profiling inflates the total). Used by
+`manage.py startup_report` and benchmarks/bench_startup.py.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+
+# Only needed by the admin test runner and outbound HTTP; neither should load at startup.
+WATCHED = ('pytest', 'requests', 'api.testrunner')
+
+CHILD = '''
+import importlib, json, sys, time
+started = time.perf_counter()
+module, _, name = sys.argv[1].rpartition('.')
+getattr(importlib.import_module(module), name)
+from django.urls import get_resolver
+get_resolver().url_patterns
+seconds = time.perf_counter() - started
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = peak if sys.platform == 'darwin' else peak * 1024
+except ImportError:
+    rss = None
+print(json.dumps({'seconds': seconds, 'rss': rss, 'modules': sorted(sys.modules)}))
+'''
+
+
+def measure(imports=False):
+    command = [sys.executable, *(['-X', 'importtime'] if imports else []), '-c', CHILD, settings.WSGI_APPLICATION]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+    completed = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+    data = json.loads(completed.stdout.strip().splitlines()[-1])
+    modules = set(data['modules'])
+    result = {
+        'seconds': data['seconds'],
+        'rss_bytes': data['rss'],
+        'modules': len(modules),
+        'loaded': {name: name in modules for name in WATCHED},
+    }
+    if imports:
+        result['packages'] = import_times(completed.stderr)
+    return result
+
+
+def import_times(output):
+    """`-X importtime` output summed by top-level package: [(package, seconds), ...], slowest first."""
+    totals = Counter()
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        if own.strip().isdigit():
+            totals[name.strip().split('.')[0]] += int(own) / 1e6
+    return totals.most_common()
@@ -0,0 +1,139 @@
+"""
+Agency analytics served by /api/stats/.
+
+Every stat is a single aggregate query (`aggregate`, or `values().annotate()` grouped in
+the database) whose result is materialized in a `StatsSnapshot` row. Serving the endpoint
+reads the snapshots in one query, so its cost does not grow with the number of cats,
+missions or targets. Only a stat with no snapshot yet is computed by the request that
+needs it. A snapshot older than `STATS['MAX_AGE']` seconds is still served; the first
+read to see it expired claims the refresh by moving its `computed_at` forward with a
+conditional UPDATE, so one request across all workers recomputes it, in a background
+thread (or a job with BACKGROUND_REFRESH) while the others keep serving the stale data.
+On large data sets run `manage.py refresh_stats` from a scheduler as well.
+"""
+import logging
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Avg, Count, F, FloatField, Max, Q, Sum, Window
+from django.db.models.functions import Cast, Rank
+from django.utils import timezone
+
+from . import jobs
+from .models import Cat, Mission, StatsSnapshot, Target
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal('0.01')
+
+DEFAULTS = {
+    'MAX_AGE': 60,
+    # Recompute expired snapshots in a background job (api.jobs) instead of a thread.
+    'BACKGROUND_REFRESH': False,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'STATS', {}).get(name, DEFAULTS[name])
+
+
+def missions_by_status():
+    return Mission.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_completed=False)),
+        completed=Count('pk', filter=Q(is_completed=True)),
+        unassigned=Count('pk', filter=Q(is_completed=False, cat__isnull=True)),
+    )
+
+
+def completion_by_country():
+    completion_rate = Cast(Count('pk', filter=Q(is_completed=True)), FloatField()) / Cast(Count('pk'), FloatField())
+    rows = (
+        Target.objects.order_by()
+        .values('country')
+        .annotate(
+            targets=Count('pk'),
+            completed=Count('pk', filter=Q(is_completed=True)),
+            completion_rate=completion_rate,
+        )
+        .annotate(rank=Window(Rank(), order_by=F('completion_rate').desc()))
+        .order_by('rank', 'country')
+    )
+    return list(rows)
+
+
+def salary_by_breed():
+    rows = (
+        Cat.objects.order_by()
+        .values('breed')
+        .annotate(cats=Count('pk'), total_salary=Sum('salary'), average_salary=Avg('salary'))
+        .order_by('breed')
+    )
+    # Money as "4500.50" strings, the same whether the snapshot is fresh or read back from JSON.
+    return [{**row, 'total_salary': _money(row['total_salary']), 'average_salary': _money(row['average_salary'])}
+            for row in rows]
+
+
+def _money(value):
+    return str(Decimal(value).quantize(CENTS))
+
+
+def targets_per_mission():
+    return Mission.objects.annotate(target_total=Count('targets')).aggregate(
+        average=Avg('target_total'), max=Max('target_total')
+    )
+
+
+STATS = {
+    'missions_by_status': missions_by_status,
+    'completion_by_country': completion_by_country,
+    'salary_by_breed': salary_by_breed,
+    'targets_per_mission': targets_per_mission,
+}
+
+
+def refresh(names=None):
+    """Recomputes the given stats (all by default) and stores their snapshots."""
+    now = timezone.now()
+    snapshots = [StatsSnapshot(name=name, data=STATS[name](), computed_at=now) for name in names or STATS]
+    StatsSnapshot.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=['name'], update_fields=['data', 'computed_at']
+    )
+    return {snapshot.name: snapshot for snapshot in snapshots}
+
+
+def _refresh_in_background(names):
+    try:
+        refresh(names)
+    except Exception:
+        logger.warning("Stats refresh failed; serving the stale snapshots.", exc_info=True)
+    finally:
+        connection.close()
+
+
+def schedule_refresh(names):
+    if get_setting('BACKGROUND_REFRESH'):
+        jobs.enqueue('refresh_stats', key='refresh_stats')
+    else:
+        threading.Thread(target=_refresh_in_background, args=(names,), name='stats-refresh', daemon=True).start()
+
+
+def snapshot():
+    """
+    Returns {name: StatsSnapshot} for every stat, computing missing ones now and
+    scheduling one refresh of the expired ones, which are served stale meanwhile.
+    """
+    snapshots = StatsSnapshot.objects.in_bulk(list(STATS), field_name='name')
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=get_setting('MAX_AGE'))
+    expired = [name for name in STATS if name in snapshots and snapshots[name].computed_at <= cutoff]
+    missing = [name for name in STATS if name not in snapshots]
+    # Whoever moves computed_at forward first refreshes; concurrent readers see 0 rows updated.
+    if expired and StatsSnapshot.objects.filter(name__in=expired, computed_at__lte=cutoff).update(computed_at=now):
+        schedule_refresh(expired)
+    if missing:
+        snapshots.update(refresh(missing))
+    return snapshots
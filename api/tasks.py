@@ -0,0 +1,69 @@
+"""
+Background tasks run by the job queue (api.jobs).
+
+* `verify_breed` checks the breed of a cat recruited while the breed registry was empty,
+  seeding the registry from TheCatAPI first; while the API is down the job fails and is
+  retried with backoff, and the cat stays "pending".
+* `notify_mission_completed` posts a completed mission to `JOBS['NOTIFY_URL']`, once.
+* `refresh_stats` recomputes the /api/stats/ snapshots off the request path.
+"""
+from django.utils import timezone
+
+from . import caching, changes, metrics, outbound, stats
+from .breeds import registry
+from .jobs import enqueue_many, get_setting, task
+from .models import Cat, Job, Mission
+
+
+@task
+def verify_breed(cat_id):
+    cat = Cat.objects.filter(pk=cat_id, breed_status=Cat.PENDING).only('breed').first()
+    if cat is None:
+        return
+    if not registry.names():
+        # Raises while the breed source is unavailable, which schedules a retry.
+        registry.refresh()
+    status = Cat.VERIFIED if registry.is_known(cat.breed) else Cat.INVALID
+    # The breed may have been edited since the job was queued; that edit queued its own job.
+    if Cat.objects.filter(pk=cat_id, breed=cat.breed, breed_status=Cat.PENDING).update(breed_status=status):
+        caching.invalidate('cat', [cat_id])
+        changes.record('cat', [cat_id])
+
+
+@task
+def notify_mission_completed(mission_id):
+    url = get_setting('NOTIFY_URL')
+    mission = Mission.objects.filter(pk=mission_id, is_completed=True).values('id', 'cat_id').first()
+    if not url or mission is None:
+        return
+    with metrics.timed('http'):
+        response = outbound.post(url, json={"event": "mission.completed", "mission": mission['id'],
+                                            "cat": mission['cat_id'], "at": timezone.now().isoformat()}, timeout=10)
+    response.raise_for_status()
+
+
+@task
+def refresh_stats(names=None):
+    stats.refresh(names)
+
+
+def queue_breed_checks(cats):
+    """Queues a verify_breed job for every cat in `cats` whose breed is pending."""
+    pending = [cat.pk for cat in cats if cat.breed_status == Cat.PENDING]
+    if pending:
+        enqueue_many('verify_breed', [[pk] for pk in pending], keys=[f'verify_breed:{pk}' for pk in pending])
+
+
+def queue_completion_notices(mission_ids):
+    """
+    Queues one notification per completed mission in `mission_ids`, when NOTIFY_URL is set.
+    A mission that was already notified (or is being) is skipped.
+    """
+    if not get_setting('NOTIFY_URL') or not mission_ids:
+        return
+    completed = Mission.objects.filter(pk__in=mission_ids, is_completed=True).values_list('pk', flat=True)
+    keys = {f'notify_mission_completed:{pk}': pk for pk in completed}
+    queued = set(Job.objects.filter(key__in=keys).values_list('key', flat=True))
+    keys = {key: pk for key, pk in keys.items() if key not in queued}
+    if keys:
+        enqueue_many('notify_mission_completed', [[pk] for pk in keys.values()], keys=list(keys))
@@ -0,0 +1,138 @@
+"""
+Background execution of the system test suite for the admin "Run All Tests" action.
+
+A run is recorded as a `TestRun` and executed outside the request: a supervisor thread
+starts one pytest subprocess per shard (so the suite never runs inside the serving
+interpreter), reads the per-test results the `api.pytest_plugin` plugin prints, and
+stores them as `TestResult` rows while the admin page polls for progress.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TestResult, TestRun
+from .pytest_plugin import RESULT_PREFIX
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'PATHS': ['api/tests.py'],
+    'WORKERS': 1,
+    'MAX_OUTPUT': 20000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'SYSTEM_TESTS', {}).get(name, DEFAULTS[name])
+
+
+def max_workers():
+    return os.cpu_count() or 1
+
+
+def pytest_command(shard, shards):
+    return [
+        sys.executable, '-m', 'pytest', *get_setting('PATHS'),
+        '--no-migrations', '-q', '-p', 'api.pytest_plugin', f'--sca-shard={shard}/{shards}',
+    ]
+
+
+def shard_env(run, shard):
+    """Environment of a shard's pytest process: its own test database name (see SCA/settings.py)."""
+    return {**os.environ, 'SCA_TEST_DB_SUFFIX': f'run{run.pk}_{shard}'}
+
+
+def start_run(workers=None):
+    """Queues a run and returns it immediately; the suite executes on a background thread."""
+    workers = max(1, min(workers or get_setting('WORKERS'), max_workers()))
+    run = TestRun.objects.create(workers=workers)
+    threading.Thread(target=_execute_in_background, args=(run.pk,), name=f'test-run-{run.pk}', daemon=True).start()
+    return run
+
+
+def _execute_in_background(run_id):
+    try:
+        execute(TestRun.objects.get(pk=run_id))
+    finally:
+        connection.close()
+
+
+def execute(run):
+    """Runs every shard of `run` in parallel subprocesses and records the results."""
+    TestRun.objects.filter(pk=run.pk).update(status=TestRun.RUNNING)
+    started = time.perf_counter()
+    outputs = [''] * run.workers
+    return_codes = [None] * run.workers
+
+    def run_shard(shard):
+        try:
+            outputs[shard], return_codes[shard] = _run_shard(run, shard)
+        except Exception:
+            logger.exception("Test run %s shard %s failed to start.", run.pk, shard)
+            outputs[shard] = f"Shard {shard} failed to start."
+
+    def run_shard_in_thread(shard):
+        try:
+            run_shard(shard)
+        finally:
+            connection.close()
+
+    if run.workers == 1:
+        run_shard(0)
+    else:
+        threads = [threading.Thread(target=run_shard_in_thread, args=(shard,)) for shard in range(run.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    close_old_connections()
+    run.refresh_from_db()
+    # pytest exits with 0 (all passed) or 1 (some failed); anything else is a crash.
+    if any(code not in (0, 1) for code in return_codes):
+        run.status = TestRun.ERROR
+    else:
+        run.status = TestRun.FAILED if run.failed else TestRun.PASSED
+    run.duration = time.perf_counter() - started
+    run.finished_at = timezone.now()
+    run.output = "\n".join(outputs)[-get_setting('MAX_OUTPUT'):]
+    run.save(update_fields=['status', 'duration', 'finished_at', 'output'])
+    return run
+
+
+def _run_shard(run, shard):
+    process = subprocess.Popen(
+        pytest_command(shard, run.workers),
+        cwd=settings.BASE_DIR,
+        env=shard_env(run, shard),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    output = []
+    for line in process.stdout:
+        position = line.find(RESULT_PREFIX)
+        if position == -1:
+            output.append(line)
+            continue
+        output.append(line[:position])
+        _record(run, json.loads(line[position + len(RESULT_PREFIX):]))
+    return ''.join(output), process.wait()
+
+
+def _record(run, result):
+    TestResult.objects.create(
+        run=run, nodeid=result['nodeid'], outcome=result['outcome'], duration=result['duration']
+    )
+    if result['outcome'] in ('passed', 'failed'):
+        counter = result['outcome']
+        TestRun.objects.filter(pk=run.pk).update(**{counter: F(counter) + 1})
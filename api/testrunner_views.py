@@ -0,0 +1,74 @@
+"""
+Admin pages of the system test runner (api.testrunner).
+
+Kept out of api.views: the URLconf imports this module, and with it the runner, on the first
+request to /api/run-pytest/ rather than when a worker starts.
+"""
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Avg, Count, Max
+from django.http import HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from . import testrunner
+from .models import TestResult, TestRun
+
+
+@staff_member_required
+def run_system_tests_view(request):
+    """
+    GET shows the run history and the slowest tests; POST queues a new run of the pytest
+    suite in the background and redirects to its progress page.
+    Protected by staff_member_required to ensure only authorized users can trigger it.
+    """
+    if request.method == 'POST':
+        try:
+            workers = int(request.POST.get('workers') or 0) or None
+        except ValueError:
+            workers = None
+        run = testrunner.start_run(workers=workers)
+        messages.info(request, f"Test run {run.id} queued.")
+        return HttpResponseRedirect(reverse('test-run-detail', kwargs={'run_id': run.id}))
+
+    slowest = (
+        TestResult.objects.filter(outcome='passed')
+        .values('nodeid')
+        .annotate(avg_duration=Avg('duration'), max_duration=Max('duration'), runs=Count('id'))
+        .order_by('-avg_duration')[:10]
+    )
+    return render(request, 'admin/test_runs.html', {
+        'title': 'System test runs',
+        'runs': TestRun.objects.all()[:25],
+        'slowest': slowest,
+        'max_workers': testrunner.max_workers(),
+    })
+
+
+@staff_member_required
+def system_test_run_view(request, run_id):
+    """Progress page for a single run; polls system_test_run_status_view until the run finishes."""
+    run = get_object_or_404(TestRun, pk=run_id)
+    return render(request, 'admin/test_run.html', {'title': f'Test run {run.id}', 'run': run})
+
+
+@staff_member_required
+def system_test_run_status_view(request, run_id):
+    """JSON progress of a run; `?after=<result id>` returns only results newer than that."""
+    run = get_object_or_404(TestRun, pk=run_id)
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    results = run.results.filter(id__gt=after).values('id', 'nodeid', 'outcome', 'duration')
+    return JsonResponse({
+        'id': run.id,
+        'status': run.status,
+        'finished': run.is_finished,
+        'workers': run.workers,
+        'passed': run.passed,
+        'failed': run.failed,
+        'duration': run.duration,
+        'results': list(results),
+        'output': run.output if run.is_finished else '',
+    })
@@ -1,7 +1,48 @@
+import json
+import sys
+import time
+
 import pytest
+from asgiref.sync import async_to_sync
 from rest_framework import status
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from .models import Cat, Mission, Target
+from django.utils import timezone
+from . import caching, changes, metrics, testrunner, throttling
+from .breeds import BreedRegistry, registry
+from .models import Breed, Cat, Change, Job, Mission, StatsSnapshot, Target, TestRun
+
+
+class FakeBreedSource:
+    """Local stand-in for TheCatAPI so tests never touch the network."""
+
+    def __init__(self, names=("Siberian", "Bengal", "Persian"), fail=False):
+        self.names = list(names)
+        self.fail = fail
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("breed source unavailable")
+        return self.names
+
+
+def count_queries(func, *args, **kwargs):
+    """Runs `func` and returns how many SQL queries it issued."""
+    with CaptureQueriesContext(connection) as ctx:
+        func(*args, **kwargs)
+    return len(ctx.captured_queries)
+
+
+def create_missions(count, targets=3):
+    for i in range(count):
+        cat = Cat.objects.create(name=f"Spy {i}", years_of_experience=2, breed="Siberian", salary=1000)
+        mission = Mission.objects.create(cat=cat)
+        for n in range(targets):
+            Target.objects.create(mission=mission, name=f"T{n}", country="UA")
 
 
 @pytest.fixture
@@ -10,6 +51,41 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    caching.get_cache().clear()
+    caching.stats.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    throttling.reset()
+
+
+@pytest.fixture
+def search_index(db):
+    """Creates the full-text index, which a test database built with --no-migrations lacks."""
+    from . import search
+
+    if not search.install(connection):
+        pytest.skip("The test database has no full-text index support.")
+
+
+@pytest.fixture
+def no_response_cache(settings):
+    """Disables the response cache so query budgets measure the database work."""
+    settings.API_CACHE = {'ENABLED': False}
+
+
+@pytest.fixture(autouse=True)
+def seeded_breeds(db):
+    """Seeds the shared breed registry for every test."""
+    registry.clear()
+    registry.store(FakeBreedSource().names)
+    yield
+    registry.clear()
+
+
 @pytest.mark.django_db
 class TestSCA:
 
@@ -105,6 +181,109 @@ class TestSCA:
         response = api_client.delete(url)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+    def test_bulk_create_missions(self, api_client, django_assert_max_num_queries):
+        """Bulk import writes all missions and targets with a fixed number of queries."""
+        cats = [Cat.objects.create(name=f"Spy {i}", years_of_experience=2, breed="Siberian", salary=1000)
+                for i in range(3)]
+        data = [
+            {"cat": cat.id, "targets": [{"name": "T1", "country": "UK"}, {"name": "T2", "country": "FR"}]}
+            for cat in cats
+        ] + [{"targets": [{"name": "T1", "country": "UA", "is_completed": True}]}]
+
+        url = reverse('mission-bulk')
+        with django_assert_max_num_queries(8):
+            response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data["ids"]) == 4
+        assert Target.objects.count() == 7
+        assert Mission.objects.get(id=response.data["ids"][-1]).is_completed is True
+
+    def test_bulk_create_missions_reports_per_item_errors(self, api_client):
+        """Invalid items are reported by position and nothing is written."""
+        cat = Cat.objects.create(name="Spy", years_of_experience=2, breed="Siberian", salary=1000)
+        busy = Cat.objects.create(name="Busy", years_of_experience=2, breed="Siberian", salary=1000)
+        Mission.objects.create(cat=busy)
+        data = [
+            {"cat": cat.id, "targets": [{"name": "T1", "country": "UK"}]},
+            {"cat": cat.id, "targets": [{"name": "T1", "country": "UK"}]},
+            {"cat": busy.id, "targets": [{"name": "T1", "country": "UK"}]},
+        ]
+
+        response = api_client.post(reverse('mission-bulk'), data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert "already assigned" in str(response.data[1]["cat"])
+        assert "already assigned" in str(response.data[2]["cat"])
+        assert Mission.objects.count() == 1
+
+    def test_bulk_create_missions_target_limit(self, api_client):
+        """Requirement: every mission in a bulk import has 1-3 targets."""
+        data = [{"targets": []}, {"targets": [{"name": "T1", "country": "UK"}, {"name": "T1", "country": "UK"}]}]
+        response = api_client.post(reverse('mission-bulk'), data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "1-3 targets" in str(response.data[0])
+        assert "unique" in str(response.data[1])
+
+    def test_assign_cat_is_a_single_conditional_update(self, api_client, django_assert_num_queries):
+        """Assignment reads the cat once and writes with one conditional UPDATE."""
+        cat = Cat.objects.create(name="Spy", years_of_experience=2, breed="Siberian", salary=1000)
+        mission = Mission.objects.create()
+        url = reverse('mission-assign-cat', kwargs={'pk': mission.pk})
+
+        with django_assert_num_queries(4):  # SELECT cat, SAVEPOINT, UPDATE, RELEASE
+            response = api_client.patch(url, {"cat_id": cat.id})
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_assign_cat_missing_objects(self, api_client):
+        """Unknown cats and missions are reported as 404s."""
+        cat = Cat.objects.create(name="Spy", years_of_experience=2, breed="Siberian", salary=1000)
+        mission = Mission.objects.create()
+        response = api_client.patch(reverse('mission-assign-cat', kwargs={'pk': mission.pk}), {"cat_id": 999})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = api_client.patch(reverse('mission-assign-cat', kwargs={'pk': 999}), {"cat_id": cat.id})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = api_client.patch('/api/missions/abc/assign_cat/', {"cat_id": cat.id})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_racing_mission_create_maps_constraint_to_400(self, api_client, monkeypatch):
+        """A cat taken after validation yields a clean 400 instead of an IntegrityError."""
+        from .serializers import MissionSerializer
+
+        cat = Cat.objects.create(name="Spy", years_of_experience=2, breed="Siberian", salary=1000)
+        Mission.objects.create(cat=cat)
+        monkeypatch.setattr(MissionSerializer, 'validate_cat', lambda self, value: value)
+
+        data = {"cat": cat.id, "targets": [{"name": "T1", "country": "UK"}]}
+        response = api_client.post(reverse('mission-list'), data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Mission.objects.count() == 1
+
+    def test_batch_assign_cats(self, api_client):
+        """Many cats are assigned in one call; any invalid pair aborts the whole batch."""
+        cats = [Cat.objects.create(name=f"Spy {i}", years_of_experience=2, breed="Siberian", salary=1000)
+                for i in range(3)]
+        missions = [Mission.objects.create() for _ in range(3)]
+        url = reverse('mission-assign')
+
+        bad = [{"mission": missions[0].id, "cat": cats[0].id}, {"mission": missions[1].id, "cat": cats[0].id}]
+        response = api_client.post(url, bad, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "once per batch" in response.data[1]["error"]
+        assert not Mission.objects.filter(cat__isnull=False).exists()
+
+        good = [{"mission": m.id, "cat": c.id} for m, c in zip(missions, cats)]
+        response = api_client.post(url, good, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert dict(Mission.objects.values_list('id', 'cat_id')) == {m.id: c.id for m, c in zip(missions, cats)}
+
+        taken = [{"mission": Mission.objects.create().id, "cat": cats[0].id}]
+        response = api_client.post(url, taken, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "already on another mission" in response.data[0]["error"]
+
     # --- 3. TARGETS & INTEL ---
 
     def test_update_target_notes(self, api_client):
@@ -144,4 +323,1418 @@ class TestSCA:
         api_client.patch(url, {"is_completed": True})
 
         mission.refresh_from_db()
-        assert mission.is_completed is True
\ No newline at end of file
+        assert mission.is_completed is True
+
+    # --- 4. BREED REGISTRY ---
+
+    def test_breed_lookup_uses_no_network(self, api_client, monkeypatch):
+        """Breed validation is served from the in-memory snapshot only."""
+        def no_network(*args, **kwargs):
+            raise AssertionError("breed validation must not call the network")
+
+        monkeypatch.setattr('api.outbound.get', no_network)
+        registry.reset_stats()
+        url = reverse('cat-list')
+        api_client.post(url, {"name": "A", "years_of_experience": 1, "breed": "Bengal", "salary": "1.00"})
+        api_client.post(url, {"name": "B", "years_of_experience": 1, "breed": "Poodle", "salary": "1.00"})
+        assert registry.stats()['hits'] == 1
+        assert registry.stats()['misses'] == 1
+
+    def test_breed_registry_refresh_persists_snapshot(self):
+        """A refresh replaces both the stored table and the in-memory set."""
+        source = FakeBreedSource(names=["Sphynx", "Bengal"])
+        local = BreedRegistry(source=source, background_refresh=False)
+        local.refresh()
+
+        assert set(Breed.objects.values_list('name', flat=True)) == {"Sphynx", "Bengal"}
+        assert local.is_known("Sphynx") is True
+        assert local.is_known("Siberian") is False
+        assert local.stats()['refreshes'] == 1
+        assert local.stats()['last_refresh_seconds'] is not None
+
+    def test_breed_registry_serves_stale_snapshot(self, monkeypatch):
+        """Stale entries are still served while a refresh is scheduled."""
+        local = BreedRegistry(source=FakeBreedSource(fail=True), ttl=0)
+        scheduled = []
+        monkeypatch.setattr(local, '_schedule_refresh', lambda: scheduled.append(True))
+
+        assert local.is_known("Siberian") is True
+        assert scheduled
+
+    def test_breed_registry_failed_refresh_keeps_snapshot(self):
+        """A source outage keeps the previous snapshot and counts the failure."""
+        local = BreedRegistry(source=FakeBreedSource(fail=True), background_refresh=False)
+        with pytest.raises(ConnectionError):
+            local.refresh()
+        assert local.is_known("Persian") is True
+        assert local.stats()['refresh_failures'] == 1
+
+    def test_unseeded_registry_accepts_any_breed(self):
+        """Without a snapshot the lookup is inconclusive rather than rejecting recruits."""
+        Breed.objects.all().delete()
+        local = BreedRegistry(background_refresh=False)
+        assert local.is_known("Anything") is None
+
+    def test_refresh_breeds_command_from_file(self, tmp_path):
+        """The management command seeds the registry offline from a TheCatAPI payload."""
+        snapshot = tmp_path / "breeds.json"
+        snapshot.write_text('[{"name": "Abyssinian"}, {"name": "Siberian"}]')
+        call_command('refresh_breeds', file=str(snapshot))
+
+        assert set(Breed.objects.values_list('name', flat=True)) == {"Abyssinian", "Siberian"}
+        assert registry.is_known("Abyssinian") is True
+
+    # --- 5. QUERY BUDGETS ---
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_mission_list_query_count_is_constant(self, api_client):
+        """Listing missions must not issue a query per mission (N+1)."""
+        url = reverse('mission-list')
+        create_missions(2)
+        small = count_queries(api_client.get, url)
+        create_missions(20)
+        large = count_queries(api_client.get, url)
+        assert small == large
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_mission_retrieve_query_count_is_constant(self, api_client):
+        """Retrieving a mission loads its targets in a single query."""
+        create_missions(1, targets=1)
+        few = Mission.objects.last()
+        create_missions(1, targets=3)
+        many = Mission.objects.last()
+        assert count_queries(api_client.get, reverse('mission-detail', kwargs={'pk': few.pk})) == \
+            count_queries(api_client.get, reverse('mission-detail', kwargs={'pk': many.pk}))
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_cat_list_query_count_is_constant(self, api_client):
+        """Listing cats issues the same number of queries regardless of row count."""
+        url = reverse('cat-list')
+        create_missions(2)
+        small = count_queries(api_client.get, url)
+        create_missions(20)
+        assert count_queries(api_client.get, url) == small
+
+    def test_target_update_loads_mission_with_target(self, api_client, django_assert_num_queries):
+        """The frozen-notes check must not lazily load the mission."""
+        create_missions(1, targets=1)
+        target = Target.objects.get()
+        url = reverse('target-detail', kwargs={'pk': target.pk})
+        # SELECT target+mission, UPDATE target, UPDATE mission version.
+        with django_assert_num_queries(3):
+            response = api_client.patch(url, {"notes": "Intel"})
+        assert response.status_code == status.HTTP_200_OK
+
+    # --- 6. PAGINATION, FIELD SELECTION & EXPORT ---
+
+    def test_mission_list_is_cursor_paginated(self, api_client):
+        """List endpoints page by primary key and hand back an opaque next cursor."""
+        create_missions(5, targets=1)
+        response = api_client.get(reverse('mission-list'), {"page_size": 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 2
+
+        seen = [m["id"] for m in response.data["results"]]
+        while response.data["next"]:
+            response = api_client.get(response.data["next"])
+            seen += [m["id"] for m in response.data["results"]]
+        assert seen == sorted(Mission.objects.values_list('id', flat=True))
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_sparse_fields_skip_nested_targets(self, api_client):
+        """`?fields=` trims the representation and the targets query with it."""
+        create_missions(3)
+        url = reverse('mission-list')
+        full = count_queries(api_client.get, url)
+        response = api_client.get(url, {"fields": "id,cat"})
+
+        assert set(response.data["results"][0]) == {"id", "cat"}
+        assert count_queries(api_client.get, url, {"fields": "id,cat"}) == full - 1
+
+    def test_sparse_fields_on_cats(self, api_client):
+        """Cats support the same sparse fieldsets."""
+        create_missions(1)
+        response = api_client.get(reverse('cat-list'), {"fields": "name"})
+        assert response.data["results"] == [{"name": "Spy 0"}]
+
+    def test_mission_export_streams_ndjson(self, api_client):
+        """Full-table export streams one JSON document per line."""
+        create_missions(3, targets=2)
+        response = api_client.get(reverse('mission-export'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        assert [row["id"] for row in rows] == sorted(Mission.objects.values_list('id', flat=True))
+        assert all(len(row["targets"]) == 2 for row in rows)
+
+    # --- 7. MISSION COMPLETION TRACKING ---
+
+    def test_remaining_targets_counter_follows_target_changes(self):
+        """The denormalized counter tracks creates, completions and deletes."""
+        mission = Mission.objects.create()
+        t1 = Target.objects.create(mission=mission, name="T1", country="UK")
+        t2 = Target.objects.create(mission=mission, name="T2", country="UK")
+        mission.refresh_from_db()
+        assert mission.remaining_targets == 2
+
+        t1.is_completed = True
+        t1.save()
+        mission.refresh_from_db()
+        assert (mission.remaining_targets, mission.is_completed) == (1, False)
+
+        t2.delete()
+        mission.refresh_from_db()
+        assert (mission.remaining_targets, mission.is_completed) == (0, True)
+
+    def test_moving_a_target_recounts_both_missions(self):
+        """An open target moved to another mission (as the admin form allows) keeps both counters right."""
+        a, b = Mission.objects.create(), Mission.objects.create()
+        Target.objects.create(mission=a, name="T1", country="UK")
+        other = Target.objects.create(mission=b, name="T2", country="UK")
+
+        moved = Target.objects.get(name="T1")
+        moved.mission = b
+        moved.save()
+        other.is_completed = True
+        other.save()
+        a.refresh_from_db()
+        b.refresh_from_db()
+        assert (a.remaining_targets, b.remaining_targets) == (0, 1)
+        assert b.is_completed is False
+
+        moved.is_completed = True
+        moved.save()
+        b.refresh_from_db()
+        assert (b.remaining_targets, b.is_completed) == (0, True)
+
+    def test_concurrent_completion_of_same_target_counts_once(self):
+        """Two stale copies completing the same target only decrement the counter once."""
+        mission = Mission.objects.create()
+        Target.objects.create(mission=mission, name="T1", country="UK")
+        Target.objects.create(mission=mission, name="T2", country="UK")
+        first, second = Target.objects.get(name="T1"), Target.objects.get(name="T1")
+
+        first.is_completed = second.is_completed = True
+        first.save()
+        second.save()
+
+        mission.refresh_from_db()
+        assert (mission.remaining_targets, mission.is_completed) == (1, False)
+
+    def test_interleaved_completions_complete_mission(self, django_assert_num_queries):
+        """Completing the last two targets from stale reads still completes the mission once."""
+        mission = Mission.objects.create()
+        Target.objects.create(mission=mission, name="T1", country="UK")
+        Target.objects.create(mission=mission, name="T2", country="UK")
+        t1, t2 = Target.objects.filter(mission=mission)
+
+        t1.is_completed = t2.is_completed = True
+        t1.save()
+        # Conditional flip, target UPDATE and a single mission UPDATE.
+        with django_assert_num_queries(3):
+            t2.save()
+
+        mission.refresh_from_db()
+        assert (mission.remaining_targets, mission.is_completed) == (0, True)
+
+    def test_mission_update_checks_completion_once(self, api_client):
+        """Nested target updates apply one completion check per mission, not one per target."""
+        mission = Mission.objects.create()
+        targets = [Target.objects.create(mission=mission, name=f"T{i}", country="UK") for i in range(3)]
+        data = {"targets": [{"id": t.id, "name": t.name, "country": "UK", "is_completed": True} for t in targets]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.patch(reverse('mission-detail', kwargs={'pk': mission.pk}), data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["is_completed"] is True
+        mission_updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "api_mission"')]
+        assert len(mission_updates) == 1
+
+    def test_repair_mission_counters_command(self):
+        """The repair command fixes drifted counters and completes finished missions."""
+        mission = Mission.objects.create()
+        Target.objects.create(mission=mission, name="T1", country="UK")
+        Target.objects.filter(mission=mission).update(is_completed=True)
+        Mission.objects.filter(pk=mission.pk).update(remaining_targets=5)
+
+        call_command('repair_mission_counters')
+
+        mission.refresh_from_db()
+        assert (mission.remaining_targets, mission.is_completed) == (0, True)
+
+    # --- 8. BATCH TARGET UPDATES ---
+
+    def test_mission_update_noop_payload_issues_no_writes(self, api_client):
+        """Re-submitting unchanged targets does not write anything."""
+        create_missions(1)
+        mission = Mission.objects.get()
+        data = {"targets": [{"id": t.id, "name": t.name, "country": t.country} for t in mission.targets.all()]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.patch(reverse('mission-detail', kwargs={'pk': mission.pk}), data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not [q for q in ctx.captured_queries if q["sql"].startswith(("UPDATE", "INSERT", "DELETE"))]
+
+    def test_mission_update_applies_target_diff(self, api_client):
+        """Changed targets are updated, new ones created and missing ones removed."""
+        create_missions(1)
+        mission = Mission.objects.get()
+        t0, t1, _ = mission.targets.order_by('id')
+        data = {"targets": [
+            {"id": t0.id, "name": t0.name, "country": "PL"},
+            {"id": t1.id, "name": t1.name, "country": t1.country},
+            {"name": "New", "country": "UA"},
+        ]}
+
+        response = api_client.patch(reverse('mission-detail', kwargs={'pk': mission.pk}), data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(mission.targets.values_list('name', 'country')) == [("New", "UA"), ("T0", "PL"), ("T1", "UA")]
+        mission.refresh_from_db()
+        assert mission.remaining_targets == 3
+
+    def test_mission_update_rejects_foreign_target(self, api_client):
+        """Targets of another mission cannot be edited through this mission."""
+        create_missions(2, targets=1)
+        mission, other = Mission.objects.order_by('id')
+        foreign = other.targets.get()
+        data = {"targets": [{"id": foreign.id, "name": "Hijack", "country": "UA"}]}
+
+        response = api_client.patch(reverse('mission-detail', kwargs={'pk': mission.pk}), data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_update_targets(self, api_client):
+        """Many targets are updated with one read, one bulk write and one completion check."""
+        create_missions(2, targets=1)
+        t1, t2 = Target.objects.order_by('id')
+        data = [{"id": t1.id, "notes": "Intel"}, {"id": t2.id, "is_completed": True}]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.patch(reverse('target-bulk'), data, format='json')
+
+        # SELECT targets+missions, bulk UPDATE, mission completion UPDATE.
+        statements = [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]
+        assert len(statements) == 3
+
+        assert response.status_code == status.HTTP_200_OK
+        t1.refresh_from_db()
+        assert t1.notes == "Intel"
+        assert Mission.objects.get(pk=t2.mission_id).is_completed is True
+
+    def test_bulk_update_targets_enforces_frozen_notes(self, api_client):
+        """Requirement: notes of completed targets stay frozen in bulk updates too."""
+        create_missions(1, targets=2)
+        done, active = Target.objects.order_by('id')
+        done.is_completed = True
+        done.save()
+        data = [{"id": active.id, "notes": "Fine"}, {"id": done.id, "notes": "Rewrite"}]
+
+        response = api_client.patch(reverse('target-bulk'), data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert "frozen" in str(response.data[1]["notes"])
+        active.refresh_from_db()
+        assert active.notes == ""
+
+    # --- 9. RESPONSE CACHE ---
+
+    def test_cached_retrieve_skips_database(self, api_client, django_assert_num_queries):
+        """A repeated read is served from the cache without touching the database."""
+        create_missions(1)
+        url = reverse('mission-detail', kwargs={'pk': Mission.objects.get().pk})
+        first = api_client.get(url)
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+
+        assert second.data == first.data
+        assert caching.stats.as_dict()['hit_ratio'] == 0.5
+
+    def test_etag_revalidation_returns_304(self, api_client):
+        """Clients revalidating with If-None-Match get a 304 while nothing changed."""
+        create_missions(1)
+        url = reverse('cat-list')
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        Cat.objects.create(name="Recruit", years_of_experience=1, breed="Bengal", salary=10)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_target_completion_invalidates_mission(self, api_client):
+        """Completing the last target refreshes the cached mission, including its status."""
+        create_missions(1, targets=1)
+        mission = Mission.objects.get()
+        url = reverse('mission-detail', kwargs={'pk': mission.pk})
+        assert api_client.get(url).data["is_completed"] is False
+
+        api_client.patch(reverse('target-detail', kwargs={'pk': mission.targets.get().pk}), {"is_completed": True})
+        assert api_client.get(url).data["is_completed"] is True
+
+    def test_bulk_paths_invalidate_missions(self, api_client):
+        """Writes that bypass save() (bulk updates, assignment) still invalidate the cache."""
+        create_missions(1, targets=1)
+        mission = Mission.objects.get()
+        url = reverse('mission-detail', kwargs={'pk': mission.pk})
+        api_client.get(url)
+
+        target = mission.targets.get()
+        api_client.patch(reverse('target-bulk'), [{"id": target.id, "notes": "Intel"}], format='json')
+        assert api_client.get(url).data["targets"][0]["notes"] == "Intel"
+
+        Mission.objects.filter(pk=mission.pk).update(cat=None)
+        cat = Cat.objects.create(name="Fresh", years_of_experience=1, breed="Bengal", salary=10)
+        api_client.patch(reverse('mission-assign-cat', kwargs={'pk': mission.pk}), {"cat_id": cat.id})
+        assert api_client.get(url).data["cat"] == cat.id
+
+    def test_cat_delete_invalidates_its_mission(self, api_client):
+        """Deleting a cat clears it from the cached mission it was assigned to."""
+        create_missions(1)
+        mission = Mission.objects.get()
+        url = reverse('mission-detail', kwargs={'pk': mission.pk})
+        assert api_client.get(url).data["cat"] is not None
+
+        mission.cat.delete()
+        assert api_client.get(url).data["cat"] is None
+
+    def test_deploy_check_warns_about_a_per_process_response_cache(self, settings):
+        from .checks import response_cache_is_shared
+
+        assert [warning.id for warning in response_cache_is_shared(None)] == ['api.W001']
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                       'LOCATION': 'redis://localhost:6379/0'}}
+        assert response_cache_is_shared(None) == []
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        settings.API_CACHE = {'ENABLED': False}
+        assert response_cache_is_shared(None) == []
+
+    # --- 10. ADMIN TEST RUNNER ---
+
+    def test_run_tests_view_queues_run(self, admin_client, monkeypatch):
+        """Starting a run returns immediately with a run id instead of executing pytest in the request."""
+        started = []
+        monkeypatch.setattr(testrunner, '_execute_in_background', started.append)
+
+        response = admin_client.post(reverse('run-pytest'), {"workers": 1})
+
+        run = TestRun.objects.get()
+        assert response.status_code == 302
+        assert response.url == reverse('test-run-detail', kwargs={'run_id': run.id})
+        assert run.status == TestRun.QUEUED
+        assert admin_client.get(reverse('run-pytest')).status_code == status.HTTP_200_OK
+
+    def test_shards_get_their_own_test_database(self):
+        import subprocess
+
+        run = TestRun.objects.create(workers=2)
+        suffixes = {testrunner.shard_env(run, shard)['SCA_TEST_DB_SUFFIX'] for shard in range(2)}
+        assert len(suffixes) == 2
+        env = {**testrunner.shard_env(run, 1), 'SCA_DB_ENGINE': 'postgresql', 'SCA_DB_NAME': 'sca'}
+        names = subprocess.run(
+            [sys.executable, '-c', "from SCA import settings; print(settings.DATABASES['default']['TEST']['NAME'])"],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        assert names == [f'test_sca_run{run.pk}_1']
+
+    def test_test_run_records_results_and_status(self, admin_client, monkeypatch):
+        """Per-test results and durations reported by the subprocess are stored and served."""
+        lines = [
+            {"nodeid": "api/tests.py::test_a", "outcome": "passed", "duration": 0.25},
+            {"nodeid": "api/tests.py::test_b", "outcome": "failed", "duration": 1.5},
+        ]
+        script = "; ".join(
+            ["import sys"] + [f"print('..' + {testrunner.RESULT_PREFIX!r} + {json.dumps(line)!r})" for line in lines]
+            + ["sys.exit(1)"]
+        )
+        monkeypatch.setattr(testrunner, 'pytest_command', lambda shard, shards: [sys.executable, '-c', script])
+
+        run = testrunner.execute(TestRun.objects.create())
+
+        assert (run.status, run.passed, run.failed) == (TestRun.FAILED, 1, 1)
+        data = admin_client.get(reverse('test-run-status', kwargs={'run_id': run.id})).json()
+        assert data["finished"] is True
+        assert [r["duration"] for r in data["results"]] == [0.25, 1.5]
+        after = data["results"][0]["id"]
+        data = admin_client.get(reverse('test-run-status', kwargs={'run_id': run.id}), {"after": after}).json()
+        assert [r["nodeid"] for r in data["results"]] == ["api/tests.py::test_b"]
+
+    def test_test_run_shards_suite(self):
+        """Each worker runs its own shard of the suite."""
+        assert testrunner.pytest_command(1, 4)[-1] == "--sca-shard=1/4"
+
+    # --- 11. ASYNC API ---
+
+    def test_async_cat_create_and_list(self, async_client):
+        """The async path validates breeds and pages cats by primary key."""
+        url = reverse('async-cat-list')
+        post = async_to_sync(async_client.post)
+        ok = post(url, {"name": "A", "years_of_experience": 1, "breed": "Bengal", "salary": "1.00"},
+                  content_type='application/json')
+        bad = post(url, {"name": "B", "years_of_experience": 1, "breed": "Poodle", "salary": "1.00"},
+                   content_type='application/json')
+        assert ok.status_code == status.HTTP_201_CREATED
+        assert bad.status_code == status.HTTP_400_BAD_REQUEST
+
+        create_missions(3)
+        page = async_to_sync(async_client.get)(url, {"page_size": 2}).json()
+        assert len(page["results"]) == 2
+        rest = async_to_sync(async_client.get)(url, {"after": page["next"]}).json()
+        assert rest["next"] is None
+        assert len(page["results"]) + len(rest["results"]) == Cat.objects.count()
+
+    def test_async_page_size_below_one_is_rejected(self, async_client):
+        get = async_to_sync(async_client.get)
+        for size in (0, -1):
+            assert get(reverse('async-cat-list'), {"page_size": size}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_async_mission_create_and_retrieve(self, async_client):
+        """Missions are created with nested targets and read back with the same shape as the sync API."""
+        data = {"targets": [{"name": "T1", "country": "UK"}, {"name": "T2", "country": "FR"}]}
+        created = async_to_sync(async_client.post)(reverse('async-mission-list'), data,
+                                                   content_type='application/json')
+        assert created.status_code == status.HTTP_201_CREATED
+
+        url = reverse('async-mission-detail', kwargs={'pk': created.json()["id"]})
+        mission = async_to_sync(async_client.get)(url).json()
+        assert [t["name"] for t in mission["targets"]] == ["T1", "T2"]
+        assert async_to_sync(async_client.get)(reverse('async-mission-detail', kwargs={'pk': 999})).status_code == 404
+
+    def test_async_target_update_respects_frozen_notes(self, async_client):
+        """Completing a target through the async path completes the mission and freezes notes."""
+        create_missions(1, targets=1)
+        target = Target.objects.get()
+        url = reverse('async-target-detail', kwargs={'pk': target.pk})
+        patch = async_to_sync(async_client.patch)
+
+        assert patch(url, {"is_completed": True}, content_type='application/json').status_code == 200
+        assert Mission.objects.get().is_completed is True
+        assert patch(url, {"notes": "Late intel"}, content_type='application/json').status_code == 400
+
+    # --- 12. INDEXES & CONSTRAINTS ---
+
+    def test_negative_salary_is_rejected(self, api_client):
+        """Salary must not be negative, in the API and in the database."""
+        from django.db import IntegrityError, transaction
+
+        data = {"name": "Cheap", "years_of_experience": 1, "breed": "Bengal", "salary": "-1.00"}
+        assert api_client.post(reverse('cat-list'), data).status_code == status.HTTP_400_BAD_REQUEST
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Cat.objects.create(name="Cheap", years_of_experience=1, breed="Bengal", salary=-1)
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason="Plan text is SQLite specific.")
+    def test_incomplete_targets_use_partial_index(self):
+        """Looking up a mission's incomplete targets is served by the partial index."""
+        mission = Mission.objects.create()
+        plan = Target.objects.filter(mission=mission, is_completed=False).explain()
+        assert "target_incomplete_idx" in plan
+
+    # --- 13. DATABASE ROUTING ---
+
+    def test_replica_router_only_serves_flagged_reads(self, monkeypatch):
+        """Reads go to a replica only inside use_replicas(); writes always go to the primary."""
+        from . import db
+
+        router = db.ReplicaRouter()
+        monkeypatch.setattr(db, 'replica_aliases', lambda: ['replica_0'])
+        assert router.db_for_read(Cat) is None
+        with db.use_replicas():
+            assert router.db_for_read(Cat) == 'replica_0'
+            assert router.db_for_write(Cat) == 'default'
+        assert router.allow_migrate('replica_0', 'api') is False
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_list_and_retrieve_read_from_replicas(self, api_client, monkeypatch):
+        """List/retrieve requests are flagged for replica reads; writes are not."""
+        from . import db
+
+        flagged = []
+        original = db.ReplicaRouter.db_for_read
+        monkeypatch.setattr(db.ReplicaRouter, 'db_for_read', lambda self, model, **hints: (
+            flagged.append(db._reading_from_replica.get()), original(self, model, **hints))[1])
+
+        api_client.get(reverse('cat-list'))
+        assert flagged and all(flagged)
+
+        flagged.clear()
+        api_client.post(reverse('cat-list'), {"name": "A", "years_of_experience": 1, "breed": "Bengal", "salary": "1"})
+        assert not any(flagged)
+
+    def test_cached_responses_are_rendered_from_the_primary(self, api_client, monkeypatch):
+        """A cache miss reads the primary, so a lagging replica is never cached under a fresh version."""
+        from . import db
+
+        flagged = []
+        original = db.ReplicaRouter.db_for_read
+        monkeypatch.setattr(db.ReplicaRouter, 'db_for_read', lambda self, model, **hints: (
+            flagged.append(db._reading_from_replica.get()), original(self, model, **hints))[1])
+
+        create_missions(1)
+        api_client.get(reverse('mission-list'))
+        assert flagged and not any(flagged)
+
+    # --- 14. AGENCY STATS ---
+
+    def test_stats_aggregates(self, api_client):
+        create_missions(2)
+        Cat.objects.create(name="Tom", years_of_experience=1, breed="Bengal", salary=500)
+        target = Target.objects.filter(mission__cat__name="Spy 0").first()
+        target.is_completed = True
+        target.save()
+        Target.objects.create(mission=Mission.objects.create(), name="X", country="PL", is_completed=True)
+
+        data = api_client.get(reverse('stats-list')).json()
+        assert data == api_client.get(reverse('stats-list')).json()  # Fresh and stored snapshots match.
+        assert data['missions_by_status'] == {"total": 3, "active": 2, "completed": 1, "unassigned": 0}
+        countries = {row['country']: row for row in data['completion_by_country']}
+        assert countries['PL']['completion_rate'] == 1.0 and countries['PL']['rank'] == 1
+        assert countries['UA']['completed'] == 1 and countries['UA']['targets'] == 6
+        breeds = {row['breed']: row for row in data['salary_by_breed']}
+        assert breeds['Siberian']['cats'] == 2 and breeds['Siberian']['total_salary'] == "2000.00"
+        assert breeds['Bengal']['average_salary'] == "500.00"
+        assert data['targets_per_mission'] == {"average": 7 / 3, "max": 3}
+
+    def test_stats_are_served_from_snapshots(self, api_client, admin_user, settings):
+        """Fresh snapshots are served with one query however much data there is."""
+        settings.STATS = {'MAX_AGE': 3600}
+        create_missions(3)
+        api_client.get(reverse('stats-list'))
+        create_missions(1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = api_client.get(reverse('stats-list')).json()
+        assert len(ctx.captured_queries) == 1
+        assert data['missions_by_status']['total'] == 3
+
+        response = api_client.get(reverse('stats-list'), {"refresh": 1})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        api_client.force_authenticate(admin_user)
+        assert api_client.get(reverse('stats-list'), {"refresh": 1}).json()['missions_by_status']['total'] == 4
+
+    def test_expired_stats_are_served_stale_and_refreshed_once(self, api_client, settings, monkeypatch):
+        from . import stats
+
+        scheduled = []
+        monkeypatch.setattr(stats, 'schedule_refresh', scheduled.append)
+        settings.STATS = {'MAX_AGE': 60}
+        url = reverse('stats-list')
+        api_client.get(url)
+        create_missions(1)
+        StatsSnapshot.objects.update(computed_at=timezone.now() - timezone.timedelta(minutes=5))
+
+        assert api_client.get(url).json()['missions_by_status']['total'] == 0
+        assert api_client.get(url).json()['missions_by_status']['total'] == 0
+        assert scheduled == [list(stats.STATS)]
+
+        stats.refresh(scheduled[0])
+        assert api_client.get(url).json()['missions_by_status']['total'] == 1
+
+    def test_admin_mission_changelist_counts_targets_in_one_query(self, admin_client):
+        create_missions(2)
+        few = count_queries(admin_client.get, '/admin/api/mission/')
+        create_missions(5)
+        response = admin_client.get('/admin/api/mission/')
+        assert count_queries(admin_client.get, '/admin/api/mission/') == few
+        assert b'<td class="field-target_count">3</td>' in response.content
+
+    # --- 15. REQUEST METRICS ---
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_metrics_record_requests_and_sql(self, api_client):
+        metrics.registry.reset()
+        create_missions(2)
+        response = api_client.get(reverse('mission-list'))
+        assert 'db;dur=' in response['Server-Timing']
+        assert 'desc="2 queries"' in response['Server-Timing']
+
+        body = api_client.get(reverse('metrics')).content.decode()
+        assert 'sca_request_duration_seconds_count{view="mission-list",method="GET"} 1' in body
+        assert 'sca_request_duration_seconds_bucket{view="mission-list",method="GET",le="+Inf"} 1' in body
+        assert 'sca_sql_queries_total{view="mission-list",method="GET"} 2' in body
+        serializer_line = next(line for line in body.splitlines()
+                               if line.startswith('sca_serializer_duration_seconds_total{view="mission-list"'))
+        assert float(serializer_line.split()[-1]) > 0
+
+    def test_metrics_expose_breed_registry_and_response_cache_counters(self, api_client):
+        registry.reset_stats()
+        registry.is_known("Bengal")
+        registry.is_known("Unicorn")
+        caching.stats.record('hits')
+
+        body = api_client.get(reverse('metrics')).content.decode()
+        assert 'sca_breed_registry_lookups_total{result="hit"} 1' in body
+        assert 'sca_breed_registry_lookups_total{result="miss"} 1' in body
+        assert 'sca_breed_registry_refreshes_total{result="failure"} 0' in body
+        assert f'sca_breed_registry_breeds {len(FakeBreedSource().names)}' in body
+        assert 'sca_response_cache_lookups_total{result="hit"} 1' in body
+        assert 'sca_response_cache_not_modified_total 0' in body
+
+    def test_metrics_time_outbound_http_once(self, monkeypatch):
+        """Breed fetches count as HTTP time; nested timed() blocks are not double counted."""
+        from . import breeds
+
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return [{"name": "Siberian"}]
+
+        def slow_get(url, timeout):
+            with metrics.timed('http'):
+                time.sleep(0.01)
+            return FakeResponse()
+
+        monkeypatch.setattr('api.outbound.get', slow_get)
+        assert breeds.TheCatAPIBreedSource(url="http://stub").fetch() == ["Siberian"]  # No request: no-op.
+
+        timings = metrics.RequestTimings()
+        token = metrics._current.set(timings)
+        try:
+            breeds.TheCatAPIBreedSource(url="http://stub").fetch()
+        finally:
+            metrics._current.reset(token)
+        assert 0.01 <= timings.http < 0.1
+
+    # --- 16. BULK IMPORT & EXPORT ---
+
+    def test_import_cats_csv_reports_bad_rows(self, api_client):
+        body = (
+            "name,years_of_experience,breed,salary\n"
+            "Tom,3,Bengal,1000\n"
+            "Bad,2,Unicorn,1000\n"
+            "Jerry,1,Persian,-5\n"
+            "Kit,4,Siberian,900.50\n"
+        )
+        response = api_client.generic('POST', reverse('cat-import'), body, content_type='text/csv')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 2 and response.data['failed'] == 2
+        assert [error['line'] for error in response.data['errors']] == [3, 4]
+        assert 'breed' in response.data['errors'][0]['errors']
+        assert set(Cat.objects.values_list('name', flat=True)) == {"Tom", "Kit"}
+
+    def test_import_missions_in_batches(self, tmp_path):
+        cat = Cat.objects.create(name="Agent", years_of_experience=5, breed="Bengal", salary=1)
+        rows = [
+            {"cat": cat.id, "targets": [{"name": "A", "country": "UA"}, {"name": "B", "country": "PL"}]},
+            {"cat": cat.id, "targets": [{"name": "C", "country": "UA"}]},  # Cat listed twice.
+            {"targets": []},
+            {"targets": [{"name": "D", "country": "UA", "is_completed": True}]},
+        ]
+        path = tmp_path / "missions.ndjson"
+        path.write_text("\n".join(json.dumps(row) for row in rows) + "\nnot json\n")
+
+        report = tmp_path / "report.json"
+        call_command('import_data', 'missions', str(path), '--batch-size', 2, '--report', str(report))
+        errors = json.loads(report.read_text())['errors']
+        assert [error['line'] for error in errors] == [2, 3, 5]
+        assert Mission.objects.count() == 2
+        assert Mission.objects.get(targets__name="D").is_completed
+        assert Mission.objects.get(cat=cat).remaining_targets == 2
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_mission_csv_export_roundtrips_through_import(self, api_client):
+        create_missions(2, targets=2)
+        response = api_client.get(reverse('mission-export'), {"as": "csv"})
+        assert response['Content-Type'] == 'text/csv'
+        exported = b''.join(response.streaming_content).decode()
+        assert exported.splitlines()[0].startswith("id,cat,is_completed,target_1_name")
+
+        Mission.objects.all().delete()  # The cats stay and get their missions back.
+        response = api_client.generic('POST', reverse('mission-import'), exported, content_type='text/csv')
+        assert response.status_code == status.HTTP_201_CREATED, response.data
+        assert Target.objects.count() == 4 and Mission.objects.filter(cat__isnull=False).count() == 2
+
+    def test_mission_csv_export_with_sparse_fields(self, api_client):
+        """Columns left out by ?fields= stay empty instead of breaking the stream."""
+        import csv
+
+        create_missions(1, targets=1)
+        mission = Mission.objects.get()
+        for fields, expected in (("id,cat", {'id': str(mission.pk), 'cat': str(mission.cat_id), 'target_1_name': ''}),
+                                 ("id,targets", {'id': str(mission.pk), 'cat': '', 'target_1_name': 'T0'})):
+            response = api_client.get(reverse('mission-export'), {"as": "csv", "fields": fields})
+            rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+            assert len(rows) == 1
+            assert {column: rows[0][column] for column in expected} == expected
+
+    # --- 17. IDEMPOTENCY & CONDITIONAL WRITES ---
+
+    def test_idempotent_create_replays_stored_response(self, api_client):
+        data = {"targets": [{"name": "T1", "country": "UA"}]}
+        headers = {"HTTP_IDEMPOTENCY_KEY": "retry-1"}
+        first = api_client.post(reverse('mission-list'), data, format='json', **headers)
+        assert first.status_code == status.HTTP_201_CREATED
+
+        with CaptureQueriesContext(connection) as ctx:
+            retry = api_client.post(reverse('mission-list'), data, format='json', **headers)
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert retry.json() == first.json()
+        assert not [q for q in ctx.captured_queries if 'INSERT INTO "api_mission"' in q["sql"]]
+        assert Mission.objects.count() == 1
+
+        other = api_client.post(reverse('mission-list'), {"targets": [{"name": "T2", "country": "UA"}]},
+                                format='json', **headers)
+        assert other.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_parallel_retry_conflicts_until_first_request_finishes(self, api_client, monkeypatch):
+        """A retry that arrives while the original is still running neither waits nor runs twice."""
+        from .serializers import MissionSerializer
+
+        data = {"targets": [{"name": "T1", "country": "UA"}]}
+        headers = {"HTTP_IDEMPOTENCY_KEY": "retry-2"}
+        create = MissionSerializer.create
+        retries = []
+
+        def create_with_retry(serializer, validated_data):
+            retries.append(api_client.post(reverse('mission-list'), data, format='json', **headers))
+            return create(serializer, validated_data)
+
+        monkeypatch.setattr(MissionSerializer, 'create', create_with_retry)
+        first = api_client.post(reverse('mission-list'), data, format='json', **headers)
+        monkeypatch.undo()
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert [r.status_code for r in retries] == [status.HTTP_409_CONFLICT]
+        assert api_client.post(reverse('mission-list'), data, format='json', **headers).json() == first.json()
+        assert Mission.objects.count() == 1
+
+    def test_failed_request_releases_idempotency_key(self, api_client):
+        headers = {"HTTP_IDEMPOTENCY_KEY": "retry-3"}
+        invalid = api_client.post(reverse('mission-bulk'), [{"targets": []}], format='json', **headers)
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+        response = api_client.post(reverse('mission-bulk'), [{"targets": [{"name": "T1", "country": "UA"}]}],
+                                   format='json', **headers)
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_abandoned_idempotency_key_is_reclaimed(self, api_client):
+        """A key whose worker died before answering blocks retries only for the lease."""
+        from types import SimpleNamespace
+        from . import idempotency
+        from .models import IdempotencyKey
+
+        data = {"targets": [{"name": "T1", "country": "UA"}]}
+        record = IdempotencyKey.objects.create(key="crashed", scope="POST /api/missions/",
+                                               fingerprint=idempotency.fingerprint(SimpleNamespace(data=data)))
+        headers = {"HTTP_IDEMPOTENCY_KEY": "crashed"}
+        assert api_client.post(reverse('mission-list'), data, format='json', **headers).status_code == 409
+
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timezone.timedelta(minutes=6))
+        response = api_client.post(reverse('mission-list'), data, format='json', **headers)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert 'Idempotent-Replayed' not in response
+        replayed = api_client.post(reverse('mission-list'), data, format='json', **headers)
+        assert (replayed.data, replayed['Idempotent-Replayed']) == (response.data, 'true')
+        assert Mission.objects.count() == 1
+
+    def test_purge_idempotency_keys_command(self, settings):
+        from .models import IdempotencyKey
+
+        IdempotencyKey.objects.create(key="old", scope="POST /api/missions/", fingerprint="x")
+        settings.IDEMPOTENCY = {'TTL': 0}
+        call_command('purge_idempotency_keys')
+        assert not IdempotencyKey.objects.exists()
+
+    def test_if_match_rejects_stale_versions(self, api_client):
+        create_missions(1, targets=1)
+        mission = Mission.objects.get()
+        target = mission.targets.get()
+        cat = Cat.objects.create(name="Other", years_of_experience=1, breed="Bengal", salary=1)
+        url = reverse('mission-detail', kwargs={'pk': mission.pk})
+        version = api_client.get(url).data['version']
+
+        response = api_client.patch(url, {"cat": cat.pk}, format='json', HTTP_IF_MATCH=f'"{version}"')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['version'] == version + 1 and api_client.get(url).data['version'] == version + 1
+        stale = api_client.patch(url, {"cat": None}, format='json', HTTP_IF_MATCH=f'"{version}"')
+        assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert Mission.objects.get().cat_id == cat.pk
+
+        target_url = reverse('target-detail', kwargs={'pk': target.pk})
+        assert api_client.patch(target_url, {"notes": "A"}, HTTP_IF_MATCH='W/"1"').data['version'] == 2
+        stale = api_client.patch(target_url, {"notes": "B"}, HTTP_IF_MATCH='"1"')
+        assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert api_client.patch(target_url, {"notes": "B"}, HTTP_IF_MATCH='nope').status_code == 400
+
+    def test_every_write_path_bumps_versions(self, api_client):
+        create_missions(2, targets=1)
+        Mission.objects.update(cat=None)
+        first, second = Mission.objects.order_by('id')
+        cat, other = Cat.objects.order_by('id')
+
+        api_client.patch(reverse('mission-assign-cat', kwargs={'pk': first.pk}), {"cat_id": cat.pk})
+        api_client.post(reverse('mission-assign'), [{"mission": second.pk, "cat": other.pk}], format='json')
+        assert list(Mission.objects.order_by('id').values_list('version', flat=True)) == [
+            first.version + 1, second.version + 1]
+
+        target = second.targets.get()
+        response = api_client.patch(reverse('target-bulk'), [{"id": target.pk, "notes": "Intel"}], format='json')
+        assert response.data[0]['version'] == 2
+        target.refresh_from_db()
+        assert target.version == 2
+        assert Mission.objects.get(pk=second.pk).version == second.version + 2
+
+    def test_target_changes_bump_the_mission_version(self, api_client):
+        """Targets are nested in the mission, so a stale If-Match on it fails after any target write."""
+        create_missions(1, targets=2)
+        mission = Mission.objects.get()
+        first, second = mission.targets.order_by('id')
+        url = reverse('mission-detail', kwargs={'pk': mission.pk})
+        etag = api_client.get(url)['ETag']
+        assert etag == f'"{mission.version}"'
+
+        targets = [{"id": first.pk, "name": "Renamed", "country": "UA"},
+                   {"id": second.pk, "name": "T1", "country": "UA"}]
+        response = api_client.patch(url, {"targets": targets}, format='json')
+        assert response.data['version'] == mission.version + 1
+        stale = api_client.patch(url, {"cat": None}, format='json', HTTP_IF_MATCH=etag)
+        assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+        etag = api_client.get(url)['ETag']
+        api_client.patch(reverse('target-detail', kwargs={'pk': second.pk}), {"notes": "Intel"})
+        assert api_client.patch(url, {"cat": None}, format='json', HTTP_IF_MATCH=etag).status_code == 412
+        etag = api_client.get(url)['ETag']
+        assert api_client.patch(url, {"cat": None}, format='json', HTTP_IF_MATCH=etag).status_code == 200
+
+    # --- 18. FAST SERIALIZATION ---
+
+    def test_fast_list_serializers_match_field_serializers(self, rf):
+        """Golden output: the list fast path renders exactly what the field machinery does."""
+        from rest_framework.request import Request
+        from .serializers import CatSerializer, MissionSerializer
+
+        spy = Cat.objects.create(name="M\u00fcrzik \u2028", years_of_experience=0, breed="Bengal", salary="12.5")
+        Cat.objects.create(name="Tom", years_of_experience=7, breed="Persian", salary=1000)
+        Mission.objects.create(cat=spy)
+        create_missions(2)
+        Target.objects.filter(name="T1").update(is_completed=True, notes="Done")
+        Mission.objects.filter(cat=spy).update(is_completed=True)
+
+        cats = list(Cat.objects.order_by('id'))
+        missions = list(Mission.objects.prefetch_related('targets').order_by('id'))
+        for query in ({}, {"fields": "id,salary"}, {"fields": "cat,targets"}):
+            context = {"request": Request(rf.get('/', query))}
+            for serializer_class, objects in ((CatSerializer, cats), (MissionSerializer, missions)):
+                fast = serializer_class(objects, many=True, context=context).data
+                slow = [serializer_class(obj, context=context).data for obj in objects]
+                assert json.dumps(fast) == json.dumps(slow)
+
+    def test_fast_json_renderer_and_parser_match_drf(self):
+        import datetime
+        import decimal
+        import io
+        from rest_framework.exceptions import ParseError
+        from rest_framework.parsers import JSONParser
+        from rest_framework.renderers import JSONRenderer
+        from .fastjson import FastJSONParser, FastJSONRenderer
+
+        payload = {
+            "results": [{"id": 1, "name": "M\u00fcrzik \u2028\u2029", "salary": decimal.Decimal("12.50"), "cat": None}],
+            "at": datetime.datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2026, 1, 2),
+            "ok": True, "rate": 0.5, 1: "int key",
+        }
+        rendered = FastJSONRenderer().render(payload)
+        assert rendered == JSONRenderer().render(payload)
+        indented = 'application/json; indent=2'
+        assert FastJSONRenderer().render(payload, indented) == JSONRenderer().render(payload, indented)
+
+        assert FastJSONParser().parse(io.BytesIO(rendered)) == JSONParser().parse(io.BytesIO(rendered))
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+
+    # --- 19. BACKGROUND JOBS ---
+
+    def test_breed_of_cat_recruited_during_outage_is_verified_later(self, api_client, settings, monkeypatch):
+        """Recruiting never waits on TheCatAPI; the breed check is retried until the source is back."""
+        from . import jobs
+
+        settings.BREED_REGISTRY = {'BACKGROUND_REFRESH': False}
+        source = FakeBreedSource(fail=True)
+        monkeypatch.setattr(registry, '_source', source)
+        Breed.objects.all().delete()
+        registry.clear()
+
+        url = reverse('cat-list')
+        for name, breed in (("Tom", "Bengal"), ("Rex", "Poodle")):
+            response = api_client.post(url, {"name": name, "years_of_experience": 1, "breed": breed, "salary": "1.00"})
+            assert response.data['breed_status'] == Cat.PENDING
+        assert Job.objects.filter(task='verify_breed', status=Job.QUEUED).count() == 2
+
+        worker = jobs.Worker(threads=1)
+        assert worker.run_once() == 2 and worker.failed == 2
+        job = Job.objects.first()
+        assert (job.status, job.attempts, "breed source unavailable" in job.last_error) == (Job.QUEUED, 1, True)
+        assert worker.run_once() == 0  # Backing off.
+
+        source.fail = False
+        Job.objects.update(run_at=timezone.now())
+        worker.run_once()
+        assert dict(Cat.objects.values_list('name', 'breed_status')) == {"Tom": Cat.VERIFIED, "Rex": Cat.INVALID}
+        assert api_client.get(reverse('cat-detail', kwargs={'pk': Cat.objects.get(name="Rex").pk})).data[
+            'breed_status'] == Cat.INVALID
+
+    def test_failing_job_backs_off_exponentially_then_fails(self, settings, monkeypatch):
+        from . import jobs
+
+        settings.JOBS = {'BACKOFF': 10, 'MAX_BACKOFF': 25}
+        monkeypatch.setitem(jobs.TASKS, 'explode', lambda: 1 / 0)
+        jobs.enqueue('explode', max_attempts=3)
+        delays = []
+        for _ in range(3):
+            Job.objects.filter(status=Job.QUEUED).update(run_at=timezone.now())
+            before = timezone.now()
+            jobs.Worker(threads=1).run_once()
+            job = Job.objects.get()
+            delays.append(round((job.run_at - before).total_seconds()) if job.status == Job.QUEUED else None)
+        assert delays == [10, 20, None]
+        assert (job.status, job.attempts) == (Job.FAILED, 3) and "ZeroDivisionError" in job.last_error
+
+    def test_job_keys_deduplicate_pending_work(self, monkeypatch):
+        from . import jobs
+
+        monkeypatch.setitem(jobs.TASKS, 'noop', lambda *args: None)
+        jobs.enqueue('noop', 1, key='same')
+        jobs.enqueue('noop', 2, key='same')
+        assert Job.objects.count() == 1
+        jobs.Worker(threads=1).run_once()
+        jobs.enqueue('noop', 3, key='same')
+        assert list(Job.objects.order_by('id').values_list('status', flat=True)) == [Job.DONE, Job.QUEUED]
+        with pytest.raises(LookupError):
+            jobs.enqueue('missing')
+
+    def test_mission_completion_is_notified_once(self, api_client, settings, monkeypatch):
+        from . import jobs
+
+        settings.JOBS = {'NOTIFY_URL': 'http://hooks.test/missions'}
+        posted = []
+
+        class Ok:
+            def raise_for_status(self):
+                pass
+
+        monkeypatch.setattr('api.outbound.post', lambda url, json, timeout: posted.append(json) or Ok())
+        create_missions(1, targets=2)
+        first, second = Target.objects.order_by('id')
+        api_client.patch(reverse('target-detail', kwargs={'pk': first.pk}), {"is_completed": True})
+        assert not Job.objects.exists()  # The mission is not complete yet.
+        api_client.patch(reverse('target-bulk'), [{"id": second.pk, "is_completed": True}], format='json')
+        jobs.Worker(threads=1).run_once()
+
+        api_client.patch(reverse('target-detail', kwargs={'pk': second.pk}), {"is_completed": False})
+        api_client.patch(reverse('target-detail', kwargs={'pk': second.pk}), {"is_completed": True})
+        jobs.Worker(threads=1).run_once()
+        assert [event['mission'] for event in posted] == [first.mission_id]
+
+    def test_expired_stats_refresh_in_background(self, api_client, settings):
+        from . import jobs
+
+        settings.STATS = {'MAX_AGE': 0, 'BACKGROUND_REFRESH': True}
+        url = reverse('stats-list')
+        assert api_client.get(url).data['missions_by_status']['total'] == 0  # Missing: computed now.
+        create_missions(1)
+        assert api_client.get(url).data['missions_by_status']['total'] == 0  # Expired: served stale.
+        api_client.get(url)
+        assert Job.objects.filter(task='refresh_stats').count() == 1
+
+        jobs.Worker(threads=1).run_once()
+        settings.STATS = {'MAX_AGE': 60}
+        assert api_client.get(url).data['missions_by_status']['total'] == 1
+
+    # --- 20. FILTERS & FULL-TEXT SEARCH ---
+
+    def test_mission_list_filters(self, api_client, no_response_cache):
+        create_missions(2)
+        idle = Mission.objects.create()
+        Target.objects.create(mission=idle, name="Embassy", country="FR", notes="Courier drops at dawn")
+        assigned = Mission.objects.exclude(pk=idle.pk).order_by('id').first()
+        assigned.is_completed = True
+        assigned.save()
+
+        def ids(**params):
+            response = api_client.get(reverse('mission-list'), params)
+            assert response.status_code == status.HTTP_200_OK, response.data
+            return [item['id'] for item in response.data['results']]
+
+        assert ids(is_completed='true') == [assigned.pk]
+        assert ids(cat='none') == [idle.pk]
+        assert ids(cat=assigned.cat_id) == [assigned.pk]
+        assert ids(country='FR,DE') == [idle.pk]
+        assert ids(q='courier', is_completed='false') == [idle.pk]
+        assert ids(q='cour') == [idle.pk]  # The last word also matches as a prefix.
+        assert ids(q='courier night') == []
+        for params in ({'is_completed': 'maybe'}, {'cat': 'x'}, {'country': ','}, {'q': '!!'}):
+            assert api_client.get(reverse('mission-list'), params).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_target_list_filters(self, api_client):
+        create_missions(2, targets=2)
+        mission = Mission.objects.order_by('id').first()
+        Target.objects.filter(mission=mission, name="T0").update(country="PL", notes="Safe house near the river")
+        response = api_client.get(reverse('target-list'), {'mission': mission.pk, 'country': 'PL', 'q': 'river'})
+        assert [item['name'] for item in response.data['results']] == ["T0"]
+        assert len(api_client.get(reverse('target-list'), {'country': 'UA'}).data['results']) == 3
+
+    @pytest.mark.usefixtures('search_index')
+    def test_search_ranks_name_matches_first_and_follows_writes(self, api_client):
+        mission = Mission.objects.create()
+        notes = Target.objects.create(mission=mission, name="Harbor", country="UA", notes="Meet the falcon here")
+        named = Target.objects.create(mission=mission, name="Falcon", country="UA", notes="Seen at the harbor")
+        Target.objects.create(mission=mission, name="Depot", country="UA", notes="Nothing to report")
+
+        url = reverse('target-search')
+        results = api_client.get(url, {'q': 'falcon'}).data['results']
+        assert [item['id'] for item in results] == [named.pk, notes.pk]
+        assert results[0]['rank'] > results[1]['rank']
+
+        # Queryset updates, bulk updates and deletes send no signals; the index follows anyway.
+        Target.objects.filter(pk=named.pk).update(name="Raven")
+        notes.notes = "Meet the owl here"
+        Target.objects.bulk_update([notes], ['notes'])
+        Target.objects.create(mission=mission, name="Falconry", country="UA")
+        assert [item['name'] for item in api_client.get(url, {'q': 'falcon'}).data['results']] == ["Falconry"]
+        assert [item['name'] for item in api_client.get(url, {'q': 'owl'}).data['results']] == ["Harbor"]
+        mission.delete()
+        assert api_client.get(url, {'q': 'owl'}).data['results'] == []
+
+    def test_search_filters_candidates_before_the_limit(self, api_client):
+        create_missions(3, targets=1)
+        Target.objects.update(notes="Dead drop behind the station")
+        last = Mission.objects.order_by('id').last()
+        response = api_client.get(reverse('target-search'), {'q': 'station', 'limit': 1, 'mission': last.pk})
+        assert [item['mission'] for item in response.data['results']] == [last.pk]
+        for params in ({'q': ''}, {'q': 'station', 'limit': 0}, {'q': 'station', 'limit': 101}):
+            assert api_client.get(reverse('target-search'), params).status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.usefixtures('search_index')
+    def test_rebuild_search_index(self, api_client, admin_client):
+        from . import search
+
+        create_missions(1, targets=1)
+        assert search.backend() != 'basic'
+        search.uninstall(connection)
+        Target.objects.update(notes="Rooftop antenna")
+        # Without the index, searches fall back to substring matching instead of failing.
+        assert api_client.get(reverse('target-search'), {'q': 'antenna'}).data['results'][0]['rank'] is None
+        assert api_client.get(reverse('target-list'), {'q': 'antenna'}).data['results']
+        assert admin_client.get('/admin/api/target/', {'q': 'antenna'}).status_code == 200
+
+        call_command('rebuild_search_index')
+        assert api_client.get(reverse('target-search'), {'q': 'antenna'}).data['results'][0]['rank'] is not None
+
+    def test_target_list_reads_one_page_in_one_query(self, api_client):
+        create_missions(3)
+        assert count_queries(api_client.get, reverse('target-list'), {'country': 'UA'}) == 1
+
+    # --- 21. RATE LIMITS & ADMISSION CONTROL ---
+
+    def test_endpoint_rate_limit_is_per_client(self, api_client, settings):
+        settings.THROTTLE = {'RATES': {'default': '100/min', 'cat.create': '2/min'}}
+        url = reverse('cat-list')
+        cat = {"name": "Tom", "years_of_experience": 1, "breed": "Bengal", "salary": "1.00"}
+        assert [api_client.post(url, cat).status_code for _ in range(2)] == [201, 201]
+        response = api_client.post(url, cat)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '30'
+        assert api_client.get(url).status_code == status.HTTP_200_OK  # Other endpoints draw on 'default' only.
+        assert api_client.post(url, cat, REMOTE_ADDR='10.0.0.2').status_code == status.HTTP_201_CREATED
+        assert Cat.objects.count() == 3
+
+    def test_async_endpoints_share_the_rate_limits(self, api_client, async_client, settings):
+        settings.THROTTLE = {'RATES': {'default': '100/min', 'cat.create': '2/min'}}
+        cat = {"name": "Tom", "years_of_experience": 1, "breed": "Bengal", "salary": "1.00"}
+        post = async_to_sync(async_client.post)
+        assert post(reverse('async-cat-list'), cat, content_type='application/json').status_code == 201
+        assert api_client.post(reverse('cat-list'), cat).status_code == status.HTTP_201_CREATED
+        response = post(reverse('async-cat-list'), cat, content_type='application/json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '30'
+        assert async_to_sync(async_client.get)(reverse('async-cat-list')).status_code == status.HTTP_200_OK
+        assert Cat.objects.count() == 2
+
+    def test_token_bucket_refills_over_time(self):
+        capacity, rate = throttling.parse_rate('2/s')
+        store = throttling.MemoryStore()
+        assert [store.take('k', capacity, rate, now=0.0) for _ in range(3)] == [0.0, 0.0, 0.5]
+        assert store.take('k', capacity, rate, now=0.25) == 0.25
+        assert store.take('k', capacity, rate, now=0.5) == 0.0
+        assert store.take('other', capacity, rate, now=0.5) == 0.0
+        with pytest.raises(ValueError):
+            throttling.parse_rate('10/fortnight')
+
+    def test_cache_store_shares_buckets_between_workers(self, settings):
+        settings.THROTTLE = {'STORE': 'api.throttling.CacheStore'}
+        first, second = throttling.CacheStore(), throttling.CacheStore()
+        assert first.take('k', 1, 1.0, now=100.0) == 0.0
+        assert second.take('k', 1, 1.0, now=100.0) == 1.0
+
+    def test_admission_control_sheds_requests_over_the_limit(self, rf, settings):
+        from django.db import OperationalError
+        from django.http import HttpResponse
+        from .admission import AdmissionMiddleware
+
+        settings.ADMISSION = {'MAX_CONCURRENT': 1, 'QUEUE_TIMEOUT': 0, 'RETRY_AFTER': 2}
+        nested = []
+
+        def view(request):
+            if request.path.startswith('/api/'):
+                # A second request arriving while this one holds the only slot.
+                nested.append(middleware(rf.get('/api/cats/')))
+            return HttpResponse()
+
+        middleware = AdmissionMiddleware(view)
+        assert middleware(rf.get('/api/cats/')).status_code == 200
+        assert (nested[0].status_code, nested[0]['Retry-After']) == (503, '2')
+        assert middleware(rf.get('/admin/')).status_code == 200  # Outside the API: never shed.
+
+        class PoolTimeout(Exception):
+            pass
+
+        error = OperationalError("couldn't get a connection after 10.00 sec")
+        error.__cause__ = PoolTimeout()
+        assert middleware.process_exception(rf.get('/api/cats/'), error).status_code == 503
+        assert middleware.process_exception(rf.get('/api/cats/'), OperationalError("locked")) is None
+        assert middleware.shed == 2
+
+    # --- 22. CHANGE FEED ---
+
+    def test_change_feed_returns_each_changed_object_once(self, api_client, django_capture_on_commit_callbacks):
+        create_missions(2, targets=2)
+        cursor = api_client.get(reverse('change-list')).data['cursor']
+        first, second = Mission.objects.order_by('id')
+        target = first.targets.order_by('id').first()
+        new_cat = Cat.objects.create(name="Nova", years_of_experience=1, breed="Bengal", salary=1)
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.patch(reverse('target-detail', kwargs={'pk': target.pk}), {"notes": "Seen"})
+            api_client.patch(reverse('target-bulk'), [{"id": target.pk, "is_completed": True}], format='json')
+            Cat.objects.filter(pk=second.cat_id).delete()  # Unassigns the second mission (SET_NULL).
+            api_client.post(reverse('mission-assign'), [{"mission": second.pk, "cat": new_cat.pk}], format='json')
+
+        response = api_client.get(reverse('change-list'), {'since': cursor})
+        assert response.status_code == status.HTTP_200_OK
+        items = {(item['kind'], item['id']): item for item in response.data['changes']}
+        assert len(items) == len(response.data['changes']) == 3
+        assert items[('mission', first.pk)]['data']['targets'][0]['notes'] == "Seen"
+        assert items[('mission', second.pk)]['data']['cat'] == new_cat.pk
+        assert items[('cat', second.cat_id)]['deleted'] is True
+
+        cursor = response.data['cursor']
+        assert api_client.get(reverse('change-list'), {'since': cursor}).data['changes'] == []
+        with django_capture_on_commit_callbacks(execute=True):
+            Mission.objects.create()
+        later = api_client.get(reverse('change-list'), {'since': cursor}).data
+        assert [item['kind'] for item in later['changes']] == ['mission']
+        assert int(later['cursor'].split('-')[0]) > int(cursor.split('-')[0])
+
+    def test_change_feed_pages_and_refuses_bad_cursors(self, api_client, settings):
+        settings.CHANGES = {'PAGE_SIZE': 2, 'RETENTION': 60}
+        Change.objects.bulk_create(Change(kind=Change.MISSION, object_id=pk) for pk in (1, 2, 3))
+        url = reverse('change-list')
+        page = api_client.get(url, {'since': changes.encode(0, timezone.now())}).data
+        assert ([item['id'] for item in page['changes']], page['more']) == ([1, 2], True)
+        assert all(item['deleted'] for item in page['changes'])
+        page = api_client.get(url, {'since': page['cursor']}).data
+        assert ([item['id'] for item in page['changes']], page['more']) == ([3], False)
+
+        assert api_client.get(url, {'since': 'nope'}).status_code == status.HTTP_400_BAD_REQUEST
+        stale = changes.encode(0, timezone.now() - timezone.timedelta(seconds=120))
+        assert api_client.get(url, {'since': stale}).status_code == status.HTTP_410_GONE
+
+    def test_compaction_keeps_the_latest_entry_per_object(self, settings):
+        settings.CHANGES = {'RETENTION': 60}
+        old = timezone.now() - timezone.timedelta(seconds=120)
+        Change.objects.bulk_create([
+            Change(kind=Change.CAT, object_id=1, created_at=old),
+            Change(kind=Change.MISSION, object_id=1),
+            Change(kind=Change.MISSION, object_id=2),
+            Change(kind=Change.MISSION, object_id=1),
+        ])
+        assert changes.compact() == (1, 1)
+        assert sorted(Change.objects.values_list('kind', 'object_id')) == [('mission', 1), ('mission', 2)]
+
+    def test_change_stream_pushes_pages_as_events(self, async_client, settings):
+        settings.CHANGES = {'POLL_INTERVAL': 0, 'STREAM_TIMEOUT': 0.05}
+        cat = Cat.objects.create(name="Tom", years_of_experience=1, breed="Bengal", salary=1)
+        Change.objects.create(kind=Change.CAT, object_id=cat.pk)
+
+        async def read():
+            response = await async_client.get(reverse('change-stream'),
+                                              headers={'Last-Event-ID': changes.encode(0, timezone.now())})
+            assert response['Content-Type'] == 'text/event-stream'
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+        events = async_to_sync(read)().split('\n\n')
+        changed = next(event for event in events if 'event: changes' in event)
+        data = json.loads(changed.split('data: ', 1)[1])
+        assert data['changes'][0]['data']['name'] == "Tom"
+
+    def test_change_stream_under_wsgi_sends_one_page(self, client, settings):
+        """A WSGI worker is not held for the stream timeout: the response ends after the first page."""
+        settings.CHANGES = {'POLL_INTERVAL': 2, 'STREAM_TIMEOUT': 60}
+        cat = Cat.objects.create(name="Tom", years_of_experience=1, breed="Bengal", salary=1)
+        Change.objects.create(kind=Change.CAT, object_id=cat.pk)
+
+        started = time.monotonic()
+        response = client.get(reverse('change-stream'), {'since': changes.encode(0, timezone.now())})
+        events = b''.join(response.streaming_content).decode().split('\n\n')
+        assert time.monotonic() - started < 5
+        assert events[0].startswith('retry: 2000\n')
+        assert json.loads(events[1].split('data: ', 1)[1])['changes'][0]['data']['name'] == "Tom"
+
+    # --- 23. AUTO-ASSIGNMENT ---
+
+    def test_assignment_plan_is_optimal(self):
+        from decimal import Decimal
+        from .assignments import plan
+
+        cats = [(1, 0, Decimal(100)), (2, 0, Decimal(100)), (3, 4, Decimal(900)), (4, 6, Decimal(950))]
+        missions = [(10, 0), (11, 4)]
+        # Cat 2 is as cheap as cat 1, but only one mission takes a novice.
+        assert plan(cats, missions).assignments == [(11, 3), (10, 1)]
+        assert plan(cats, missions).total_salary == 1000
+        assert plan(cats, missions, budget=Decimal(999)).assignments == [(10, 1)]
+        assert plan(cats, missions, limit=1).assignments == [(10, 1)]
+        assert plan(cats[:2], [(11, 4)]).assignments == []
+        # The most experienced cat takes the most demanding mission.
+        assert plan([(1, 4, 1), (2, 9, 1)], [(10, 0), (11, 8), (12, 2)]).assignments == [(11, 2), (12, 1)]
+
+    def test_auto_assign_endpoint(self, api_client):
+        novice = Cat.objects.create(name="Novice", years_of_experience=0, breed="Bengal", salary=100)
+        veteran = Cat.objects.create(name="Veteran", years_of_experience=10, breed="Bengal", salary=500)
+        busy = Cat.objects.create(name="Busy", years_of_experience=10, breed="Bengal", salary=1)
+        Mission.objects.create(cat=busy)
+        easy, hard = Mission.objects.create(), Mission.objects.create()
+        Target.objects.create(mission=easy, name="T1", country="UA")
+        for n in range(3):
+            Target.objects.create(mission=hard, name=f"T{n}", country="UA")
+        hard.refresh_from_db()
+        Mission.objects.create()  # No targets: nothing to staff.
+
+        url = reverse('mission-auto-assign')
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.post(url, {"dry_run": True}, format='json')
+        assert len(ctx.captured_queries) == 2
+        assert response.data['assignments'] == [{"mission": hard.pk, "cat": veteran.pk},
+                                                 {"mission": easy.pk, "cat": novice.pk}]
+        assert (response.data['idle_cats'], response.data['open_missions']) == (2, 2)
+        assert not Mission.objects.filter(pk__in=[easy.pk, hard.pk], cat__isnull=False).exists()
+
+        response = api_client.post(url, {"budget": "600.00"}, format='json')
+        assert (response.data['assigned'], response.data['total_salary']) == (2, "600.00")
+        assert dict(Mission.objects.filter(pk__in=[easy.pk, hard.pk]).values_list('pk', 'cat_id')) == {
+            easy.pk: novice.pk, hard.pk: veteran.pk}
+        assert Mission.objects.get(pk=hard.pk).version == hard.version + 1
+        assert api_client.post(url, {}, format='json').data['assigned'] == 0
+        assert api_client.post(url, {"limit": 0}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_auto_assign_writes_nothing_on_a_concurrent_claim(self, monkeypatch):
+        from . import assignments
+
+        cats = [Cat.objects.create(name=f"C{i}", years_of_experience=5, breed="Bengal", salary=1) for i in range(2)]
+        missions = [Mission.objects.create() for _ in range(2)]
+        for mission in missions:
+            Target.objects.create(mission=mission, name="T", country="UA")
+        planner = assignments.plan
+
+        def plan_then_race(*args, **kwargs):
+            result = planner(*args, **kwargs)
+            Mission.objects.filter(pk=missions[1].pk).update(cat=Cat.objects.create(
+                name="Rival", years_of_experience=1, breed="Bengal", salary=1))
+            return result
+
+        monkeypatch.setattr(assignments, 'plan', plan_then_race)
+        with pytest.raises(assignments.AssignmentError) as error:
+            assignments.auto_assign()
+        assert error.value.status_code == 409
+        assert not Mission.objects.filter(cat__in=cats).exists()
+
+    def test_auto_assign_command(self, capsys):
+        cat = Cat.objects.create(name="Tom", years_of_experience=3, breed="Bengal", salary=10)
+        mission = Mission.objects.create()
+        Target.objects.create(mission=mission, name="T", country="UA")
+        call_command('auto_assign', '--dry-run')
+        assert "Would assign 1 of 1 open missions from 1 idle cats" in capsys.readouterr().out
+        assert Mission.objects.get().cat_id is None
+        call_command('auto_assign')
+        assert Mission.objects.get().cat_id == cat.pk
+
+    # --- 24. STARTUP COST ---
+
+    def test_workers_start_without_the_test_runner(self, capsys):
+        """A fresh worker imports neither pytest nor the test runner; the report covers both."""
+        call_command('startup_report', '--runs', '1', '--top', '3', '--json')
+        report = json.loads(capsys.readouterr().out)
+        assert report['seconds'] > 0 and report['modules'] > 0
+        assert report['loaded']['pytest'] is False
+        assert report['loaded']['api.testrunner'] is False
+        assert len(report['packages']) == 3
+        assert report['packages'][0][1] >= report['packages'][1][1]
+
+    def test_import_times_sum_by_package(self):
+        from .startup import import_times
+
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       300 |        300 |   django.utils",
+            "import time:       200 |        500 | django",
+            "import time:       400 |        400 | api.views",
+        ])
+        assert import_times(output) == [('django', 0.0005), ('api', 0.0004)]
+
+    # --- 25. ADMIN AT SCALE ---
+
+    def test_admin_target_changelist_queries_do_not_grow_with_rows(self, admin_client):
+        create_missions(2)
+        few = count_queries(admin_client.get, '/admin/api/target/')
+        create_missions(10)
+        assert count_queries(admin_client.get, '/admin/api/target/') == few
+        Target.objects.filter(pk=Target.objects.first().pk).update(country="PL")
+        filters = admin_client.get('/admin/api/target/').context['cl'].filter_specs
+        assert next(spec for spec in filters if spec.field_path == 'country').lookup_choices == ["PL", "UA"]
+
+    def test_admin_changelist_estimates_large_unfiltered_counts(self, admin_client, settings):
+        from .estimates import estimated_count
+
+        settings.ESTIMATED_COUNTS = {'THRESHOLD': 3}
+        create_missions(6, targets=0)
+        Mission.objects.filter(pk=Mission.objects.order_by('id')[2].pk).delete()
+        # The primary key span, with the deleted row.
+        assert admin_client.get('/admin/api/mission/').context['cl'].result_count == 6
+        assert estimated_count(Mission.objects.filter(is_completed=False)) is None
+        response = admin_client.get('/admin/api/mission/', {"is_completed__exact": 0})
+        assert response.context['cl'].result_count == 5
+        settings.ESTIMATED_COUNTS = {'THRESHOLD': 100}
+        assert admin_client.get('/admin/api/mission/').context['cl'].result_count == 5
+
+    def test_admin_forms_do_not_list_every_cat_or_mission(self, admin_client):
+        create_missions(1)
+        mission = Mission.objects.get()
+        Cat.objects.create(name="Tom", years_of_experience=3, breed="Bengal", salary=10)
+        response = admin_client.get(f'/admin/api/mission/{mission.pk}/change/')
+        assert b'admin-autocomplete' in response.content and b'>Tom</option>' not in response.content
+        target = mission.targets.first()
+        response = admin_client.get(f'/admin/api/target/{target.pk}/change/')
+        assert b'vForeignKeyRawIdAdminField' in response.content
+        response = admin_client.get('/admin/autocomplete/', {
+            "app_label": "api", "model_name": "mission", "field_name": "cat", "term": "to"})
+        assert [item['text'] for item in response.json()['results']] == ["Tom"]
+
+    def test_admin_target_search_uses_words_and_mission_ids(self, admin_client):
+        create_missions(2, targets=1)
+        first, second = Mission.objects.order_by('id')
+        Target.objects.filter(mission=first).update(name="Falcon", notes="harbour at dawn")
+        Target.objects.filter(mission=second).update(name="Heron", notes="")
+
+        def found(term):
+            changelist = admin_client.get('/admin/api/target/', {"q": term}).context['cl']
+            return {target.name for target in changelist.result_list}
+
+        assert found("harbour") == {"Falcon"}
+        assert found("her") == {"Heron"}
+        assert found(str(second.pk)) == {"Heron"}
@@ -0,0 +1,153 @@
+"""
+Request throttling for the API viewsets: token buckets per client and per endpoint.
+
+Every client (the user id when authenticated, otherwise the IP address as DRF resolves it,
+honouring `NUM_PROXIES`) draws one token per request from its `THROTTLE['RATES']['default']`
+bucket, plus one from the bucket of the endpoint when a rate is configured for it. Endpoints
+are named `<basename>.<action>`, e.g. `cat.create`, unless the view sets `throttle_scope`.
+A rate such as `'30/min'` allows bursts of 30 requests and refills one token every two
+seconds. An empty bucket answers `429 Too Many Requests` with `Retry-After`.
+
+Buckets live in a pluggable store (`THROTTLE['STORE']`): `MemoryStore` keeps them in the
+process, `CacheStore` in a Django cache shared by every worker process.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    'STORE': 'api.throttling.MemoryStore',
+    'CACHE_ALIAS': 'default',
+    'MAX_BUCKETS': 100000,
+    'RATES': {},
+}
+
+PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60,
+           'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def get_setting(name):
+    return getattr(settings, 'THROTTLE', {}).get(name, DEFAULTS[name])
+
+
+@lru_cache(maxsize=64)
+def parse_rate(rate):
+    """`'30/min'` -> (30, 0.5): the bucket capacity and the tokens refilled per second."""
+    count, _, period = rate.partition('/')
+    if not count.isdigit() or int(count) < 1 or period not in PERIODS:
+        raise ValueError(f"Invalid throttle rate {rate!r}; expected e.g. '30/min'.")
+    return int(count), int(count) / PERIODS[period]
+
+
+def refill(tokens, updated, capacity, rate, now):
+    """Takes one token from a bucket; returns its new level and the seconds to wait (0 when allowed)."""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryStore:
+    """Buckets in this process; past MAX_BUCKETS the least recently used are dropped (i.e. refilled)."""
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_buckets = get_setting('MAX_BUCKETS')
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, wait = refill(tokens, updated, capacity, rate, now)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheStore:
+    """
+    Buckets in `CACHES[THROTTLE['CACHE_ALIAS']]`, shared by every worker process. The update
+    is a read followed by a write, so two workers racing on one bucket may both spend its
+    last token: limits hold to within the number of workers.
+    """
+
+    def __init__(self):
+        self.cache = caches[get_setting('CACHE_ALIAS')]
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        key = f'throttle:{key}'
+        tokens, updated = self.cache.get(key) or (capacity, now)
+        tokens, wait = refill(tokens, updated, capacity, rate, now)
+        # A bucket left alone until it is full again needs no entry.
+        self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / rate) + 1)
+        return wait
+
+    def clear(self):
+        # Entries expire once their bucket is full again.
+        pass
+
+
+_stores = {}
+
+
+def get_store():
+    path = get_setting('STORE')
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def reset():
+    """Empties every bucket (and re-reads the store settings)."""
+    for store in _stores.values():
+        store.clear()
+    _stores.clear()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle drawing on the client's default bucket and the endpoint's (see module docstring)."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0.0
+        if not get_setting('ENABLED'):
+            return True
+        rates = get_setting('RATES')
+        client = self.client(request)
+        store = get_store()
+        for scope in ('default', self.scope(view)):
+            rate = rates.get(scope)
+            if rate:
+                capacity, per_second = parse_rate(rate)
+                self.wait_seconds = max(self.wait_seconds, store.take(f'{scope}:{client}', capacity, per_second))
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+    def client(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    @staticmethod
+    def scope(view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None and getattr(view, 'basename', None):
+            scope = f'{view.basename}.{view.action}'
+        return scope
@@ -0,0 +1,232 @@
+"""
+Streaming import and export of cats and missions as CSV or NDJSON.
+
+Imports read their input line by line and work in chunks of `IMPORT_EXPORT['BATCH_SIZE']`
+rows: each chunk is validated with the API's serializers (breeds against the in-memory
+breed registry, cat ownership with set-based queries), its valid rows are written with
+`bulk_create` and its invalid rows are reported by line number. Every chunk commits on
+its own, so memory use is bounded by the chunk size rather than by the size of the file.
+
+Exports stream rows from `.iterator()`. In CSV a mission is one row with up to three
+`target_<n>_*` column groups; NDJSON rows match the API representation.
+
+Both directions collect garbage after every chunk: prefetched targets point back at their
+mission and serializer fields at their parent, so each chunk leaves reference cycles that
+would otherwise pile up until the next full collection.
+"""
+import csv
+import gc
+import io
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from . import caching, changes, fastjson, tasks
+from .models import Cat, Mission
+from .serializers import CatSerializer, MissionBulkSerializer, MissionSerializer
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,
+    'MAX_ERRORS': 1000,
+}
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+TARGET_FIELDS = ('name', 'country', 'notes', 'is_completed')
+MAX_TARGETS = 3
+
+
+def get_setting(name):
+    return getattr(settings, 'IMPORT_EXPORT', {}).get(name, DEFAULTS[name])
+
+
+def format_for(name, default='ndjson'):
+    """Guesses the format from a file name or content type."""
+    name = (name or '').lower()
+    if name.endswith('.csv') or 'csv' in name:
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in name:
+        return 'ndjson'
+    return default
+
+
+def _lines(stream):
+    """Decodes a binary stream (file, upload or request body) one line at a time."""
+    for number, line in enumerate(stream):
+        line = line.decode('utf-8') if isinstance(line, bytes) else line
+        yield line.lstrip('﻿') if number == 0 else line
+
+
+def read_rows(stream, fmt):
+    """Yields (line number, row dict or None, parse error or None) for every record in `stream`."""
+    if fmt == 'csv':
+        reader = csv.DictReader(_lines(stream))
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for number, line in enumerate(_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = fastjson.loads(line)
+        except ValueError as exc:
+            yield number, None, {"non_field_errors": [f"Malformed JSON: {exc}"]}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {"non_field_errors": ["Expected a JSON object."]}
+        else:
+            yield number, row, None
+
+
+class ImportReport:
+    def __init__(self, max_errors):
+        self.created = 0
+        self.rows = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.error_count,
+            "errors": self.errors,
+        }
+
+
+class Importer:
+    """Validates and inserts rows chunk by chunk; see the module docstring."""
+    serializer_class = None
+
+    def __init__(self, batch_size=None, max_errors=None):
+        self.batch_size = batch_size or get_setting('BATCH_SIZE')
+        self.max_errors = get_setting('MAX_ERRORS') if max_errors is None else max_errors
+
+    def run(self, stream, fmt):
+        report = ImportReport(self.max_errors)
+        rows = read_rows(stream, fmt)
+        while chunk := list(islice(rows, self.batch_size)):
+            self.import_chunk(chunk, fmt, report)
+            gc.collect()
+        return report
+
+    def import_chunk(self, chunk, fmt, report):
+        report.rows += len(chunk)
+        pending = []
+        for line, row, error in chunk:
+            if error:
+                report.add_error(line, error)
+            else:
+                pending.append((line, self.from_csv(row) if fmt == 'csv' else row))
+
+        # Serializers validate all-or-nothing, so drop the invalid rows and validate the rest
+        # again; set-based checks (e.g. a cat listed twice) can only fail on the first pass.
+        while pending:
+            serializer = self.serializer_class(data=[row for _, row in pending], many=True)
+            if serializer.is_valid():
+                report.created += len(self.save(serializer))
+                return
+            valid = []
+            for (line, row), errors in zip(pending, serializer.errors):
+                if errors:
+                    report.add_error(line, errors)
+                else:
+                    valid.append((line, row))
+            pending = valid
+
+    def from_csv(self, row):
+        return row
+
+    def save(self, serializer):
+        return serializer.save()
+
+
+class CatImporter(Importer):
+    serializer_class = CatSerializer
+
+    def save(self, serializer):
+        with transaction.atomic():
+            cats = Cat.objects.bulk_create(
+                [Cat(**item) for item in serializer.validated_data], batch_size=self.batch_size
+            )
+            tasks.queue_breed_checks(cats)
+        # Bulk inserts send no model signals.
+        caching.invalidate('cat')
+        changes.record('cat', [cat.pk for cat in cats])
+        return cats
+
+
+class MissionImporter(Importer):
+    serializer_class = MissionBulkSerializer
+
+    def from_csv(self, row):
+        targets = []
+        for n in range(1, MAX_TARGETS + 1):
+            target = {field: row.get(f'target_{n}_{field}') for field in TARGET_FIELDS}
+            target = {field: value for field, value in target.items() if value not in (None, '')}
+            if target:
+                targets.append(target)
+        return {"cat": row.get('cat') or None, "targets": targets}
+
+
+IMPORTERS = {'cats': CatImporter, 'missions': MissionImporter}
+
+
+def export_queryset(kind):
+    if kind == 'missions':
+        return Mission.objects.prefetch_related('targets').order_by('pk')
+    return Cat.objects.order_by('pk')
+
+
+def _mission_csv_row(data):
+    # The columns are fixed; those left out by a `?fields=` sparse fieldset stay empty.
+    row = {'id': data.get('id'), 'cat': data.get('cat'), 'is_completed': data.get('is_completed')}
+    for n, target in enumerate(data.get('targets', ()), start=1):
+        row.update({f'target_{n}_{field}': target.get(field) for field in TARGET_FIELDS})
+    return row
+
+
+def _iterate(queryset, chunk_size):
+    for number, obj in enumerate(queryset.iterator(chunk_size=chunk_size)):
+        if number and number % chunk_size == 0:
+            # The iterator has just released the previous chunk.
+            gc.collect()
+        yield obj
+
+
+def export_rows(queryset, serializer_class, fmt, context=None, chunk_size=2000):
+    """Yields the serialized rows of `queryset` as CSV or NDJSON text, reading it with `.iterator()`."""
+    context = context or {}
+    # Rows are built with the serializer's list fast path (see FastListSerializer).
+    serializer = serializer_class(context=context)
+    represent, fields = serializer.represent, tuple(serializer.fields)
+    if fmt != 'csv':
+        for obj in _iterate(queryset, chunk_size):
+            yield fastjson.dumps(represent(obj, fields)) + "\n"
+        return
+
+    if issubclass(serializer_class, MissionSerializer):
+        columns = ['id', 'cat', 'is_completed'] + [
+            f'target_{n}_{field}' for n in range(1, MAX_TARGETS + 1) for field in TARGET_FIELDS
+        ]
+        to_row = _mission_csv_row
+    else:
+        columns = list(fields)
+        to_row = dict
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for number, obj in enumerate(_iterate(queryset, chunk_size), start=1):
+        writer.writerow(to_row(represent(obj, fields)))
+        if number % 100 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -1,15 +1,41 @@
 from django.urls import path, include
+from django.utils.module_loading import import_string
 from rest_framework.routers import DefaultRouter
-from .views import CatViewSet, MissionViewSet, TargetViewSet, run_system_tests_view
+from . import async_views, metrics
+from .views import CatViewSet, ChangeViewSet, MissionViewSet, StatsViewSet, TargetViewSet
+
+
+def lazy_view(dotted_path):
+    """The view at `dotted_path`, imported on its first request instead of at startup."""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path)
+        return view(request, *args, **kwargs)
+    return wrapper
+
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
 router.register(r'cats', CatViewSet, basename='cat')
 router.register(r'missions', MissionViewSet, basename='mission')
 router.register(r'targets', TargetViewSet, basename='target')
+router.register(r'stats', StatsViewSet, basename='stats')
+router.register(r'changes', ChangeViewSet, basename='change')
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
     path('', include(router.urls)),
-    path('run-pytest/', run_system_tests_view, name='run-pytest'),
+    path('async/cats/', async_views.cat_list, name='async-cat-list'),
+    path('async/cats/<int:pk>/', async_views.cat_detail, name='async-cat-detail'),
+    path('async/missions/', async_views.mission_list, name='async-mission-list'),
+    path('async/missions/<int:pk>/', async_views.mission_detail, name='async-mission-detail'),
+    path('async/targets/<int:pk>/', async_views.target_detail, name='async-target-detail'),
+    path('changes/stream/', async_views.change_stream, name='change-stream'),
+    path('metrics/', metrics.metrics_view, name='metrics'),
+    path('run-pytest/', lazy_view('api.testrunner_views.run_system_tests_view'), name='run-pytest'),
+    path('run-pytest/<int:run_id>/', lazy_view('api.testrunner_views.system_test_run_view'), name='test-run-detail'),
+    path('run-pytest/<int:run_id>/status/', lazy_view('api.testrunner_views.system_test_run_status_view'), name='test-run-status'),
 ]
\ No newline at end of file
@@ -1,21 +1,151 @@
-import pytest
-import requests
-from django.contrib.admin.views.decorators import staff_member_required
-from django.http import HttpResponseRedirect
-from django.contrib import messages
-from django.utils.safestring import mark_safe
-from rest_framework import viewsets, status, decorators
+from django.http import StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from rest_framework import viewsets, status, decorators, exceptions, serializers
 from rest_framework.response import Response
 
+from . import assignments, caching, changes, db, idempotency, search, stats, tasks, transfer
+from .filters import MissionFilter, TargetFilter
 from .models import Cat, Mission, Target
-from .serializers import CatSerializer, MissionSerializer, TargetSerializer
+from .serializers import (
+    AutoAssignSerializer, CatSerializer, MissionBulkSerializer, MissionSerializer, TargetBulkUpdateSerializer,
+    TargetListSerializer, TargetSerializer, requested_fields,
+)
 
 
 # --- REST API ViewSets ---
 
-class CatViewSet(viewsets.ModelViewSet):
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource has changed since the version given in If-Match."
+    default_code = 'precondition_failed'
+
+
+def if_match_version(request):
+    """The version sent in `If-Match` (`"3"`, `W/"3"` or `3`); None if there is none or it is `*`."""
+    value = request.headers.get('If-Match', '').strip()
+    if value in ('', '*'):
+        return None
+    value = value.removeprefix('W/').strip('"')
+    if not value.isdigit():
+        raise exceptions.ParseError("If-Match must be the version of the resource, e.g. \"3\".")
+    return int(value)
+
+
+def check_version(request, instance, mission_id):
+    """
+    Optimistic concurrency: with `If-Match`, claims the version for this write with one
+    conditional UPDATE (no locks) or raises 412 if another writer got there first.
+    Call inside the transaction that performs the write.
+    """
+    expected = if_match_version(request)
+    if expected is None:
+        return
+    if not instance.claim_version(expected):
+        raise PreconditionFailed()
+    # The claim is a plain UPDATE; the write that follows may not change anything else.
+    caching.invalidate('mission', [mission_id])
+
+
+class TransferMixin:
+    """
+    Streaming bulk transfer for a list endpoint (see api.transfer):
+    `GET <list>/export/` streams the whole table as NDJSON, or as CSV with `?as=csv`;
+    `POST <list>/import/` loads a CSV or NDJSON body (or a multipart `file`) in batches
+    and answers with a per-row error report.
+    """
+    export_chunk_size = 2000
+    transfer_kind = None
+
+    @decorators.action(detail=False, methods=['get'])
+    def export(self, request):
+        fmt = request.query_params.get('as', 'ndjson')
+        if fmt not in transfer.FORMATS:
+            return Response({"error": f"'as' must be one of: {', '.join(transfer.FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset()).order_by('pk')
+        rows = transfer.export_rows(
+            queryset, self.get_serializer_class(), fmt, self.get_serializer_context(), self.export_chunk_size
+        )
+        return StreamingHttpResponse(rows, content_type=transfer.CONTENT_TYPES[fmt])
+
+    @decorators.action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_rows(self, request):
+        # The body is read as a stream; request.data is never touched, so it is not parsed up front.
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        stream = upload or request.stream
+        if stream is None:
+            return Response({"error": "Send the rows as the request body or as a 'file' upload."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.query_params.get('as') or transfer.format_for(upload.name if upload else request.content_type)
+        if fmt not in transfer.FORMATS:
+            return Response({"error": f"'as' must be one of: {', '.join(transfer.FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        report = transfer.IMPORTERS[self.transfer_kind]().run(stream, fmt)
+        return Response(report.as_dict(), status=status.HTTP_200_OK if report.error_count else status.HTTP_201_CREATED)
+
+
+class ReplicaReadMixin:
+    """
+    Serves the reads of list/retrieve requests from read replicas when any are configured (see api.db).
+    Responses stored in the response cache are still rendered from the primary (CachedReadMixin).
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.action_map.get(request.method.lower()) in self.replica_actions:
+            with db.use_replicas():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class CachedReadMixin:
+    """
+    Serves `list` and `retrieve` from the response cache (see api.caching), with ETags
+    so that clients revalidating with `If-None-Match` get a 304 without a database hit.
+    """
+    cache_label = None
+
+    def list(self, request, *args, **kwargs):
+        if not caching.get_setting('ENABLED'):
+            return super().list(request, *args, **kwargs)
+        key = caching.list_key(self.cache_label, request)
+        return self._cached_response(request, key, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not caching.get_setting('ENABLED'):
+            return super().retrieve(request, *args, **kwargs)
+        key = caching.object_key(self.cache_label, kwargs[self.lookup_url_kwarg or self.lookup_field], request)
+        return self._cached_response(request, key, super().retrieve, *args, **kwargs)
+
+    def _cached_response(self, request, key, render, *args, **kwargs):
+        # The key (with its version tokens) is computed before reading the database, so data
+        # rendered concurrently with a write is stored under the already-stale version.
+        cache = caching.get_cache()
+        entry = cache.get(key)
+        if entry is None:
+            caching.stats.record('misses')
+            # From the primary: a lagging replica's rows would be cached under the new version token.
+            with db.use_primary():
+                response = render(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = (caching.etag_for(response.data), response.data)
+            cache.set(key, entry, caching.get_setting('TIMEOUT'))
+        else:
+            caching.stats.record('hits')
+
+        etag, data = entry
+        if etag in request.headers.get('If-None-Match', ''):
+            caching.stats.record('not_modified')
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+
+class CatViewSet(ReplicaReadMixin, CachedReadMixin, TransferMixin, viewsets.ModelViewSet):
     queryset = Cat.objects.all()
     serializer_class = CatSerializer
+    cache_label = 'cat'
+    transfer_kind = 'cats'
 
     def partial_update(self, request, *args, **kwargs):
         # Specific requirement: Ability to update salary.
@@ -26,42 +156,152 @@ class CatViewSet(viewsets.ModelViewSet):
         return super().partial_update(request, *args, **kwargs)
 
 
-class MissionViewSet(viewsets.ModelViewSet):
+class MissionViewSet(ReplicaReadMixin, CachedReadMixin, TransferMixin, viewsets.ModelViewSet):
     queryset = Mission.objects.all()
     serializer_class = MissionSerializer
+    cache_label = 'mission'
+    transfer_kind = 'missions'
+    filter_backends = [MissionFilter]
+
+    def get_queryset(self):
+        # Nested targets are serialized for every mission, so load them in one extra query
+        # unless the client trimmed them away with `?fields=`.
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        if self.action in ('list', 'retrieve', 'export', 'create', 'update', 'partial_update') \
+                and (fields is None or 'targets' in fields):
+            queryset = queryset.prefetch_related('targets')
+        return queryset
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         # Requirement: A mission cannot be deleted if it is already assigned to a cat
-        if instance.cat is not None:
+        if instance.cat_id is not None:
             return Response({"error": "Mission is already assigned to a cat and cannot be deleted."},
                             status=status.HTTP_400_BAD_REQUEST)
         return super().destroy(request, *args, **kwargs)
 
+    @idempotency.idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @decorators.action(detail=False, methods=['post'])
+    @idempotency.idempotent
+    def bulk(self, request):
+        """Creates many missions with their targets in one transaction; errors are reported per item."""
+        serializer = MissionBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            missions = serializer.save()
+        except IntegrityError:
+            # A concurrent request assigned one of the cats between validation and insert.
+            return Response({"error": "One of the cats was assigned to another mission concurrently."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"ids": [mission.id for mission in missions]}, status=status.HTTP_201_CREATED)
+
+    def perform_create(self, serializer):
+        self._save_mapping_conflicts(serializer)
+
+    def perform_update(self, serializer):
+        self._save_mapping_conflicts(serializer)
+
+    def _save_mapping_conflicts(self, serializer):
+        # validate_cat can pass for two concurrent requests; the unique cat column decides.
+        try:
+            with transaction.atomic():
+                if serializer.instance is not None:
+                    check_version(self.request, serializer.instance, serializer.instance.pk)
+                serializer.save()
+        except IntegrityError:
+            raise serializers.ValidationError({"cat": [assignments.CAT_TAKEN]})
+
     @decorators.action(detail=True, methods=['patch'])
+    @idempotency.idempotent
     def assign_cat(self, request, pk=None):
-        mission = self.get_object()
-        cat_id = request.data.get('cat_id')
-
         try:
-            cat = Cat.objects.get(pk=cat_id)
             # Requirement: One cat can only have one mission at a time
-            if hasattr(cat, 'active_mission') and cat.active_mission:
-                return Response({"error": "This cat is already on another mission."},
+            cat = assignments.assign_cat(pk, request.data.get('cat_id'))
+        except assignments.AssignmentError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+        return Response({"status": f"Cat {cat.name} assigned to mission."})
+
+    @decorators.action(detail=False, methods=['post'])
+    @idempotency.idempotent
+    def assign(self, request):
+        """Assigns many cats at once: `[{"mission": 1, "cat": 2}, ...]`. All-or-nothing."""
+        if not isinstance(request.data, list) or not all(
+            isinstance(item, dict) and isinstance(item.get('mission'), int) and isinstance(item.get('cat'), int)
+            for item in request.data
+        ):
+            return Response({"error": "Expected a list of {\"mission\": id, \"cat\": id} objects."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        pairs = [(item['mission'], item['cat']) for item in request.data]
+        try:
+            missions = assignments.assign_many(pairs)
+        except assignments.AssignmentError as exc:
+            errors = getattr(exc, 'errors', None)
+            if errors is not None:
+                return Response([{"error": error} if error else {} for error in errors],
                                 status=status.HTTP_400_BAD_REQUEST)
+            return Response({"error": exc.message}, status=exc.status_code)
+        return Response([{"mission": mission.id, "cat": mission.cat_id} for mission in missions])
 
-            mission.cat = cat
-            mission.save()
-            return Response({"status": f"Cat {cat.name} assigned to mission."})
-        except Cat.DoesNotExist:
-            return Response({"error": "Cat not found."}, status=status.HTTP_404_NOT_FOUND)
+    @decorators.action(detail=False, methods=['post'])
+    @idempotency.idempotent
+    def auto_assign(self, request):
+        """
+        Staffs unassigned missions with idle cats in one batch: `{"dry_run": true, "budget": "5000.00",
+        "limit": 100}` (all optional). Answers with the plan; a dry run writes nothing.
+        """
+        options = AutoAssignSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        try:
+            plan = assignments.auto_assign(**options.validated_data)
+        except assignments.AssignmentError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+        return Response({'dry_run': options.validated_data['dry_run'], **plan.as_dict()})
 
 
-class TargetViewSet(viewsets.GenericViewSet, viewsets.mixins.UpdateModelMixin):
+class TargetViewSet(ReplicaReadMixin, viewsets.GenericViewSet, viewsets.mixins.ListModelMixin,
+                    viewsets.mixins.UpdateModelMixin):
     queryset = Target.objects.all()
     serializer_class = TargetSerializer
+    filter_backends = [TargetFilter]
+    replica_actions = ('list', 'search')
+    max_search_results = 100
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('update', 'partial_update'):
+            # The frozen-notes rule reads the parent mission on every update.
+            queryset = queryset.select_related('mission')
+        return queryset
+
+    def get_serializer_class(self):
+        return TargetListSerializer if self.action in ('list', 'search') else super().get_serializer_class()
+
+    @decorators.action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search over target names and notes, best matches first:
+        `?q=<words>&limit=<n>`. The other list filters narrow the candidates.
+        """
+        query = request.query_params.get('q')
+        if query is None or not search.terms(query):
+            return Response({"q": ["Expected at least one word."]}, status=status.HTTP_400_BAD_REQUEST)
+        limit = request.query_params.get('limit', '20')
+        if not limit.isdigit() or not 1 <= int(limit) <= self.max_search_results:
+            return Response({"limit": [f"Expected a number from 1 to {self.max_search_results}."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        targets = search.ranked_targets(query, int(limit), self.filter_queryset(self.get_queryset()))
+        data = self.get_serializer(targets, many=True).data
+        for item, target in zip(data, targets):
+            item['rank'] = target.rank
+        return Response({"results": data})
 
     def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
         instance = self.get_object()
 
         # Requirement: Notes cannot be updated if either the target or the mission is completed
@@ -70,83 +310,63 @@ class TargetViewSet(viewsets.GenericViewSet, viewsets.mixins.UpdateModelMixin):
                 return Response({"error": "Target or Mission is complete. Notes are frozen."},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-        return super().update(request, *args, **kwargs)
+        # Reuse the instance loaded above instead of fetching it again in UpdateModelMixin.update.
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
 
+    def perform_update(self, serializer):
+        if 'If-Match' in self.request.headers:
+            with transaction.atomic():
+                check_version(self.request, serializer.instance, serializer.instance.mission_id)
+                serializer.save()
+        else:
+            serializer.save()
+        if serializer.instance.remaining_delta < 0:
+            tasks.queue_completion_notices([serializer.instance.mission_id])
 
-# --- Custom Admin Test Runner ---
+    @decorators.action(detail=False, methods=['patch'])
+    def bulk(self, request):
+        """Updates notes/completion on many targets at once; errors are reported per item."""
+        serializer = TargetBulkUpdateSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        targets = serializer.save()
+        return Response(TargetSerializer(targets, many=True).data)
 
-@staff_member_required
-def run_system_tests_view(request):
+
+class StatsViewSet(viewsets.ViewSet):
     """
-    Executes the pytest suite programmatically and captures results for the Admin UI.
-    Protected by staff_member_required to ensure only authorized users can trigger it.
+    Agency analytics from materialized aggregate snapshots (see api.stats).
+    `?refresh=1` recomputes every stat before answering; staff only, as it runs every aggregate.
     """
 
-    class PytestDetailedPlugin:
-        def __init__(self):
-            self.results = []
-            self.passed_count = 0
-            self.failed_count = 0
-
-        def pytest_runtest_logreport(self, report):
-            if report.when == 'call':
-                # Format test names for the UI
-                test_name = report.nodeid.split("::")[-1].replace("test_", "").replace("_", " ").title()
-                outcome = report.outcome
-
-                # Using Django CSS Variables for adaptive theme support
-                success_color = "var(--message-success-color, #264b37)"
-                error_color = "var(--message-error-color, #ba2121)"
-
-                icon = "✔" if outcome == "passed" else "✘"
-                color = success_color if outcome == "passed" else error_color
-
-                # Transparent background colors that work on both light and dark modes
-                bg_color = "rgba(40, 167, 69, 0.08)" if outcome == "passed" else "rgba(220, 53, 69, 0.08)"
-
-                if outcome == "passed":
-                    self.passed_count += 1
-                else:
-                    self.failed_count += 1
-
-                self.results.append(
-                    f"<div style='display: flex; align-items: center; justify-content: space-between; "
-                    f"padding: 8px 12px; margin-bottom: 5px; border-radius: 6px; background: {bg_color}; "
-                    f"border-left: 5px solid {color}; box-shadow: 0 1px 2px rgba(0,0,0,0.02);'>"
-                    f"<span style='font-weight: 500; color: var(--body-fg, #333); font-size: 0.95em;'>{test_name}</span>"
-                    f"<span style='color: {color}; font-weight: 700; font-family: monospace; font-size: 0.9em; "
-                    f"text-transform: uppercase;'>{icon} {outcome}</span>"
-                    f"</div>"
-                )
-
-    plugin = PytestDetailedPlugin()
-    pytest.main(["api/tests.py", "--no-migrations", "-q"], plugins=[plugin])
-
-    result_items = "".join(plugin.results)
-    total = plugin.passed_count + plugin.failed_count
-    pass_percent = (plugin.passed_count / total * 100) if total > 0 else 0
-
-    summary = (
-        f"<div style='margin-top: 15px; font-family: var(--font-family-primary, system-ui, sans-serif);'>"
-        f"  <div style='display: flex; flex-direction: column; gap: 2px;'>"
-        f"    {result_items}"
-        f"  </div>"
-        f"  <div style='margin-top: 16px; padding-top: 12px; border-top: 1px solid var(--border-color, #ddd);'>"
-        f"    <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px;'>"
-        f"       <span style='font-weight: 600; color: var(--body-fg); opacity: 0.9;'>Verification Progress</span>"
-        f"       <span style='font-weight: 700; color: var(--body-fg);'>{plugin.passed_count} / {total} Passed</span>"
-        f"    </div>"
-        f"    <div style='width: 100%; height: 10px; background: var(--selected-bg, #f0f0f0); border-radius: 5px; overflow: hidden;'>"
-        f"       <div style='width: {pass_percent}%; height: 100%; background: var(--message-success-color, #28a745); transition: width 0.6s cubic-bezier(0.4, 0, 0.2, 1);'></div>"
-        f"    </div>"
-        f"  </div>"
-        f"</div>"
-    )
-
-    if plugin.failed_count == 0:
-        messages.success(request,
-                         mark_safe(f"<b style='font-size: 1.1em;'>🚀 All Agency Protocols Verified!</b>{summary}"))
-    else:
-        messages.error(request, mark_safe(f"<b style='font-size: 1.1em;'>⚠️ Security Protocols Breached!</b>{summary}"))
-
-    return HttpResponseRedirect(request.META.get('HTTP_REFERER', '/admin/'))
\ No newline at end of file
+    def list(self, request):
+        if request.query_params.get('refresh') in ('1', 'true'):
+            if not request.user.is_staff:
+                raise exceptions.PermissionDenied("Only staff users may recompute the stats.")
+            snapshots = stats.refresh()
+        else:
+            snapshots = stats.snapshot()
+        data = {name: snapshot.data for name, snapshot in snapshots.items()}
+        data['computed_at'] = min(snapshot.computed_at for snapshot in snapshots.values())
+        return Response(data)
+
+
+class ChangeViewSet(viewsets.ViewSet):
+    """
+    Incremental change feed (see api.changes): `?since=<cursor>` returns the cats and missions
+    changed since the cursor, each once with its current representation, plus the next cursor.
+    Without `since` it only returns the current cursor. `/api/changes/stream/` pushes the same
+    pages as server-sent events.
+    """
+
+    def list(self, request):
+        try:
+            data = changes.page(request.query_params.get('since'), context={'request': request})
+        except changes.InvalidCursor:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        except changes.StaleCursor:
+            return Response({"error": "The cursor has expired; reload the list and start from a new cursor."},
+                            status=status.HTTP_410_GONE)
+        return Response(data)
@@ -0,0 +1,125 @@
+"""
+Latency and query counts of the admin changelists, change forms and autocomplete at scale.
+
+Seeds `size` targets (three per mission) and one cat per ten targets, a third of them on a
+mission, then requests each admin page as a superuser and reports p50/p95 and the number of
+SQL queries per request.
+
+    python -m benchmarks.bench_admin --sizes 1000000
+"""
+import random
+
+from . import harness
+
+BATCH = 10000
+COUNTRIES = ["UA", "UK", "FR", "PL", "DE", "US"]
+BREEDS = ["Bengal", "Siberian", "Persian", "Sphynx", "Ragdoll"]
+
+
+def vocabulary(rng, size=5000):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return sorted({''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)})
+
+
+def seed(size, words, rng):
+    from api.models import Cat, Mission, Target
+
+    cats = size // 10
+    for start in range(0, cats, BATCH):
+        Cat.objects.bulk_create(
+            Cat(name=f"{rng.choice(words).title()} {n}", years_of_experience=rng.randint(0, 15),
+                breed=rng.choice(BREEDS), salary=rng.randint(100, 5000))
+            for n in range(start, min(cats, start + BATCH))
+        )
+    cat_ids = iter(Cat.objects.order_by('id').values_list('id', flat=True)[:cats // 3])
+    for start in range(0, size, BATCH * 3):
+        count = min(BATCH, (size - start + 2) // 3)
+        missions = Mission.objects.bulk_create(
+            Mission(cat_id=next(cat_ids, None), is_completed=rng.random() < 0.9) for _ in range(count)
+        )
+        Target.objects.bulk_create(
+            Target(mission=mission, name=f"{rng.choice(words).title()} {n}", country=rng.choice(COUNTRIES),
+                   notes=' '.join(rng.choices(words, k=rng.randint(5, 20))), is_completed=mission.is_completed)
+            for mission in missions for n in range(3)
+        )
+
+
+def measure(client, urls):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    samples, queries = [], 0
+    for url in urls:
+        with CaptureQueriesContext(connection) as ctx, harness.timer() as elapsed:
+            response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        samples.append(elapsed['seconds'] * 1000)
+        queries = max(queries, len(ctx.captured_queries))
+    return harness.percentiles(samples, points=(50, 95)), queries
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000000,))
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    teardown = harness.setup_django(file_db=True)
+    try:
+        from django.contrib.auth import get_user_model
+        from django.test import Client
+        from django.urls import reverse
+        from api.models import Cat, Mission, Target
+
+        rng = random.Random(25)
+        words = vocabulary(rng)
+        user = get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench')
+        client = Client()
+        client.force_login(user)
+
+        def changelist(model, **query):
+            url = reverse(f'admin:api_{model}_changelist')
+            return url + ('?' + '&'.join(f'{key}={value}' for key, value in query.items()) if query else '')
+
+        results = []
+        for size in args.sizes:
+            seed(size, words, rng)
+            last_mission = Mission.objects.order_by('-id').values_list('id', flat=True).first()
+            missions = list(Mission.objects.filter(cat__isnull=False).values_list('id', flat=True)[:args.repeat])
+            targets = list(Target.objects.values_list('id', flat=True)[:args.repeat])
+
+            def each(build):
+                return lambda: [build() for _ in range(args.repeat)]
+
+            patterns = {
+                'mission_list': each(lambda: changelist('mission')),
+                'mission_list_active': each(lambda: changelist('mission', is_completed__exact=0)),
+                'mission_list_page_50': each(lambda: changelist('mission', p=50)),
+                'mission_change': lambda: [reverse('admin:api_mission_change', args=[pk]) for pk in missions],
+                'target_list': each(lambda: changelist('target')),
+                'target_list_country': each(lambda: changelist('target', country=rng.choice(COUNTRIES))),
+                'target_search': each(lambda: changelist('target', q=rng.choice(words))),
+                'target_search_mission': each(lambda: changelist('target', q=rng.randint(1, last_mission))),
+                'target_change': lambda: [reverse('admin:api_target_change', args=[pk]) for pk in targets],
+                'cat_list': each(lambda: changelist('cat')),
+                'cat_search': each(lambda: changelist('cat', q=rng.choice(words)[:3].title())),
+                'cat_autocomplete': each(lambda: reverse('admin:autocomplete') + '?app_label=api&model_name=mission'
+                                         f'&field_name=cat&term={rng.choice(words)[:3]}'),
+            }
+            for name, urls in patterns.items():
+                timings, queries = measure(client, urls())
+                results.append({
+                    'targets': size,
+                    'page': name,
+                    'p50_ms': timings[50],
+                    'p95_ms': timings[95],
+                    'queries': queries,
+                })
+            if size != args.sizes[-1]:
+                # Cascading through a million targets is slow; the last dataset goes with the database.
+                harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
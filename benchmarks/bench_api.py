@@ -0,0 +1,193 @@
+"""
+Load test of every REST endpoint under concurrent clients.
+
+Seeds `--sizes` cats and missions (three targets each), then drives each scenario with
+`--clients` threads, each holding its own test client, for `--requests` requests in total.
+Breeds are validated against a local stub of TheCatAPI. Per scenario it reports throughput
+and latency percentiles, plus the number of responses with an unexpected status.
+
+Use `--output` to keep the results and `python -m benchmarks.compare` to gate regressions:
+
+    python -m benchmarks.bench_api --sizes 1000 --clients 8 --output head.json
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Write scenarios on the default SQLite database fail with "database is locked" once several
+clients write at once (counted as errors); run with SCA_DB_ENGINE=sqlite-wal or postgresql
+for meaningful write numbers. The admin test runner (/api/run-pytest/) is left out: it
+starts pytest subprocesses.
+"""
+import itertools
+import logging
+import queue
+import random
+import threading
+import time
+
+from . import harness, stubs
+
+CAT = {"name": "Bench", "years_of_experience": 3, "breed": "Bengal", "salary": "1000.00"}
+
+
+class Data:
+    """Seeded ids plus pools of rows that scenarios consume (deletes, assignments)."""
+
+    def __init__(self, size, requests):
+        from api.models import Cat, Mission, Target
+
+        cats = Cat.objects.bulk_create(
+            Cat(name=f"Cat {i}", years_of_experience=1, breed="Siberian", salary=1) for i in range(size)
+        )
+        missions = Mission.objects.bulk_create(Mission(remaining_targets=3) for _ in range(size))
+        targets = Target.objects.bulk_create(
+            Target(mission=mission, name=f"T{n}", country="UA") for mission in missions for n in range(3)
+        )
+        self.cat_ids = [cat.pk for cat in cats]
+        self.mission_ids = [mission.pk for mission in missions]
+        self.target_ids = [target.pk for target in targets]
+
+        # Rows that a request uses up, enough for every request of the scenario.
+        spare = Cat.objects.bulk_create(
+            Cat(name=f"Spare {i}", years_of_experience=1, breed="Siberian", salary=1) for i in range(requests * 3)
+        )
+        free = Mission.objects.bulk_create(Mission() for _ in range(requests * 3))
+        self.deletable_cats = self._pool(cat.pk for cat in spare[:requests])
+        self.deletable_missions = self._pool(mission.pk for mission in free[:requests])
+        self.assignments = self._pool(zip(
+            (mission.pk for mission in free[requests:2 * requests]), (cat.pk for cat in spare[requests:2 * requests])
+        ))
+        self.batch_assignments = self._pool(zip(
+            (mission.pk for mission in free[2 * requests:]), (cat.pk for cat in spare[2 * requests:])
+        ))
+
+    @staticmethod
+    def _pool(items):
+        pool = queue.SimpleQueue()
+        for item in items:
+            pool.put(item)
+        return pool
+
+
+def scenarios(data):
+    """name -> (method, callable building (url, payload) per request, expected statuses)."""
+    from django.urls import reverse
+
+    def pick(ids):
+        return random.choice(ids)
+
+    def assign(n):
+        mission_id, cat_id = data.assignments.get()
+        return reverse('mission-assign-cat', kwargs={'pk': mission_id}), {"cat_id": cat_id}
+
+    def batch_assign(n):
+        mission_id, cat_id = data.batch_assignments.get()
+        return reverse('mission-assign'), [{"mission": mission_id, "cat": cat_id}]
+
+    return {
+        'cat-list': ('get', lambda n: (reverse('cat-list'), None), {200}),
+        'cat-retrieve': ('get', lambda n: (reverse('cat-detail', kwargs={'pk': pick(data.cat_ids)}), None), {200}),
+        'cat-create': ('post', lambda n: (reverse('cat-list'), {**CAT, "name": f"Bench {n}"}), {201}),
+        'cat-update-salary': ('patch', lambda n: (
+            reverse('cat-detail', kwargs={'pk': pick(data.cat_ids)}), {"salary": f"{1000 + n}.00"}), {200}),
+        'cat-delete': ('delete', lambda n: (
+            reverse('cat-detail', kwargs={'pk': data.deletable_cats.get()}), None), {204}),
+        'cat-export': ('get', lambda n: (reverse('cat-export'), None), {200}),
+        'mission-list': ('get', lambda n: (reverse('mission-list'), None), {200}),
+        'mission-retrieve': ('get', lambda n: (
+            reverse('mission-detail', kwargs={'pk': pick(data.mission_ids)}), None), {200}),
+        'mission-create': ('post', lambda n: (reverse('mission-list'), {
+            "targets": [{"name": f"T{n}-{i}", "country": "UA"} for i in range(3)]}), {201}),
+        'mission-bulk-create': ('post', lambda n: (reverse('mission-bulk'), [
+            {"targets": [{"name": f"T{n}-{i}", "country": "UA"} for i in range(3)]} for _ in range(10)]), {201}),
+        'mission-assign-cat': ('patch', assign, {200}),
+        'mission-batch-assign': ('post', batch_assign, {200}),
+        'mission-delete': ('delete', lambda n: (
+            reverse('mission-detail', kwargs={'pk': data.deletable_missions.get()}), None), {204}),
+        'target-update': ('patch', lambda n: (
+            reverse('target-detail', kwargs={'pk': pick(data.target_ids)}), {"notes": f"Intel {n}"}), {200, 400}),
+        'target-bulk-update': ('patch', lambda n: (reverse('target-bulk'), [
+            {"id": pick(data.target_ids), "notes": f"Intel {n}"}]), {200, 400}),
+        'stats': ('get', lambda n: (reverse('stats-list'), None), {200}),
+        'async-cat-list': ('get', lambda n: (reverse('async-cat-list'), None), {200}),
+        'async-mission-retrieve': ('get', lambda n: (
+            reverse('async-mission-detail', kwargs={'pk': pick(data.mission_ids)}), None), {200}),
+        'metrics': ('get', lambda n: (reverse('metrics'), None), {200}),
+    }
+
+
+def drive(method, build, expected, requests, clients):
+    """Runs `requests` requests from `clients` threads; returns latencies and unexpected responses."""
+    from django.db import connection
+    from django.test import Client
+
+    counter = itertools.count()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client_loop():
+        # Server errors become 500 responses (counted as errors) instead of exceptions.
+        client = Client(raise_request_exception=False)
+        samples, failed = [], 0
+        try:
+            while (n := next(counter)) < requests:
+                url, payload = build(n)
+                started = time.perf_counter()
+                response = getattr(client, method)(url, payload, content_type='application/json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                samples.append(time.perf_counter() - started)
+                failed += response.status_code not in expected
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(samples)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    with harness.timer() as elapsed:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return latencies, sum(errors), elapsed['seconds']
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000,))
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent clients.")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario.")
+    parser.add_argument('--only', nargs='+', help="Run only these scenarios.")
+    args = parser.parse_args()
+    teardown = harness.setup_django(file_db=True)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    try:
+        from api.models import Cat, Mission
+
+        results = []
+        with stubs.breed_server() as url:
+            stubs.seed_breeds(url)
+            for size in args.sizes:
+                data = Data(size, args.requests)
+                for name, (method, build, expected) in scenarios(data).items():
+                    if args.only and name not in args.only:
+                        continue
+                    latencies, errors, seconds = drive(method, build, expected, args.requests, args.clients)
+                    points = harness.percentiles(latencies)
+                    results.append({
+                        'rows': size,
+                        'scenario': name,
+                        'clients': args.clients,
+                        'requests': len(latencies),
+                        'rps': len(latencies) / seconds,
+                        'p50_ms': points[50] * 1000,
+                        'p95_ms': points[95] * 1000,
+                        'p99_ms': points[99] * 1000,
+                        'errors': errors,
+                    })
+                harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Multi-threaded stress test of cat assignment.
+
+Worker threads race to assign random cats to random missions through
+api.assignments.assign_cat. The run fails if any request ends in anything other than
+success or a clean AssignmentError, or if a cat ends up on more than one mission.
+
+    python -m benchmarks.bench_assignment --sizes 200 --threads 8 --attempts 2000
+"""
+import random
+import threading
+
+from . import harness
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(200,))
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--attempts', type=int, default=2000, help="Assignment attempts per size.")
+    args = parser.parse_args()
+    teardown = harness.setup_django(file_db=True)
+    try:
+        from django.db import connection
+        from django.db.models import Count
+        from api import assignments
+        from api.models import Cat, Mission
+
+        results = []
+        for size in args.sizes:
+            cats = Cat.objects.bulk_create(
+                Cat(name=f"Cat {i}", years_of_experience=1, breed="Siberian", salary=1) for i in range(size)
+            )
+            missions = Mission.objects.bulk_create(Mission() for _ in range(size))
+            cat_ids = [cat.id for cat in cats]
+            mission_ids = [mission.id for mission in missions]
+
+            outcomes = {'assigned': 0, 'rejected': 0, 'errors': 0}
+            lock = threading.Lock()
+
+            def worker(attempts):
+                rng = random.Random()
+                try:
+                    for _ in range(attempts):
+                        try:
+                            assignments.assign_cat(rng.choice(mission_ids), rng.choice(cat_ids))
+                            outcome = 'assigned'
+                        except assignments.AssignmentError:
+                            outcome = 'rejected'
+                        except Exception:
+                            outcome = 'errors'
+                        with lock:
+                            outcomes[outcome] += 1
+                finally:
+                    connection.close()
+
+            per_thread = args.attempts // args.threads
+            threads = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(args.threads)]
+            with harness.timer() as elapsed:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            doubles = Mission.objects.exclude(cat=None).values('cat').annotate(n=Count('id')).filter(n__gt=1).count()
+            assert outcomes['errors'] == 0, outcomes
+            assert doubles == 0, f"{doubles} cats assigned to several missions"
+
+            results.append({
+                'cats': size,
+                'threads': args.threads,
+                'attempts': per_thread * args.threads,
+                'assigned': outcomes['assigned'],
+                'rejected': outcomes['rejected'],
+                'ops_per_second': per_thread * args.threads / elapsed['seconds'],
+            })
+            harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
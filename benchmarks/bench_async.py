@@ -0,0 +1,84 @@
+"""
+Throughput of the sync (WSGI, DRF) and async (ASGI, /api/async/) request paths.
+
+Requests are driven in-process: the sync path through Django's WSGI handler from a pool
+of threads, the async path through the ASGI handler from one event loop, both with the
+same number of requests in flight. Breeds are seeded from a local stub of TheCatAPI.
+
+    python -m benchmarks.bench_async --sizes 500 --concurrency 50 --requests 2000
+"""
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from . import harness, stubs
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(500,))
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    teardown = harness.setup_django(file_db=True)
+    try:
+        from django.db import connection
+        from django.test import AsyncClient, Client, override_settings
+        from django.urls import reverse
+        from api.models import Cat, Mission, Target
+
+        results = []
+        with stubs.breed_server() as url, override_settings(API_CACHE={'ENABLED': False}):
+            stubs.seed_breeds(url)
+            for size in args.sizes:
+                missions = Mission.objects.bulk_create(Mission(remaining_targets=3) for _ in range(size))
+                Target.objects.bulk_create(
+                    Target(mission=mission, name=f"T{n}", country="UA") for mission in missions for n in range(3)
+                )
+                ids = [mission.pk for mission in missions]
+                cat = {"name": "Bench", "years_of_experience": 1, "breed": "Bengal", "salary": "1.00"}
+
+                def sync_request(n):
+                    client = Client()
+                    try:
+                        if n % 10 == 0:
+                            client.post(reverse('cat-list'), cat, content_type='application/json')
+                        else:
+                            client.get(reverse('mission-detail', kwargs={'pk': random.choice(ids)}))
+                    finally:
+                        connection.close()
+
+                with harness.timer() as sync_elapsed:
+                    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                        list(pool.map(sync_request, range(args.requests)))
+
+                async def async_run():
+                    client = AsyncClient()
+                    limit = asyncio.Semaphore(args.concurrency)
+
+                    async def one(n):
+                        async with limit:
+                            if n % 10 == 0:
+                                await client.post(reverse('async-cat-list'), cat, content_type='application/json')
+                            else:
+                                await client.get(reverse('async-mission-detail', kwargs={'pk': random.choice(ids)}))
+
+                    await asyncio.gather(*(one(n) for n in range(args.requests)))
+
+                with harness.timer() as async_elapsed:
+                    asyncio.run(async_run())
+
+                results.append({
+                    'missions': size,
+                    'concurrency': args.concurrency,
+                    'requests': args.requests,
+                    'wsgi_rps': args.requests / sync_elapsed['seconds'],
+                    'asgi_rps': args.requests / async_elapsed['seconds'],
+                })
+                harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
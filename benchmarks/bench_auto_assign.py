@@ -0,0 +1,90 @@
+"""
+Batch auto-assignment (api.assignments.auto_assign) versus assigning one mission at a time.
+
+Seeds `size` idle cats and `size` unassigned missions (one to three targets each), then
+times a dry run (the two loading queries plus the matching), the matching alone and the
+single-transaction write.
+For comparison, `--baseline` missions are assigned one by one through `assign_cat` (the
+PATCH /missions/{id}/assign_cat/ path), picking for each the first idle qualifying cat;
+its time is extrapolated to `size` missions.
+
+    python -m benchmarks.bench_auto_assign --sizes 10000
+"""
+import random
+import time
+
+from . import harness
+
+
+def seed(size, rng):
+    from api.models import Cat, Mission, Target
+
+    Cat.objects.bulk_create(
+        Cat(name=f"Cat {i}", years_of_experience=rng.randint(0, 10), breed="Bengal", salary=rng.randint(500, 5000))
+        for i in range(size)
+    )
+    targets = {}
+    missions = Mission.objects.bulk_create(
+        Mission(remaining_targets=targets.setdefault(i, rng.randint(1, 3))) for i in range(size)
+    )
+    Target.objects.bulk_create(
+        Target(mission=mission, name=f"T{n}", country="UA") for i, mission in enumerate(missions)
+        for n in range(targets[i])
+    )
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(10000,))
+    parser.add_argument('--baseline', type=int, default=200, help="Missions assigned one by one.")
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from api import assignments
+        from api.models import Cat, Mission
+
+        rng = random.Random(23)
+        results = []
+        for size in args.sizes:
+            seed(size, rng)
+
+            with harness.timer() as load:
+                dry = assignments.auto_assign(dry_run=True)
+            cats = list(Cat.objects.values_list('id', 'years_of_experience', 'salary'))
+            missions = [(pk, assignments.required_experience(n))
+                        for pk, n in Mission.objects.values_list('id', 'remaining_targets')]
+            started = time.perf_counter()
+            assignments.plan(cats, missions)
+            match_seconds = time.perf_counter() - started
+            with harness.timer() as applied:
+                plan = assignments.auto_assign()
+            assert len(plan.assignments) == len(dry.assignments)
+
+            # One at a time, as clients do today; then undone before the next size.
+            Mission.objects.update(cat=None)
+            missions = list(Mission.objects.values_list('id', 'remaining_targets')[:args.baseline])
+            idle = sorted(Cat.objects.values_list('id', 'years_of_experience'), key=lambda cat: cat[1])
+            with harness.timer() as one_by_one:
+                for mission_id, remaining in missions:
+                    required = assignments.required_experience(remaining)
+                    match = next((cat for cat in idle if cat[1] >= required), None)
+                    if match is not None:
+                        idle.remove(match)
+                        assignments.assign_cat(mission_id, match[0])
+
+            results.append({
+                'cats': size,
+                'missions': size,
+                'assigned': len(plan.assignments),
+                'dry_run_s': load['seconds'],
+                'match_s': match_seconds,
+                'apply_s': applied['seconds'],
+                'one_by_one_s': one_by_one['seconds'] / max(1, len(missions)) * len(plan.assignments),
+            })
+            harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
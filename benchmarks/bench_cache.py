@@ -0,0 +1,67 @@
+"""
+Latency of the read endpoints with and without the response cache.
+
+    python -m benchmarks.bench_cache --sizes 1000 --requests 500
+"""
+import random
+import time
+
+from . import harness
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000,))
+    parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and mode.")
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.test import override_settings
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from api import caching
+        from api.models import Cat, Mission, Target
+
+        client = APIClient()
+        results = []
+        for size in args.sizes:
+            cats = Cat.objects.bulk_create(
+                Cat(name=f"Cat {i}", years_of_experience=1, breed="Siberian", salary=1) for i in range(size)
+            )
+            missions = Mission.objects.bulk_create(Mission(cat=cat, remaining_targets=3) for cat in cats)
+            Target.objects.bulk_create(
+                Target(mission=mission, name=f"T{n}", country="UA") for mission in missions for n in range(3)
+            )
+            # A small hot set, as in production where a few missions dominate reads.
+            hot = [mission.pk for mission in random.sample(missions, min(20, size))]
+            endpoints = {
+                'mission-detail': lambda: reverse('mission-detail', kwargs={'pk': random.choice(hot)}),
+                'cat-list': lambda: reverse('cat-list'),
+            }
+
+            for endpoint, url in endpoints.items():
+                for enabled in (False, True):
+                    caching.get_cache().clear()
+                    caching.stats.reset()
+                    samples = []
+                    with override_settings(API_CACHE={'ENABLED': enabled}):
+                        for _ in range(args.requests):
+                            started = time.perf_counter()
+                            client.get(url())
+                            samples.append(time.perf_counter() - started)
+                    points = harness.percentiles(samples, (50, 99))
+                    results.append({
+                        'rows': size,
+                        'endpoint': endpoint,
+                        'cached': enabled,
+                        'p50_ms': points[50] * 1000,
+                        'p99_ms': points[99] * 1000,
+                        'hit_ratio': caching.stats.as_dict()['hit_ratio'],
+                    })
+            harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Dashboard polling: reloading the full mission list versus reading the change feed.
+
+Seeds `size` missions (three targets each). Each round changes `--changes` random targets,
+then one dashboard catches up twice: by walking every page of /api/missions/, and by one
+GET /api/changes/?since=<cursor>. Reports the mean time, response bytes and SQL queries per
+poll for both.
+
+    python -m benchmarks.bench_changes --sizes 1000 10000 --changes 10
+"""
+import random
+
+from . import harness
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000, 10000))
+    parser.add_argument('--polls', type=int, default=20)
+    parser.add_argument('--changes', type=int, default=10, help="Targets changed between two polls.")
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from api.models import Change, Mission, Target
+
+        client = APIClient()
+
+        def full_list():
+            url, params, size = reverse('mission-list'), {'page_size': 1000}, 0
+            while url:
+                response = client.get(url, params)
+                size += len(response.content)
+                url, params = response.data['next'], None
+            return size
+
+        def feed(cursor):
+            response = client.get(reverse('change-list'), {'since': cursor})
+            return response.data['cursor'], len(response.content)
+
+        results = []
+        for size in args.sizes:
+            missions = Mission.objects.bulk_create(Mission(remaining_targets=3) for _ in range(size))
+            Target.objects.bulk_create(
+                Target(mission=mission, name=f"T{n}", country="UA", notes="Intel " * 5)
+                for mission in missions for n in range(3)
+            )
+            target_ids = list(Target.objects.values_list('pk', flat=True))
+            cursor = client.get(reverse('change-list')).data['cursor']
+            totals = {mode: {'seconds': 0.0, 'bytes': 0, 'queries': 0} for mode in ('full_list', 'feed')}
+            for _ in range(args.polls):
+                for target in Target.objects.filter(pk__in=random.sample(target_ids, args.changes)):
+                    target.notes = f"Update {random.random()}"
+                    target.save()
+                for mode in totals:
+                    with CaptureQueriesContext(connection) as queries, harness.timer() as elapsed:
+                        if mode == 'feed':
+                            cursor, sent = feed(cursor)
+                        else:
+                            sent = full_list()
+                    totals[mode]['seconds'] += elapsed['seconds']
+                    totals[mode]['bytes'] += sent
+                    totals[mode]['queries'] += len(queries)
+            for mode, total in totals.items():
+                results.append({
+                    'missions': size,
+                    'changes': args.changes,
+                    'mode': mode,
+                    'ms_per_poll': total['seconds'] / args.polls * 1000,
+                    'kb_per_poll': total['bytes'] / args.polls / 1024,
+                    'queries_per_poll': total['queries'] / args.polls,
+                })
+            harness.wipe(Mission, Change)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
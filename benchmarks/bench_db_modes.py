@@ -0,0 +1,106 @@
+"""
+Write throughput of the database modes selectable with SCA_DB_ENGINE.
+
+Several threads create cats and complete targets concurrently, the way parallel API
+workers would. Settings are read once at startup, so every mode is measured in its own
+subprocess. PostgreSQL is included when SCA_DB_HOST is set.
+
+    python -m benchmarks.bench_db_modes --sizes 2000 --threads 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from . import harness
+
+
+def modes():
+    engines = ['sqlite', 'sqlite-wal']
+    if os.environ.get('SCA_DB_HOST'):
+        engines.append('postgresql')
+    return engines
+
+
+def write(count, thread):
+    from django.db import OperationalError, connection
+
+    from api.models import Cat, Mission, Target
+
+    errors = 0
+    try:
+        mission = Mission.objects.create()
+        targets = Target.objects.bulk_create(
+            Target(mission=mission, name=f"T{thread}-{n}", country="UA") for n in range(count)
+        )
+        for n, target in enumerate(targets):
+            try:
+                Cat.objects.create(name=f"Cat {thread}-{n}", years_of_experience=1, breed="Siberian", salary=1)
+                target.is_completed = True
+                target.save()
+            except OperationalError:
+                # "database is locked": the write was dropped under contention.
+                errors += 1
+    finally:
+        connection.close()
+    return errors
+
+
+def measure(size, threads):
+    errors = [0] * threads
+    per_thread = max(1, size // threads)
+
+    def worker(thread):
+        errors[thread] = write(per_thread, thread)
+
+    pool = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+    with harness.timer() as elapsed:
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    writes = per_thread * threads
+    return {
+        'engine': os.environ['SCA_DB_ENGINE'],
+        'writes': writes,
+        'threads': threads,
+        'seconds': elapsed['seconds'],
+        'writes_per_s': (writes - sum(errors)) / elapsed['seconds'],
+        'errors': sum(errors),
+    }
+
+
+def run_mode(engine, args):
+    command = [sys.executable, '-m', 'benchmarks.bench_db_modes', '--worker',
+               '--threads', str(args.threads), '--sizes', *map(str, args.sizes)]
+    output = subprocess.run(
+        command, env={**os.environ, 'SCA_DB_ENGINE': engine}, capture_output=True, text=True, check=True
+    ).stdout
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{')]
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(2000,))
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        teardown = harness.setup_django(file_db=True)
+        try:
+            for size in args.sizes:
+                print(json.dumps(measure(size, args.threads)))
+        finally:
+            teardown()
+        return
+
+    results = []
+    for engine in modes():
+        results += run_mode(engine, args)
+    harness.report(results, as_json=args.json, output=args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Parallel retries of `POST /api/missions/` with an Idempotency-Key (api.idempotency).
+
+For every key, `--clients` threads send the same request at the same moment, as a client
+that retries on timeout would. Exactly one mission must be created per key; the other
+requests either replay the stored response or get 409 while the first is still running.
+Any other outcome (a duplicate mission, a 5xx) is counted in `errors`. It also reports the
+latency of a replayed retry next to that of a fresh create.
+
+    SCA_DB_ENGINE=sqlite-wal python -m benchmarks.bench_idempotency --keys 200 --clients 8
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from . import harness
+
+PAYLOAD = {"targets": [{"name": "T1", "country": "UA"}, {"name": "T2", "country": "PL"}]}
+
+
+def burst(url, key, clients):
+    """Sends `clients` identical requests at once; returns their status codes and replay flags."""
+    from django.db import connection
+    from django.test import Client
+
+    barrier = threading.Barrier(clients)
+    outcomes = []
+    lock = threading.Lock()
+
+    def send():
+        client = Client(raise_request_exception=False)
+        barrier.wait()
+        try:
+            response = client.post(url, PAYLOAD, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+        finally:
+            connection.close()
+        with lock:
+            outcomes.append((response.status_code, response.has_header('Idempotent-Replayed')))
+
+    threads = [threading.Thread(target=send) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def timed_post(client, url, key, samples):
+    started = time.perf_counter()
+    client.post(url, PAYLOAD, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+    samples.append(time.perf_counter() - started)
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1,))
+    parser.add_argument('--keys', type=int, default=100, help="Distinct keys, each retried in parallel.")
+    parser.add_argument('--clients', type=int, default=8, help="Parallel retries per key.")
+    args = parser.parse_args()
+    teardown = harness.setup_django(file_db=True)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    try:
+        from django.test import Client
+        from django.urls import reverse
+        from api.models import Mission
+
+        url = reverse('mission-list')
+        statuses = Counter()
+        with harness.timer() as elapsed:
+            for n in range(args.keys):
+                for code, replayed in burst(url, f'burst-{n}', args.clients):
+                    statuses['replayed' if replayed else code] += 1
+        missions = Mission.objects.count()
+
+        client = Client()
+        fresh, replayed = [], []
+        for n in range(args.keys):
+            timed_post(client, url, f'serial-{n}', fresh)
+            timed_post(client, url, f'serial-{n}', replayed)
+
+        expected = statuses[201] + statuses['replayed'] + statuses[409]
+        harness.report([{
+            'keys': args.keys,
+            'clients': args.clients,
+            'created': statuses[201],
+            'replayed': statuses['replayed'],
+            'conflicts': statuses[409],
+            'errors': (args.keys * args.clients - expected) + abs(missions - args.keys),
+            'bursts_per_s': args.keys / elapsed['seconds'],
+            'create_p50_ms': harness.percentiles(fresh)[50] * 1000,
+            'replay_p50_ms': harness.percentiles(replayed)[50] * 1000,
+        }], as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
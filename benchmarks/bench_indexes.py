@@ -0,0 +1,104 @@
+"""
+Query plans and timings of the hot query patterns with and without their indexes.
+
+Runs against whatever database SCA.settings configures (SQLite by default, or a local
+PostgreSQL when the project is pointed at one), so the same script covers both engines.
+
+    python -m benchmarks.bench_indexes --sizes 1000000 --explain
+"""
+import random
+import time
+
+from . import harness
+
+BATCH = 10000
+
+
+def seed(size):
+    from api.models import Cat, Mission, Target
+
+    breeds = ["Siberian", "Bengal", "Persian", "Sphynx"]
+    countries = ["UA", "UK", "FR", "PL", "DE", "US"]
+    missions = []
+    for start in range(0, size // 3 + 1, BATCH):
+        count = min(BATCH, size // 3 + 1 - start)
+        # Most missions are finished; the active ones are what the API looks at.
+        missions += Mission.objects.bulk_create(
+            Mission(is_completed=random.random() < 0.9) for _ in range(count)
+        )
+    targets = (
+        Target(mission=mission, name=f"T{n}", country=random.choice(countries),
+               is_completed=mission.is_completed or random.random() < 0.5)
+        for mission in missions for n in range(3)
+    )
+    Target.objects.bulk_create(targets, batch_size=BATCH)
+    Cat.objects.bulk_create(
+        (Cat(name=f"Cat {i}", years_of_experience=1, breed=random.choice(breeds), salary=1) for i in range(size // 10)),
+        batch_size=BATCH,
+    )
+    return [mission.pk for mission in missions]
+
+
+def patterns(mission_ids):
+    from api.models import Cat, Mission, Target
+
+    return {
+        'target_incomplete_idx': (Target, lambda: list(
+            Target.objects.filter(mission_id=random.choice(mission_ids), is_completed=False))),
+        'mission_active_idx': (Mission, lambda: list(
+            Mission.objects.filter(is_completed=False).order_by('id').values_list('id', flat=True)[:100])),
+        'cat_breed_idx': (Cat, lambda: Cat.objects.filter(breed="Sphynx").count()),
+        'target_country_idx': (Target, lambda: list(Target.objects.filter(country="PL")[:100])),
+    }
+
+
+def timed(query, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        query()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000000,))
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--explain', action='store_true', help="Print the query plan of every pattern.")
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.db import connection
+
+        results = []
+        for size in args.sizes:
+            mission_ids = seed(size)
+            for name, (model, query) in patterns(mission_ids).items():
+                index = next(index for index in model._meta.indexes if index.name == name)
+                with_index = timed(query, args.repeat)
+                with connection.schema_editor() as editor:
+                    editor.remove_index(model, index)
+                without_index = timed(query, args.repeat)
+                with connection.schema_editor() as editor:
+                    editor.add_index(model, index)
+                if args.explain:
+                    from django.test.utils import CaptureQueriesContext
+                    with CaptureQueriesContext(connection) as ctx:
+                        query()
+                    with connection.cursor() as cursor:
+                        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+                        cursor.execute(prefix + ctx.captured_queries[-1]['sql'])
+                        print(f"-- {name}\n" + "\n".join(str(row) for row in cursor.fetchall()))
+                results.append({
+                    'targets': size,
+                    'index': name,
+                    'with_ms': with_index,
+                    'without_ms': without_index,
+                    'speedup': without_index / with_index if with_index else 0.0,
+                })
+            harness.wipe(*(model for model, _ in patterns(mission_ids).values()))
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput of the background job queue (api.jobs) with different worker thread counts.
+
+Each round queues `--sizes` breed checks for cats recruited while the breed registry was
+empty, and as many mission completion notices. Both go to a local stub of TheCatAPI
+that also accepts the notification webhook; it answers 503 to the first `--outage`
+requests (so the breed checks go through retry/backoff) and delays every response by
+`--latency-ms`. A worker with `--threads` threads then drains the queue. `errors` counts
+jobs that did not finish and cats that were not verified.
+
+    SCA_DB_ENGINE=sqlite-wal python -m benchmarks.bench_jobs --sizes 500 --threads 1 4 8
+"""
+import logging
+
+from . import harness, stubs
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(500,))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--outage', type=int, default=3, help="Breed source requests that fail first.")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="Stub response delay.")
+    args = parser.parse_args()
+    teardown = harness.setup_django(file_db=True)
+    logging.getLogger('api.jobs').setLevel(logging.CRITICAL)
+    try:
+        from django.test import override_settings
+        from api import jobs
+        from api.breeds import TheCatAPIBreedSource, registry
+        from api.models import Breed, Cat, Job, Mission
+
+        results = []
+        for size in args.sizes:
+            for threads in args.threads:
+                with stubs.breed_server(fail_first=args.outage, delay=args.latency_ms / 1000) as url, \
+                        override_settings(JOBS={'BACKOFF': 0.01, 'NOTIFY_URL': url.replace('breeds', 'hooks')},
+                                          BREED_REGISTRY={'BACKGROUND_REFRESH': False}):
+                    Breed.objects.all().delete()
+                    registry.clear()
+                    registry._source = TheCatAPIBreedSource(url=url)
+                    cats = Cat.objects.bulk_create(
+                        Cat(name=f"Cat {i}", years_of_experience=1, breed=stubs.BREEDS[i % len(stubs.BREEDS)],
+                            breed_status=Cat.PENDING, salary=1) for i in range(size)
+                    )
+                    missions = Mission.objects.bulk_create(Mission(is_completed=True) for _ in range(size))
+                    jobs.enqueue_many('verify_breed', [[cat.pk] for cat in cats])
+                    jobs.enqueue_many('notify_mission_completed', [[mission.pk] for mission in missions])
+
+                    worker = jobs.Worker(threads=threads, poll_interval=0.005)
+                    with harness.timer() as elapsed:
+                        while Job.objects.exclude(status__in=[Job.DONE, Job.FAILED]).exists():
+                            worker.run(until_empty=True)
+                    unfinished = Job.objects.exclude(status=Job.DONE).count()
+                    unverified = Cat.objects.exclude(breed_status=Cat.VERIFIED).count()
+                    results.append({
+                        'jobs': size * 2,
+                        'threads': threads,
+                        'retries': worker.failed,
+                        'jobs_per_s': worker.processed / elapsed['seconds'],
+                        'seconds': elapsed['seconds'],
+                        'errors': unfinished + unverified,
+                    })
+                harness.wipe(Job, Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Overhead of MetricsMiddleware on a hello-world request.
+
+Both handlers run the project's full middleware stack; the instrumented one adds
+api.metrics.MetricsMiddleware. Batches alternate between the two so that drift in machine
+load affects both equally, and the best batch of each is compared. Because the difference
+is within run-to-run noise, the middleware is also timed on its own around a no-op view
+(`isolated_us`); `overhead_pct` is that cost relative to the baseline request. The
+target is < 2%.
+
+    python -m benchmarks.bench_metrics --requests 20000
+"""
+import io
+import time
+import timeit
+
+from . import harness
+
+
+def hello(request):
+    from django.http import HttpResponse
+    return HttpResponse(b"hello")
+
+
+def _urlpatterns():
+    from django.urls import path
+    return [path('hello/', hello, name='hello')]
+
+
+def environ():
+    return {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': '/hello/', 'QUERY_STRING': '', 'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80', 'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+    }
+
+
+def handler(middleware):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import override_settings
+
+    with override_settings(MIDDLEWARE=middleware, ROOT_URLCONF=__name__):
+        return WSGIHandler()
+
+
+def batch(app, requests):
+    start_response = lambda status, headers: None
+    started = time.perf_counter()
+    for _ in range(requests):
+        b''.join(app(environ(), start_response))
+    return (time.perf_counter() - started) / requests
+
+
+def isolated(requests):
+    """Best-of-7 cost of MetricsMiddleware around a view that does nothing."""
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from api.metrics import MetricsMiddleware
+
+    request = RequestFactory().get('/hello/')
+    request.resolver_match = None
+    response = HttpResponse(b"hello")
+    middleware = MetricsMiddleware(lambda request: response)
+    return min(timeit.repeat(lambda: middleware(request), number=requests, repeat=7)) / requests
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1,))
+    parser.add_argument('--requests', type=int, default=20000, help="Requests per mode.")
+    parser.add_argument('--batches', type=int, default=10)
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.conf import settings
+        from django.test import override_settings
+
+        instrumented = list(settings.MIDDLEWARE)
+        baseline = [name for name in instrumented if name != 'api.metrics.MetricsMiddleware']
+        # WSGIHandler resolves URLs against ROOT_URLCONF at request time.
+        with override_settings(ROOT_URLCONF=__name__):
+            apps = {'baseline': handler(baseline), 'metrics': handler(instrumented)}
+            per_batch = max(1, args.requests // args.batches)
+            for app in apps.values():
+                batch(app, per_batch)  # Warm up.
+            best = {mode: float('inf') for mode in apps}
+            for _ in range(args.batches):
+                for mode, app in apps.items():
+                    best[mode] = min(best[mode], batch(app, per_batch))
+        middleware = isolated(per_batch)
+
+        harness.report([{
+            'requests': per_batch * args.batches,
+            'baseline_us': best['baseline'] * 1e6,
+            'metrics_us': best['metrics'] * 1e6,
+            'isolated_us': middleware * 1e6,
+            'overhead_pct': middleware / best['baseline'] * 100,
+        }], as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+urlpatterns = _urlpatterns()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Per-mission POST /api/missions/ versus a single POST /api/missions/bulk/.
+
+    python -m benchmarks.bench_mission_bulk --sizes 1000 10000
+"""
+from . import harness
+
+
+def payload(size):
+    return [
+        {"targets": [{"name": f"T{i}-{n}", "country": "UA"} for n in range(1, 4)]}
+        for i in range(size)
+    ]
+
+
+def main():
+    args = harness.parser(__doc__).parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from api.models import Mission
+
+        client = APIClient()
+        results = []
+        for size in args.sizes:
+            missions = payload(size)
+
+            with harness.timer() as single:
+                for mission in missions:
+                    client.post(reverse('mission-list'), mission, format='json')
+            assert Mission.objects.count() == size
+            harness.wipe(Mission)
+
+            with harness.timer() as bulk:
+                response = client.post(reverse('mission-bulk'), missions, format='json')
+            assert response.status_code == 201, response.data
+            harness.wipe(Mission)
+
+            results.append({
+                'missions': size,
+                'single_seconds': single['seconds'],
+                'bulk_seconds': bulk['seconds'],
+                'speedup': single['seconds'] / bulk['seconds'],
+            })
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Latency of the list filters and the full-text target search at realistic note volumes.
+
+Seeds `size` targets (three per mission) whose notes are drawn from a fixed vocabulary,
+then requests each pattern through the API and reports p50/p95 per pattern. The same
+searches are repeated with the full-text index removed (substring matching, the fallback
+of api.search) to show what the index buys.
+
+    python -m benchmarks.bench_search --sizes 1000000
+"""
+import random
+
+from . import harness
+
+BATCH = 10000
+COUNTRIES = ["UA", "UK", "FR", "PL", "DE", "US"]
+
+
+def vocabulary(rng, size=5000):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return sorted({''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)})
+
+
+def seed(size, words, rng):
+    from api.models import Mission, Target
+
+    for start in range(0, size, BATCH * 3):
+        count = min(BATCH, (size - start + 2) // 3)
+        missions = Mission.objects.bulk_create(Mission(is_completed=rng.random() < 0.9) for _ in range(count))
+        Target.objects.bulk_create(
+            Target(mission=mission, name=f"{rng.choice(words).title()} {n}", country=rng.choice(COUNTRIES),
+                   notes=' '.join(rng.choices(words, k=rng.randint(10, 60))), is_completed=mission.is_completed)
+            for mission in missions for n in range(3)
+        )
+
+
+def measure(client, url, params, repeat):
+    samples = []
+    for query in params(repeat):
+        with harness.timer() as elapsed:
+            response = client.get(url, query)
+        assert response.status_code == 200, response.content[:200]
+        samples.append(elapsed['seconds'] * 1000)
+    return harness.percentiles(samples, points=(50, 95))
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000000,))
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.conf import settings
+        from django.db import connection
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from api import search
+        from api.models import Mission
+
+        settings.API_CACHE = {'ENABLED': False}
+        rng = random.Random(20)
+        words = vocabulary(rng)
+        client = APIClient()
+
+        def one_word(repeat):
+            return [{'q': rng.choice(words)} for _ in range(repeat)]
+
+        def two_words(repeat):
+            return [{'q': f'{rng.choice(words)} {rng.choice(words)[:3]}'} for _ in range(repeat)]
+
+        patterns = {
+            'search': (reverse('target-search'), one_word),
+            'search_prefix': (reverse('target-search'), two_words),
+            'search_country': (reverse('target-search'), lambda n: [dict(q, country='PL') for q in one_word(n)]),
+            'targets_q': (reverse('target-list'), one_word),
+            'missions_q': (reverse('mission-list'), lambda n: [dict(q, is_completed='false') for q in one_word(n)]),
+            'missions_country': (reverse('mission-list'), lambda n: [{'country': rng.choice(COUNTRIES)}] * n),
+        }
+        results = []
+        for size in args.sizes:
+            seed(size, words, rng)
+            for indexed in (True, False):
+                if not indexed:
+                    search.uninstall(connection)
+                for name, (url, params) in patterns.items():
+                    # Unindexed searches scan every note; a few samples are enough.
+                    repeat = args.repeat if indexed else max(3, args.repeat // 10)
+                    timings = measure(client, url, params, repeat)
+                    results.append({
+                        'notes': size,
+                        'pattern': name,
+                        'backend': search.backend(),
+                        'p50_ms': timings[50],
+                        'p95_ms': timings[95],
+                    })
+            search.install(connection)
+            harness.wipe(Mission)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+CPU cost of serializing and rendering large mission and cat lists.
+
+Objects are loaded once (missions with their three targets prefetched) so only Python
+work is timed, with `time.process_time`. For each payload it compares DRF's field-by-field
+serialization (a plain ListSerializer around the same child) with the FastListSerializer
+fast path, and DRF's JSONRenderer with api.fastjson's renderer (orjson when installed;
+`orjson` is reported in the results).
+
+    python -m benchmarks.bench_serialization --sizes 10000
+"""
+import time
+
+from . import harness
+
+
+def cpu(func, repeat):
+    """Best-of-`repeat` CPU seconds of `func()`, and its last result."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = func()
+        best = min(best, time.process_time() - started)
+    return best, result
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(10000,))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.serializers import ListSerializer
+        from api import fastjson
+        from api.models import Cat, Mission, Target
+        from api.serializers import CatSerializer, MissionSerializer
+
+        results = []
+        for size in args.sizes:
+            Cat.objects.bulk_create(
+                Cat(name=f"Cat {i}", years_of_experience=i % 20, breed="Bengal", salary=1000 + i) for i in range(size)
+            )
+            missions = Mission.objects.bulk_create(Mission(remaining_targets=3) for _ in range(size))
+            Target.objects.bulk_create(
+                Target(mission=mission, name=f"T{n}", country="UA", notes="Intel " * 5)
+                for mission in missions for n in range(3)
+            )
+            payloads = {
+                'missions': (MissionSerializer, list(Mission.objects.prefetch_related('targets').order_by('pk'))),
+                'cats': (CatSerializer, list(Cat.objects.order_by('pk'))),
+            }
+            for name, (serializer_class, objects) in payloads.items():
+                fields_seconds, data = cpu(lambda: ListSerializer(objects, child=serializer_class()).data, args.repeat)
+                fast_seconds, fast_data = cpu(lambda: serializer_class(objects, many=True).data, args.repeat)
+                assert list(fast_data) == list(data), "fast path output differs"
+                drf_render, body = cpu(lambda: JSONRenderer().render(data), args.repeat)
+                fast_render, fast_body = cpu(lambda: fastjson.FastJSONRenderer().render(data), args.repeat)
+                assert fast_body == body, "rendered output differs"
+                results.append({
+                    'rows': size,
+                    'payload': name,
+                    'orjson': fastjson.orjson is not None,
+                    'fields_serialize_ms': fields_seconds * 1000,
+                    'fast_serialize_ms': fast_seconds * 1000,
+                    'drf_render_ms': drf_render * 1000,
+                    'fast_render_ms': fast_render * 1000,
+                    'speedup': (fields_seconds + drf_render) / (fast_seconds + fast_render),
+                })
+            harness.wipe(Mission, Cat)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Worker startup: time to load the WSGI application and URLconf in a fresh process, and its peak RSS.
+
+Each size is a number of processes started one after another (api.startup.measure); the
+percentiles are over those processes. No database is touched. `manage.py startup_report`
+shows the same numbers with a per-package import breakdown.
+
+    python -m benchmarks.bench_startup --sizes 5 20
+"""
+import os
+import statistics
+
+from . import harness
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(5, 20))
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SCA.settings')
+    import django
+    django.setup()
+    from api import startup
+
+    results = []
+    for size in args.sizes:
+        runs = [startup.measure() for _ in range(size)]
+        seconds = harness.percentiles([run['seconds'] * 1000 for run in runs], points=(50, 95))
+        results.append({
+            'processes': size,
+            'ready_p50_ms': seconds[50],
+            'ready_p95_ms': seconds[95],
+            'rss_mib': statistics.median(run['rss_bytes'] or 0 for run in runs) / 2 ** 20,
+            'modules': runs[-1]['modules'],
+            'optional_loaded': ','.join(name for name, loaded in runs[-1]['loaded'].items() if loaded) or '-',
+        })
+    harness.report(results, as_json=args.json, output=args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-request cost of the rate limiter (api.throttling).
+
+Times the throttle check on its own (`allow_request`, in microseconds) for the in-process
+and the cache-backed store, over `size` distinct clients, and the latency of a cheap API
+request (a cached cat detail) with throttling off and on. Rates are set high enough that
+nothing is rejected, so only the bookkeeping is measured.
+
+    python -m benchmarks.bench_throttle --sizes 1000 100000
+"""
+import time
+
+from . import harness
+
+STORES = {
+    'memory': 'api.throttling.MemoryStore',
+    'cache': 'api.throttling.CacheStore',
+}
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(1000, 100000))
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from django.conf import settings
+        from django.urls import reverse
+        from rest_framework.test import APIClient, APIRequestFactory
+        from api import throttling
+        from api.models import Cat
+        from api.views import CatViewSet
+
+        cat = Cat.objects.create(name="Bench", years_of_experience=1, breed="Bengal", salary=1)
+        url = reverse('cat-detail', kwargs={'pk': cat.pk})
+        view = CatViewSet(basename='cat', action='create')
+        factory = APIRequestFactory()
+        client = APIClient()
+
+        def request_latency():
+            samples = []
+            for _ in range(args.requests):
+                with harness.timer() as elapsed:
+                    client.get(url)
+                samples.append(elapsed['seconds'] * 1e6)
+            return harness.percentiles(samples, points=(50, 95))
+
+        settings.THROTTLE = {'ENABLED': False}
+        baseline = request_latency()
+        results = []
+        for size in args.sizes:
+            requests = [factory.post('/api/cats/', REMOTE_ADDR=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}')
+                        for i in range(size)]
+            for name, path in STORES.items():
+                throttling.reset()
+                settings.THROTTLE = {'STORE': path, 'RATES': {'default': '1000000/min', 'cat.create': '1000000/min'}}
+                throttle = throttling.TokenBucketThrottle()
+                started = time.perf_counter()
+                for request in requests:
+                    assert throttle.allow_request(request, view)
+                check_us = (time.perf_counter() - started) / size * 1e6
+                with_throttle = request_latency()
+                results.append({
+                    'clients': size,
+                    'store': name,
+                    'check_us': check_us,
+                    'request_p50_us': with_throttle[50],
+                    'baseline_p50_us': baseline[50],
+                    'overhead_p50_us': with_throttle[50] - baseline[50],
+                    'request_p95_us': with_throttle[95],
+                })
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput and peak memory of the streaming import and export (api.transfer).
+
+For each size and format a file of cats and one of missions (three targets each) is
+generated, imported, then exported again. Peak memory is measured with tracemalloc and
+should stay flat as the size grows; tracemalloc also slows the run down, so compare the
+rows/s figures only with other runs of this script.
+
+    python -m benchmarks.bench_transfer --sizes 10000 100000
+"""
+import csv
+import json
+import os
+import tempfile
+import tracemalloc
+
+from . import harness, stubs
+
+
+def write_file(path, kind, fmt, size):
+    from api.transfer import MAX_TARGETS, TARGET_FIELDS
+
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        if kind == 'cats':
+            rows = ({"name": f"Cat {i}", "years_of_experience": i % 20, "breed": "Bengal", "salary": "1000.00"}
+                    for i in range(size))
+        else:
+            rows = ({"targets": [{"name": f"T{n}", "country": "UA", "notes": "", "is_completed": False}
+                                 for n in range(MAX_TARGETS)]} for _ in range(size))
+        if fmt == 'ndjson':
+            for row in rows:
+                fh.write(json.dumps(row) + "\n")
+            return
+        if kind == 'cats':
+            writer = csv.DictWriter(fh, fieldnames=["name", "years_of_experience", "breed", "salary"])
+            writer.writeheader()
+            writer.writerows(rows)
+            return
+        columns = [f'target_{n}_{field}' for n in range(1, MAX_TARGETS + 1) for field in TARGET_FIELDS]
+        writer = csv.DictWriter(fh, fieldnames=['cat'] + columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({f'target_{n}_{field}': target[field]
+                             for n, target in enumerate(row['targets'], start=1) for field in TARGET_FIELDS})
+
+
+def measured(func):
+    tracemalloc.start()
+    try:
+        with harness.timer() as elapsed:
+            result = func()
+        return result, elapsed['seconds'], tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = harness.parser(__doc__, sizes=(10000,))
+    parser.add_argument('--batch-size', type=int, help="Rows per import batch (default: IMPORT_EXPORT setting).")
+    args = parser.parse_args()
+    teardown = harness.setup_django()
+    try:
+        from api import transfer
+        from api.models import Cat, Mission
+        from api.serializers import CatSerializer, MissionSerializer
+
+        results = []
+        with stubs.breed_server() as url, tempfile.TemporaryDirectory() as directory:
+            stubs.seed_breeds(url)
+            for size in args.sizes:
+                for fmt in transfer.FORMATS:
+                    for kind, model, serializer_class in (
+                        ('cats', Cat, CatSerializer), ('missions', Mission, MissionSerializer),
+                    ):
+                        path = os.path.join(directory, f'{kind}.{fmt}')
+                        write_file(path, kind, fmt, size)
+                        importer = transfer.IMPORTERS[kind](batch_size=args.batch_size)
+                        with open(path, 'rb') as stream:
+                            report, import_seconds, import_mb = measured(lambda: importer.run(stream, fmt))
+
+                        def export():
+                            rows = transfer.export_rows(transfer.export_queryset(kind), serializer_class, fmt)
+                            with open(os.devnull, 'w') as sink:
+                                sink.writelines(rows)
+
+                        _, export_seconds, export_mb = measured(export)
+                        results.append({
+                            'rows': size,
+                            'kind': kind,
+                            'format': fmt,
+                            'errors': report.error_count,
+                            'import_rows_per_s': report.created / import_seconds,
+                            'import_peak_mb': import_mb,
+                            'export_rows_per_s': size / export_seconds,
+                            'export_peak_mb': export_mb,
+                        })
+                        harness.wipe(model)
+        harness.report(results, as_json=args.json, output=args.output)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
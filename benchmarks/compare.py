@@ -0,0 +1,79 @@
+"""
+Compares two benchmark result files written with `--output` and gates regressions.
+
+Rows are matched on their descriptive fields (scenario, sizes, modes...). Latencies
+(`*_ms`, `*_us`, `seconds`) must not grow and throughputs (`*rps`, `*_per_s`) must not
+drop by more than `--threshold` percent; the exit status is 1 if any did.
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ('_ms', '_us', 'seconds')
+HIGHER_IS_BETTER = ('rps', '_per_s')
+# Outcomes of a run rather than part of what was measured.
+NOT_KEYS = {'errors', 'requests'}
+
+
+def direction(field):
+    if field.endswith(LOWER_IS_BETTER):
+        return -1
+    if field.endswith(HIGHER_IS_BETTER):
+        return 1
+    return 0
+
+
+def row_key(row):
+    return tuple(sorted(
+        (field, value) for field, value in row.items()
+        if field not in NOT_KEYS and not direction(field) and not isinstance(value, float)
+    ))
+
+
+def load(path):
+    with open(path, encoding='utf-8') as fh:
+        document = json.load(fh)
+    return document.get('meta', {}), {row_key(row): row for row in document['results']}
+
+
+def compare(base, head, threshold):
+    """Yields (key, field, base value, head value, change %, regressed) for every shared metric."""
+    for key, head_row in head.items():
+        base_row = base.get(key)
+        if base_row is None:
+            continue
+        for field, value in head_row.items():
+            sign = direction(field)
+            if not sign or not base_row.get(field):
+                continue
+            change = (value - base_row[field]) / base_row[field] * 100
+            yield key, field, base_row[field], value, change, change * sign < -threshold
+        if head_row.get('errors', 0) > base_row.get('errors', 0):
+            yield key, 'errors', base_row.get('errors', 0), head_row['errors'], 0.0, True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Allowed change in percent.")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print(f"base {(base_meta.get('commit') or '?')[:12]}  head {(head_meta.get('commit') or '?')[:12]}")
+    regressions = 0
+    for key, field, old, new, change, regressed in compare(base, head, args.threshold):
+        label = " ".join(f"{name}={value}" for name, value in key)
+        flag = "REGRESSION" if regressed else ""
+        print(f"{label:<50} {field:>14} {old:>12.4f} {new:>12.4f} {change:>+8.1f}%  {flag}")
+        regressions += regressed
+    if regressions:
+        print(f"{regressions} metric(s) regressed by more than {args.threshold}%.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
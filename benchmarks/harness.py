@@ -0,0 +1,131 @@
+"""
+Shared helpers for the standalone benchmark scripts in this package.
+
+Each script is run from the project root, e.g. ``python -m benchmarks.bench_mission_bulk``,
+and works against a throwaway test database so the development database is never touched.
+``--output results.json`` saves the results together with the commit and environment they
+were measured on; ``python -m benchmarks.compare`` diffs two such files.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def setup_django(file_db=False):
+    """
+    Configures Django and creates a throwaway test database. Returns a teardown callable.
+    Multi-threaded benchmarks need `file_db=True`: SQLite's shared in-memory test database
+    does not allow concurrent writers from several connections.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SCA.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    # Benchmarks send every request from one client; bench_throttle measures the limits themselves.
+    settings.THROTTLE = {**getattr(settings, 'THROTTLE', {}), 'ENABLED': False}
+
+    from django.db import connection
+    if file_db and connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+            tempfile.gettempdir(), 'sca_benchmark.sqlite3'
+        )
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    # Production-like: DEBUG would keep every SQL statement in connection.queries.
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    def teardown():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    return teardown
+
+
+def parser(description, sizes=(1000, 10000)):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(sizes), help="Data volumes to benchmark.")
+    parser.add_argument('--json', action='store_true', help="Emit results as JSON lines instead of a table.")
+    parser.add_argument('--output', help="Also write the results and run metadata to this JSON file.")
+    return parser
+
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'seconds' key is filled in when the block exits."""
+    result = {}
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - started
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Returns {point: value} for the given percentiles of `samples` (nearest rank)."""
+    samples = sorted(samples)
+    if not samples:
+        return {point: 0.0 for point in points}
+    result = {50: statistics.median(samples)} if 50 in points else {}
+    for point in points:
+        result.setdefault(point, samples[min(len(samples) - 1, int(len(samples) * point / 100))])
+    return result
+
+
+def metadata():
+    """Describes where results were measured, so runs from different commits can be compared."""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    info = {
+        'benchmark': Path(sys.argv[0]).stem,
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+    try:
+        import django
+        from django.db import connection
+        info.update(django=django.get_version(), database=connection.vendor)
+    except Exception:
+        pass
+    return info
+
+
+def wipe(*models):
+    for model in models:
+        model.objects.all().delete()
+
+
+def report(results, as_json=False, output=None):
+    if output:
+        with open(output, 'w', encoding='utf-8') as fh:
+            json.dump({'meta': metadata(), 'results': results}, fh, indent=2, sort_keys=True)
+    if as_json:
+        for row in results:
+            print(json.dumps(row, sort_keys=True))
+        return
+    columns = list(results[0].keys()) if results else []
+    print("  ".join(f"{column:>16}" for column in columns))
+    for row in results:
+        print("  ".join(f"{_format(row[column]):>16}" for column in columns))
+
+
+def _format(value):
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
@@ -0,0 +1,68 @@
+"""Local stand-ins for external services used by the benchmarks."""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BREEDS = ["Siberian", "Bengal", "Persian", "Sphynx", "Maine Coon", "Abyssinian"]
+
+
+class _BreedHandler(BaseHTTPRequestHandler):
+    failures_left = 0
+    delay = 0.0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            failing = self.failures_left > 0
+            type(self).failures_left -= failing
+        if failing:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps([{"name": name} for name in BREEDS]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """Accepts webhook deliveries (e.g. JOBS['NOTIFY_URL']) on any path."""
+        if self.delay:
+            time.sleep(self.delay)
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def breed_server(fail_first=0, delay=0.0):
+    """
+    Serves a TheCatAPI-compatible /v1/breeds on localhost; yields its URL. The first
+    `fail_first` requests get a 503, and every response is delayed by `delay` seconds.
+    """
+    handler = type('BreedHandler', (_BreedHandler,), {'failures_left': fail_first, 'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/v1/breeds"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def seed_breeds(url):
+    """Seeds the breed registry from the stub server instead of TheCatAPI."""
+    from api.breeds import TheCatAPIBreedSource, registry
+
+    registry._source = TheCatAPIBreedSource(url=url)
+    registry.refresh()